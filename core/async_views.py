@@ -0,0 +1,168 @@
+import base64
+import binascii
+import decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed, NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import timed, view_finished
+from .middleware import JWTCookieAuthentication
+from .permissions import ahas_perms, required_permissions
+from .renderers import orjson_dumps
+from .throttling import get_bucket_store, LocalBucketStore
+
+
+class APIJSONEncoder(JSONEncoder):
+    """DRF's encoder, with Decimals as strings like the serializers emit them."""
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+def api_response(data, status=200):
+    view_finished()
+    with timed('render'):
+        content = orjson_dumps(data, APIJSONEncoder)
+        if content is None:
+            return JsonResponse(data, status=status, safe=False, encoder=APIJSONEncoder)
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Base for native async (ASGI) read endpoints.
+
+    Runs JWT authentication through ``JWTCookieAuthentication.aauthenticate``,
+    the ``RolePermission`` check (from the token's permission bitmask) and
+    the configured throttles without leaving the event loop, then hands
+    off to an ``async def get``. Subclasses read with the async ORM
+    (``aget``/``aiterator``) from ``.values()``, so no thread hop happens for
+    the common request path.
+    """
+    authentication_class = JWTCookieAuthentication
+    http_method_names = ['get', 'head', 'options']
+
+    async def authenticate(self, request):
+        result = await self.authentication_class().aauthenticate(request)
+        if result is None:
+            raise AuthenticationFailed("Authentication credentials were not provided.")
+        request.user, request.auth = result
+
+    async def check_throttles(self, request):
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            # In-process buckets are microseconds of CPU; a shared store is network I/O
+            if isinstance(get_bucket_store(default_cache), LocalBucketStore):
+                allowed = throttle.allow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                wait = throttle.wait()
+                response = api_response({"detail": "Request was throttled."}, status=429)
+                if wait:
+                    response['Retry-After'] = str(int(wait) + 1)
+                return response
+        return None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            await self.authenticate(request)
+        except AuthenticationFailed as e:
+            return api_response({"detail": str(e.detail)}, status=401)
+        perms = required_permissions(request, self)
+        if perms is None or not await ahas_perms(request, perms):
+            return api_response({"detail": "You do not have permission to perform this action."}, status=403)
+        throttled = await self.check_throttles(request)
+        if throttled is not None:
+            return throttled
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncKeysetListView(AsyncAPIView):
+    """
+    Async list endpoint with forward-only keyset pagination on ``id``.
+
+    Subclasses set ``queryset`` and ``fields`` and may override
+    ``to_representation``. The response envelope matches the DRF cursor
+    pagination (``next``/``previous``/``results``).
+    """
+    queryset = None
+    fields = ()
+
+    def to_representation(self, row):
+        return row
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.GET.get('page_size', api_settings.PAGE_SIZE))
+        except ValueError:
+            size = api_settings.PAGE_SIZE
+        return max(1, min(size, getattr(settings, 'API_MAX_PAGE_SIZE', 500)))
+
+    def decode_cursor(self, request):
+        """The id the page starts after; ``NotFound`` for a malformed cursor, as in the sync views."""
+        cursor = request.GET.get('cursor')
+        if not cursor:
+            return None
+        try:
+            return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            raise NotFound(CursorPagination.invalid_cursor_message)
+
+    def encode_cursor(self, last_id):
+        return base64.urlsafe_b64encode(str(last_id).encode()).decode()
+
+    async def get(self, request):
+        page_size = self.get_page_size(request)
+        try:
+            after = self.decode_cursor(request)
+        except NotFound as e:
+            return api_response({"detail": str(e.detail)}, status=404)
+
+        queryset = self.queryset.order_by('id')
+        if after is not None:
+            queryset = queryset.filter(id__gt=after)
+
+        # Fetch one extra row to know whether there is a next page
+        rows = [
+            row async for row in queryset.values(*self.fields)[:page_size + 1].aiterator()
+        ]
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_url = None
+        if has_next:
+            params = request.GET.copy()
+            params['cursor'] = self.encode_cursor(rows[-1]['id'])
+            # QueryDict.urlencode keeps every value of repeated parameters
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+        return api_response({
+            "next": next_url,
+            "previous": None,
+            "results": [self.to_representation(row) for row in rows],
+        })
+
+
+class AsyncDetailView(AsyncAPIView):
+    """Async retrieve of one row by ``pk`` with ``aget()``."""
+    queryset = None
+    fields = ()
+
+    def to_representation(self, row):
+        return row
+
+    async def get(self, request, pk):
+        try:
+            row = await self.queryset.values(*self.fields).aget(pk=pk)
+        except self.queryset.model.DoesNotExist:
+            return api_response({"detail": "No %s matches the given query." % self.queryset.model._meta.object_name}, status=404)
+        return api_response(self.to_representation(row))
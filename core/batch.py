@@ -0,0 +1,103 @@
+from django.conf import settings
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .cache import get_cache, object_cache_keys
+from .permissions import RolePermission
+
+
+def parse_ids(raw):
+    """
+    Ids from ``"1,2,3"`` or a JSON list, deduplicated in input order.
+    Raises ``ValueError``.
+    """
+    if isinstance(raw, str):
+        raw = [part.strip() for part in raw.split(',') if part.strip()]
+    if not isinstance(raw, list):
+        raise ValueError("ids must be a comma-separated string or a list of integers.")
+    ids = []
+    for value in raw:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f'Invalid id "{value}".')
+        try:
+            ids.append(int(value))
+        except ValueError:
+            raise ValueError(f'Invalid id "{value}".')
+    return list(dict.fromkeys(ids))
+
+
+class BatchRetrieveView(APIView):
+    """
+    Many objects by id in one request: ``GET .../batch/?ids=3,1,2`` or
+    ``POST .../batch/`` with ``{"ids": [3, 1, 2]}`` for long lists::
+
+        {"results": [{"id": 3, ...}, {"id": 1, ...}], "missing": [2]}
+
+    Results follow the order of the ids (duplicates once); ids with no row
+    are listed in ``missing``. Each object's payload is kept in the shared
+    cache under a key of its own, versioned per object in the view's
+    ``cache_namespace`` (``object_cache_keys``), so only the ids not cached
+    are read, with one ``id__in`` query. Saving or deleting an object moves
+    just its version on (``bump_object_versions``, called from the apps'
+    ``signals``), so writes to other objects leave it cached. Both methods
+    need the model's ``view`` permission.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    queryset = None
+    serializer_class = None
+    cache_namespace = None
+
+    @property
+    def required_permissions(self):
+        meta = self.queryset.model._meta
+        return {'POST': [f'{meta.app_label}.view_{meta.model_name}']}
+
+    def get(self, request):
+        return self.batch(request.query_params.get('ids', ''))
+
+    def post(self, request):
+        return self.batch(request.data.get('ids') if isinstance(request.data, dict) else request.data)
+
+    def batch(self, raw_ids):
+        try:
+            ids = parse_ids(raw_ids)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids:
+            return Response({"error": "ids is required."}, status=status.HTTP_400_BAD_REQUEST)
+        max_ids = getattr(settings, 'API_BATCH_MAX_IDS', 500)
+        if len(ids) > max_ids:
+            return Response(
+                {"error": f"Too many ids; the limit is {max_ids} per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        found = self.get_objects(ids)
+        return Response({
+            "results": [found[pk] for pk in ids if pk in found],
+            "missing": [pk for pk in ids if pk not in found],
+        }, status=status.HTTP_200_OK)
+
+    def get_objects(self, ids):
+        """``{id: payload}`` for the ids that exist, from the cache and then the database."""
+        use_cache = getattr(settings, 'API_RESPONSE_CACHE_ENABLED', True)
+        found = {}
+        if use_cache:
+            cache = get_cache()
+            keys = object_cache_keys(self.cache_namespace, ids)
+            ids_by_key = {key: pk for pk, key in keys.items()}
+            found = {ids_by_key[key]: data for key, data in cache.get_many(list(ids_by_key)).items()}
+
+        misses = [pk for pk in ids if pk not in found]
+        if misses:
+            rows = self.queryset.filter(pk__in=misses)
+            fetched = {item['id']: item for item in self.serializer_class(rows, many=True).data}
+            found.update(fetched)
+            if use_cache and fetched:
+                cache.set_many(
+                    {keys[pk]: data for pk, data in fetched.items()},
+                    timeout=getattr(settings, 'API_CACHE_TIMEOUT', 600),
+                )
+        return found
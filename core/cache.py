@@ -0,0 +1,121 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_cache_control
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache():
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'api:version:{namespace}'
+
+
+def get_resource_versions(namespaces):
+    """Current version number of each namespace (1 when never bumped)."""
+    cache = get_cache()
+    found = cache.get_many([_version_key(ns) for ns in namespaces])
+    return [found.get(_version_key(ns), 1) for ns in namespaces]
+
+
+def _incr_version(cache, key):
+    # add() is a no-op when the key exists; incr() is atomic on Redis
+    cache.add(key, 1, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, timeout=None)
+
+
+def bump_resource_version(*namespaces):
+    """
+    Invalidate every cached payload of the given namespaces by moving their
+    version on. Old entries are never read again and simply expire.
+    """
+    cache = get_cache()
+    for namespace in namespaces:
+        _incr_version(cache, _version_key(namespace))
+
+
+def _object_version_key(namespace, pk):
+    return f'api:object-version:{namespace}:{pk}'
+
+
+def object_cache_keys(namespace, pks):
+    """
+    ``{pk: key}`` of the objects' cached payloads (see ``core.batch``),
+    each under the object's own current version. Read the keys before the
+    rows: a payload fetched before a concurrent write is then stored under
+    the version that write moved past, where no one looks for it.
+    """
+    version_keys = {pk: _object_version_key(namespace, pk) for pk in pks}
+    versions = get_cache().get_many(list(version_keys.values()))
+    return {pk: f'api:object:{namespace}:{pk}:{versions.get(key, 1)}' for pk, key in version_keys.items()}
+
+
+def bump_object_versions(namespace, pks):
+    """Invalidate the cached payloads of the given objects only, after a save or delete."""
+    cache = get_cache()
+    for pk in pks:
+        _incr_version(cache, _object_version_key(namespace, pk))
+
+
+class CachedResponseMixin:
+    """
+    Cache the serialized payload of ``list``/``retrieve`` in the shared cache.
+
+    Keys combine the view's ``cache_namespace``, the current versions of that
+    namespace and of ``cache_depends_on``, the renderer format and the full
+    request path (query string included, so each filter/page is its own
+    entry). Saves and deletes bump the versions (see the apps' ``signals``),
+    which makes every older entry unreachable.
+
+    Responses carry an ``ETag`` derived from the same key, so a matching
+    ``If-None-Match`` gets a 304 without touching the cache or the database.
+    """
+    cache_namespace = None
+    cache_depends_on = ()
+
+    def get_cache_key(self, request):
+        namespaces = (self.cache_namespace,) + tuple(self.cache_depends_on)
+        versions = get_resource_versions(namespaces)
+        fingerprint = '|'.join(
+            [f'{ns}:{v}' for ns, v in zip(namespaces, versions)]
+            + [request.accepted_renderer.format, request.get_full_path()]
+        )
+        return 'api:response:' + hashlib.md5(fingerprint.encode()).hexdigest()
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        if not getattr(settings, 'API_RESPONSE_CACHE_ENABLED', True):
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key(request)
+        etag = f'"{key.rsplit(":", 1)[-1]}"'
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, timeout=getattr(settings, 'API_CACHE_TIMEOUT', 600))
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,84 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.utils.decorators import sync_and_async_middleware
+
+# True while handling a request whose reads may go to a replica
+_replica_reads = ContextVar('replica_reads', default=False)
+
+READ_METHODS = ('GET', 'HEAD')
+PIN_COOKIE = 'db_primary_pin'
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+class ReplicaRouter:
+    """
+    Send reads to a random ``replica_<n>`` database during GET/HEAD
+    requests (see ``replica_read_middleware``) and everything else to
+    ``default``.
+
+    Reads stay on the primary inside a transaction and for the rest of a
+    request once it has written, so they always see their own writes.
+    Replicas are never migrated; they get the schema through replication.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or connections['default'].in_atomic_block:
+            return 'default'
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else 'default'
+
+    def db_for_write(self, model, **hints):
+        _replica_reads.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data everywhere, so related objects may come from different aliases
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+@sync_and_async_middleware
+def replica_read_middleware(get_response):
+    """
+    Mark GET/HEAD requests as replica reads. A successful write sets a
+    short-lived cookie that keeps the client's next requests on the primary
+    for ``DATABASE_REPLICA_PIN_SECONDS``, covering replication lag.
+    """
+    def begin(request):
+        allowed = request.method in READ_METHODS and PIN_COOKIE not in request.COOKIES
+        return _replica_reads.set(allowed)
+
+    def finish(request, response):
+        if request.method not in READ_METHODS + ('OPTIONS',) and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax', secure=not settings.DEBUG,
+            )
+        return response
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = begin(request)
+            try:
+                response = await get_response(request)
+            finally:
+                _replica_reads.reset(token)
+            return finish(request, response)
+    else:
+        def middleware(request):
+            token = begin(request)
+            try:
+                response = get_response(request)
+            finally:
+                _replica_reads.reset(token)
+            return finish(request, response)
+    return middleware
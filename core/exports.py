@@ -0,0 +1,89 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .jobs import job_accepted
+from .permissions import RolePermission
+from .tasks import export_table
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+    def write(self, value):
+        return value
+
+
+class StreamingExportView(APIView):
+    """
+    Stream a whole table as NDJSON (default) or CSV.
+
+    Rows are read with a server-side cursor via ``.iterator(chunk_size=...)``
+    and encoded straight from ``.values_list()``, so no model instances or
+    serializers are built and worker memory stays flat regardless of table
+    size. Pick the format with ``?export_format=ndjson|csv``.
+
+    With ``?async=true`` the export is written to a file by a background job
+    (``core.tasks.export_table``) instead; the 202 response links to the job,
+    whose status links to the file once it is ready.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    queryset = None
+    export_fields = ()
+    export_filename = 'export'
+    chunk_size = 2000
+
+    content_types = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_rows(self):
+        return (
+            self.get_queryset()
+            .values_list(*self.export_fields)
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def stream_ndjson(self, rows):
+        encoder = DjangoJSONEncoder(separators=(',', ':'))
+        fields = self.export_fields
+        for row in rows:
+            yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+    def stream_csv(self, rows):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.export_fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def get(self, request):
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in self.content_types:
+            return Response(
+                {"error": f"Unsupported export_format '{export_format}'. Use 'ndjson' or 'csv'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.query_params.get('async', '').lower() in ('1', 'true', 'yes'):
+            job = export_table.enqueue(
+                user=request.user,
+                view=f'{type(self).__module__}.{type(self).__qualname__}',
+                export_format=export_format,
+            )
+            return job_accepted(request, job)
+
+        rows = self.get_rows()
+        stream = self.stream_csv(rows) if export_format == 'csv' else self.stream_ndjson(rows)
+        response = StreamingHttpResponse(stream, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.export_filename}.{export_format}"'
+        )
+        return response
@@ -0,0 +1,109 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """
+    Declarative query-parameter filtering.
+
+    Views map query parameters to ORM lookups through ``query_filters``::
+
+        query_filters = {
+            'category': 'category',
+            'min_price': 'unit_price__gte',
+            'created_after': 'created_at__gte',
+        }
+
+    Values are converted with the target model field's ``to_python`` so bad
+    input becomes a 400 with a per-parameter message instead of a 500.
+    """
+
+    def get_model_field(self, model, lookup):
+        parts = lookup.split('__')
+        field = None
+        for part in parts:
+            try:
+                field = model._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            if field.is_relation and field.related_model is not None:
+                model = field.related_model
+        return field
+
+    def filter_queryset(self, request, queryset, view):
+        query_filters = getattr(view, 'query_filters', None) or {}
+        lookups = {}
+        errors = {}
+
+        for param, lookup in query_filters.items():
+            raw = request.query_params.get(param)
+            if raw in (None, ''):
+                continue
+            field = self.get_model_field(queryset.model, lookup)
+            if field is not None and field.is_relation:
+                field = field.target_field
+            try:
+                value = field.to_python(raw) if field is not None else raw
+            except DjangoValidationError as e:
+                errors[param] = e.messages
+                continue
+            if isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            lookups[lookup] = value
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups) if lookups else queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    ``OrderingFilter`` that always ends with ``id`` so rows that tie on the
+    requested key come back in a deterministic order (needed by cursor
+    pagination).
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    ``?search=`` backed by a stored ``tsvector`` column.
+
+    On PostgreSQL the query is matched against ``view.search_vector_field``
+    (kept up to date by a database trigger, see the app migrations), so no
+    vectors are computed at query time. Other backends fall back to
+    ``icontains`` over ``view.search_fallback_fields``.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+
+        if connection.vendor == 'postgresql':
+            vector_field = getattr(view, 'search_vector_field', 'search_vector')
+            config = getattr(view, 'search_config', 'english')
+            query = SearchQuery(term, config=config, search_type='websearch')
+            return queryset.filter(**{vector_field: query})
+
+        condition = Q()
+        for field in getattr(view, 'search_fallback_fields', ()):
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition)
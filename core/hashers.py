@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+)
+
+
+# Same algorithm names as Django's hashers, so existing hashes are
+# recognised; must_update() flags hashes made with a different cost.
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    rounds = settings.PASSWORD_BCRYPT_ROUNDS
@@ -0,0 +1,180 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import request_metrics
+
+# Timings of the sampled request being handled in this context, if any
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('durations', 'queries', 'view_started', '_open')
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+        self.view_started = None
+        self._open = set()
+
+    def add(self, phase, seconds):
+        self.durations[phase] = self.durations.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to ``phase`` of the current sampled
+    request. Does nothing outside one, and nested blocks of the same phase
+    are only counted once.
+    """
+    timings = _current.get()
+    if timings is None or phase in timings._open:
+        yield
+        return
+    timings._open.add(phase)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings._open.discard(phase)
+        timings.add(phase, time.perf_counter() - started)
+
+
+def view_finished():
+    """
+    Close the ``view`` phase of the current sampled request: the time from
+    the view being called until now (the renderers call this before they
+    encode, so it covers the handler, its queries and serialization).
+    """
+    timings = _current.get()
+    if timings is not None and timings.view_started is not None:
+        timings.add('view', time.perf_counter() - timings.view_started)
+        timings.view_started = None
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - started)
+
+
+def _add_query_wrapper(connection, **kwargs):
+    # At the bottom of the stack: connection.execute_wrapper() blocks open
+    # around this point pop the last entry when they exit
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    """
+    Hook the query timing in once per process: a query wrapper on every
+    database connection (``connection.execute_wrapper`` style, added as each
+    connection is opened).
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_add_query_wrapper, dispatch_uid='core.instrumentation')
+        for connection in connections.all(initialized_only=True):
+            _add_query_wrapper(connection)
+        _installed = True
+
+
+def server_timing(timings, total):
+    parts = []
+    for phase, seconds in timings.durations.items():
+        part = f'{phase};dur={seconds * 1000:.1f}'
+        if phase == 'db':
+            part += f';desc="{timings.queries} queries"'
+        parts.append(part)
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+class RequestMetricsMiddleware:
+    """
+    Count and time every request, tagged by resolved URL name, into
+    ``core.metrics.request_metrics`` (served at ``/metrics``).
+
+    ``METRICS_SAMPLE_RATE`` of the requests are also broken down into query
+    count and time, authentication, view (up to rendering) and render time,
+    and get a ``Server-Timing`` header when ``METRICS_SERVER_TIMING`` is on. Requests
+    that are not sampled only pay for two clock reads and a counter update.
+    Keep it first in ``MIDDLEWARE`` so the total covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install()
+
+    def begin(self):
+        if random.random() < settings.METRICS_SAMPLE_RATE:
+            timings = RequestTimings()
+            return timings, _current.set(timings)
+        return None, None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def finish(self, request, response, timings, started):
+        if timings is not None and timings.view_started is not None:
+            # Not rendered by an API renderer (304s, streaming, plain views)
+            timings.add('view', time.perf_counter() - timings.view_started)
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.view_name if match is not None else 'unmatched'
+        request_metrics.observe(route, request.method, response.status_code, total, timings)
+        if timings is not None and settings.METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(timings, total)
+        return response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        timings, token = self.begin()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        return self.finish(request, response, timings, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        timings, token = self.begin()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                _current.reset(token)
+        return self.finish(request, response, timings, started)
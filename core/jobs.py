@@ -0,0 +1,467 @@
+import logging
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import autodiscover_modules
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_LOW = -10
+PRIORITY_NORMAL = 0
+PRIORITY_HIGH = 10
+
+
+class JobFailed(Exception):
+    """Raise from a task to fail its job right away, without retries."""
+
+
+class _JobStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = FileSystemStorage(location=settings.JOB_FILE_ROOT)
+
+
+# Uploads handed to jobs and files they produce. Workers on other hosts
+# need JOB_FILE_ROOT on shared storage.
+job_storage = _JobStorage()
+
+
+# Task registry
+
+_tasks = {}
+_discovered = False
+
+
+class Task:
+    """A function that can run in the background; see ``task``."""
+
+    def __init__(self, func, name, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, user=None, priority=None, **kwargs):
+        """Queue a run with JSON-serializable ``kwargs``; returns the ``Job``."""
+        return enqueue(
+            self.name, kwargs,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_attempts, user=user,
+        )
+
+
+def task(name=None, priority=PRIORITY_NORMAL, max_attempts=None):
+    """
+    Register a function as a background task. Tasks take keyword arguments
+    only and return something JSON-serializable (stored as the job result).
+    Define them in an app's ``tasks`` module so workers find them.
+    """
+    def register(func):
+        registered = Task(func, name or f'{func.__module__}.{func.__name__}', priority, max_attempts)
+        _tasks[registered.name] = registered
+        return registered
+    return register
+
+
+def get_task(name):
+    global _discovered
+    if name not in _tasks and not _discovered:
+        autodiscover_modules('tasks')
+        _discovered = True
+    return _tasks.get(name)
+
+
+# Brokers: how workers hear about new jobs. The Job table is the queue in
+# every case, so a lost notification only delays a job until the next poll.
+
+class DatabaseBroker:
+    """Workers poll the Job table every ``JOB_POLL_INTERVAL`` seconds."""
+
+    def push(self, job):
+        pass
+
+    def wait(self, timeout, stop):
+        stop.wait(timeout)
+
+
+class RedisBroker:
+    """
+    Idle workers block on a Redis list instead of sleeping, and every new
+    job pushes a token onto it, so pickup is immediate with no polling load.
+    """
+    key = 'jobs:wakeup'
+    max_tokens = 10_000
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _client(self):
+        key = self.cache.make_and_validate_key(self.key)
+        return key, self.cache._cache.get_client(key, write=True)
+
+    def push(self, job):
+        key, client = self._client()
+        pipe = client.pipeline()
+        pipe.lpush(key, job.pk)
+        pipe.ltrim(key, 0, self.max_tokens - 1)
+        pipe.execute()
+
+    def wait(self, timeout, stop):
+        key, client = self._client()
+        client.brpop([key], timeout=max(1, int(timeout)))
+
+
+class LocalBroker:
+    """
+    In-process stand-in for development and single-process deployments:
+    jobs run on a small thread pool inside the web process, no worker
+    needed. Jobs left queued or running by a previous process are picked
+    up by a sweep at start-up and every ``JOB_SWEEP_INTERVAL`` seconds.
+    """
+
+    def __init__(self, threads):
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='jobs')
+        self.stop = threading.Event()
+        threading.Thread(target=self._sweep, name='jobs-sweep', daemon=True).start()
+
+    def _sweep(self):
+        worker = Worker(stop=self.stop, broker=self)
+        while not self.stop.is_set():
+            try:
+                worker.sweep()
+                due = Job.objects.filter(status=Job.QUEUED, run_after__lte=timezone.now())
+                for job_id in due.order_by('-priority', 'id').values_list('id', flat=True):
+                    self.executor.submit(self._run, job_id)
+            except Exception:
+                logger.exception("Background job sweep failed")
+            finally:
+                connections.close_all()
+            self.stop.wait(settings.JOB_SWEEP_INTERVAL)
+
+    def push(self, job, delay=0):
+        if delay > 0:
+            timer = threading.Timer(delay, self.push, args=(job,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.executor.submit(self._run, job.pk)
+
+    def _run(self, job_id):
+        try:
+            job = claim(job_id)
+            if job is not None and not run_job(job):
+                job.refresh_from_db(fields=['status', 'run_after'])
+                if job.status == Job.QUEUED:
+                    self.push(job, delay=(job.run_after - timezone.now()).total_seconds())
+        except Exception:
+            logger.exception("Background job %s crashed", job_id)
+        finally:
+            connections.close_all()
+
+    def wait(self, timeout, stop):
+        stop.wait(timeout)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                kind = settings.JOB_BROKER
+                if kind == 'local':
+                    _broker = LocalBroker(settings.JOB_LOCAL_THREADS)
+                elif kind == 'redis':
+                    cache = caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+                    if isinstance(cache, RedisCache):
+                        _broker = RedisBroker(cache)
+                    else:
+                        logger.warning("JOB_BROKER is 'redis' but the cache is not Redis; polling the database")
+                        _broker = DatabaseBroker()
+                else:
+                    _broker = DatabaseBroker()
+    return _broker
+
+
+@receiver(setting_changed)
+def _reset_jobs(setting, **kwargs):
+    global _broker
+    if setting in ('JOB_BROKER', 'JOB_LOCAL_THREADS'):
+        _broker = None
+    elif setting == 'JOB_FILE_ROOT':
+        job_storage._wrapped = empty
+
+
+# Queue operations
+
+def enqueue(name, kwargs=None, priority=PRIORITY_NORMAL, max_attempts=None, user=None):
+    """Insert a job and notify workers once the surrounding transaction commits."""
+    job = Job.objects.create(
+        name=name,
+        kwargs=kwargs or {},
+        priority=priority,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by_id=getattr(user, 'pk', None),
+    )
+    broker = get_broker()
+    transaction.on_commit(lambda: broker.push(job))
+    return job
+
+
+def claim(job_id=None):
+    """
+    Mark a due queued job as running and return it: ``job_id`` when given,
+    else the highest-priority one. Returns ``None`` when there is nothing to
+    do or another worker got there first. ``SKIP LOCKED`` keeps concurrent
+    workers off each other's rows; the conditional update makes the claim
+    safe on databases without it.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+    with transaction.atomic():
+        if job_id is None:
+            job_id = (
+                due.order_by('-priority', 'id')
+                .select_for_update(skip_locked=True)
+                .values_list('id', flat=True)
+                .first()
+            )
+            if job_id is None:
+                return None
+        claimed = due.filter(pk=job_id).update(
+            status=Job.RUNNING, started_at=now, heartbeat_at=now, finished_at=None, attempts=F('attempts') + 1
+        )
+    return Job.objects.get(pk=job_id) if claimed else None
+
+
+def _claimed(job):
+    """``job``'s row, as long as it is still this attempt's to run."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def _heartbeat(job):
+    """Renew ``job``'s heartbeat every ``JOB_HEARTBEAT_INTERVAL`` seconds while the block runs."""
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                if not _claimed(job).update(heartbeat_at=timezone.now()):
+                    break  # requeued as lost; the outcome will be discarded
+        except Exception:
+            logger.exception("Heartbeat of job %s failed", job.pk)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.pk}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome. A failed attempt is retried
+    after ``JOB_RETRY_DELAY * 2 ** (attempt - 1)`` seconds until
+    ``max_attempts`` is used up; ``JobFailed`` fails it at once. The
+    outcome is dropped if the job was requeued as lost in the meantime.
+    """
+    registered = get_task(job.name)
+    started = time.perf_counter()
+    try:
+        if registered is None:
+            raise JobFailed(f"Unknown task '{job.name}'.")
+        with _heartbeat(job):
+            result = registered(**job.kwargs)
+    except Exception as e:
+        error = str(e) if isinstance(e, JobFailed) else traceback.format_exc()
+        now = timezone.now()
+        if not isinstance(e, JobFailed) and job.attempts < job.max_attempts:
+            delay = settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            if _claimed(job).update(status=Job.QUEUED, error=error, run_after=now + timedelta(seconds=delay)):
+                logger.warning("Job %s (%s) failed, retrying in %ss", job.pk, job.name, delay)
+            else:
+                _log_lost_claim(job)
+        elif _claimed(job).update(status=Job.FAILED, error=error, finished_at=now):
+            logger.error("Job %s (%s) failed: %s", job.pk, job.name, error)
+        else:
+            _log_lost_claim(job)
+        return False
+    if not _claimed(job).update(status=Job.SUCCEEDED, result=result, error='', finished_at=timezone.now()):
+        _log_lost_claim(job)
+        return False
+    logger.info("Job %s (%s) done in %.2fs", job.pk, job.name, time.perf_counter() - started)
+    return True
+
+
+def _log_lost_claim(job):
+    logger.warning(
+        "Job %s (%s) attempt %s was requeued as lost while it ran; its outcome is dropped",
+        job.pk, job.name, job.attempts,
+    )
+
+
+def requeue_lost_jobs():
+    """
+    Hand jobs back to the queue whose worker died mid-run (no heartbeat
+    for ``JOB_TIMEOUT`` seconds); out of attempts, they fail.
+    """
+    now = timezone.now()
+    lost = Job.objects.filter(status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=settings.JOB_TIMEOUT))
+    failed = lost.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error="The worker running this job stopped.", finished_at=now
+    )
+    return lost.update(status=Job.QUEUED, run_after=now) + failed
+
+
+def prune_jobs(batch_size=1000):
+    """Delete finished jobs, and job files, older than ``JOB_RETENTION_DAYS``."""
+    cutoff = timezone.now() - timedelta(days=settings.JOB_RETENTION_DAYS)
+    deleted = 0
+    while True:
+        ids = list(Job.objects.filter(finished_at__lt=cutoff).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += Job.objects.filter(id__in=ids).delete()[0]
+    for directory in ('imports', 'exports'):
+        if not job_storage.exists(directory):
+            continue
+        for filename in job_storage.listdir(directory)[1]:
+            path = f'{directory}/{filename}'
+            if job_storage.get_modified_time(path) < cutoff:
+                job_storage.delete(path)
+    return deleted
+
+
+class Worker:
+    """
+    Claim and run jobs until ``stop`` is set (or, with ``burst``, until the
+    queue is empty). Lost jobs are requeued and old ones pruned every
+    ``JOB_SWEEP_INTERVAL`` seconds.
+    """
+
+    def __init__(self, stop=None, burst=False, poll_interval=None, broker=None):
+        self.stop = stop or threading.Event()
+        self.burst = burst
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.broker = broker or get_broker()
+        self.last_sweep = 0.0
+        self.processed = 0
+
+    def sweep(self):
+        if time.monotonic() - self.last_sweep < settings.JOB_SWEEP_INTERVAL:
+            return
+        self.last_sweep = time.monotonic()
+        requeued = requeue_lost_jobs()
+        if requeued:
+            logger.warning("Requeued %s lost job(s)", requeued)
+        prune_jobs()
+
+    def run(self):
+        while not self.stop.is_set():
+            close_old_connections()
+            self.sweep()
+            job = claim()
+            if job is not None:
+                run_job(job)
+                self.processed += 1
+                continue
+            if self.burst:
+                break
+            self.broker.wait(self.poll_interval, self.stop)
+        return self.processed
+
+
+# API
+
+def job_accepted(request, job):
+    """202 response for a view that handed its work to ``job``."""
+    return Response({
+        "job_id": job.pk,
+        "status": job.status,
+        "status_url": request.build_absolute_uri(reverse('job-detail', args=[job.pk])),
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class JobDetailView(APIView):
+    """
+    ``GET /api/jobs/<id>/``: status of a job started by the caller. A job
+    that produced a file links to it as ``file_url``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_job(self, request, pk):
+        jobs = Job.objects.filter(pk=pk)
+        if not request.user.is_superuser:
+            jobs = jobs.filter(created_by_id=request.user.pk)
+        return jobs.first()
+
+    def get(self, request, pk):
+        job = self.get_job(request, pk)
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        data = {
+            "id": job.pk,
+            "name": job.name,
+            "status": job.status,
+            "priority": job.priority,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "result": job.result,
+            # The last line of a traceback says what went wrong
+            "error": job.error.strip().splitlines()[-1] if job.error else None,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+        if job.status == Job.SUCCEEDED and isinstance(job.result, dict) and job.result.get('file'):
+            data['file_url'] = request.build_absolute_uri(reverse('job-file', args=[job.pk]))
+        return Response(data)
+
+
+class JobFileView(JobDetailView):
+    """``GET /api/jobs/<id>/file/``: download the file a job produced."""
+
+    def get(self, request, pk):
+        job = self.get_job(request, pk)
+        path = job.result.get('file') if job and isinstance(job.result, dict) else None
+        if not path or not job_storage.exists(path):
+            return Response({"error": "This job has no file."}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(
+            job_storage.open(path, 'rb'),
+            as_attachment=True,
+            filename=job.result.get('filename') or path.rsplit('/', 1)[-1],
+            content_type=job.result.get('content_type'),
+        )
@@ -0,0 +1,93 @@
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.utils import ConnectionHandler
+
+from .loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request database cost with a new connection per request "
+        "(CONN_MAX_AGE=0), persistent connections and the psycopg connection "
+        "pool (PostgreSQL with psycopg[pool] only), using the 'default' "
+        "database settings. Each simulated request does what Django does "
+        "around a view: connection check on request start, the query, and "
+        "close_if_unusable_or_obsolete() on request end. For HTTP-level "
+        "numbers, start servers with different DATABASE_POOL / "
+        "DATABASE_CONN_MAX_AGE settings and compare them with `loadtest`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help="Requests per mode.")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--query', default='SELECT 1', help="SQL run once per request.")
+        parser.add_argument('--pool-size', type=int, default=10, help="max_size of the benchmark pool.")
+
+    def modes(self, base, pool_size):
+        yield 'new connection', {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': without_pool(base)}
+        yield 'persistent', {**base, 'CONN_MAX_AGE': 600, 'OPTIONS': without_pool(base)}
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            self.stdout.write(f"{'pool':<16} skipped: needs PostgreSQL")
+        elif importlib.util.find_spec('psycopg_pool') is None:
+            self.stdout.write(f"{'pool':<16} skipped: psycopg_pool is not installed")
+        else:
+            pool = {'min_size': min(2, pool_size), 'max_size': pool_size, 'timeout': 10}
+            yield 'pool', {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': {**without_pool(base), 'pool': pool}}
+
+    def run_mode(self, alias, config, requests, concurrency, query):
+        # A separate alias, so the benchmark never shares a pool with the app
+        handler = ConnectionHandler({'default': settings.DATABASES['default'], alias: config})
+        latencies = []
+        lock = threading.Lock()
+
+        def client(count):
+            connection = handler[alias]
+            timings = []
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    connection.close_if_unusable_or_obsolete()  # request_started
+                    with connection.cursor() as cursor:
+                        cursor.execute(query)
+                        cursor.fetchall()
+                    connection.close_if_unusable_or_obsolete()  # request_finished
+                    timings.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(timings)
+
+        shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            list(clients.map(client, [share for share in shares if share]))
+        wall = time.perf_counter() - started
+
+        close_pool = getattr(handler[alias], 'close_pool', None)
+        if close_pool:
+            close_pool()
+        latencies.sort()
+        return wall, latencies
+
+    def handle(self, *args, **options):
+        base = settings.DATABASES['default']
+        requests, concurrency = options['requests'], max(1, options['concurrency'])
+        self.stdout.write(f"{base['ENGINE']}, {requests} requests per mode, {concurrency} clients")
+        self.stdout.write(f"{'mode':<16} {'req/s':>9} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for index, (label, config) in enumerate(self.modes(base, options['pool_size'])):
+            wall, latencies = self.run_mode(f'bench_{index}', config, requests, concurrency, options['query'])
+            mean = sum(latencies) / len(latencies)
+            self.stdout.write(
+                f"{label:<16} {len(latencies) / wall:>9.0f} {mean * 1000:>9.2f} "
+                f"{percentile(latencies, 50) * 1000:>8.2f} {percentile(latencies, 95) * 1000:>8.2f} "
+                f"{percentile(latencies, 99) * 1000:>8.2f}"
+            )
+
+
+def without_pool(config):
+    return {key: value for key, value in config.get('OPTIONS', {}).items() if key != 'pool'}
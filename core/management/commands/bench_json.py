@@ -0,0 +1,72 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer, orjson
+from customer.models import Customer
+from customer.serializers import CustomerSerializer
+from inventory.models import Product
+from inventory.serializers import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the orjson-backed "
+        "ORJSONRenderer/ORJSONParser on product and customer payloads, and "
+        "check that both render identical bytes. Payloads are serializer "
+        "output (decimals as strings) and raw .values() rows (Decimal and "
+        "datetime objects). Seed data first with `manage.py seed_data`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Rows per payload.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per measurement; the best is reported.")
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return min(timings) * 1000
+
+    def get_payloads(self, rows):
+        products = Product.objects.defer('search_vector').order_by('id')[:rows]
+        customers = Customer.objects.defer('search_vector').order_by('id')[:rows]
+        return [
+            ("products (serializer)", ProductSerializer(products, many=True).data),
+            ("products (.values())", list(products.values(
+                'id', 'name', 'category', 'unit_price', 'card_rate', 'replacement_rate',
+                'weight', 'description', 'created_at', 'updated_at'
+            ))),
+            ("customers (serializer)", CustomerSerializer(customers, many=True).data),
+            ("customers (.values())", list(customers.values(
+                *[f.attname for f in Customer._meta.concrete_fields if f.name != 'search_vector']
+            ))),
+        ]
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError("orjson is not installed; ORJSONRenderer would only fall back to JSONRenderer.")
+        repeat = max(1, options['repeat'])
+        renderers = [JSONRenderer(), ORJSONRenderer()]
+        parsers = [JSONParser(), ORJSONParser()]
+
+        self.stdout.write(
+            f"{'payload':<24} {'rows':>6} {'KB':>8} {'render ms':>10} {'orjson ms':>10} {'x':>6}"
+            f" {'parse ms':>9} {'orjson ms':>10} {'x':>6}  identical"
+        )
+        for label, data in self.get_payloads(options['rows']):
+            baseline, fast = (renderer.render(data) for renderer in renderers)
+            render_ms = [self.best_of(repeat, lambda r=r: r.render(data)) for r in renderers]
+            parse_ms = [self.best_of(repeat, lambda p=p: p.parse(io.BytesIO(baseline))) for p in parsers]
+            self.stdout.write(
+                f"{label:<24} {len(data):>6} {len(baseline) / 1024:>8.0f}"
+                f" {render_ms[0]:>10.1f} {render_ms[1]:>10.1f} {render_ms[0] / render_ms[1]:>6.1f}"
+                f" {parse_ms[0]:>9.1f} {parse_ms[1]:>10.1f} {parse_ms[0] / parse_ms[1]:>6.1f}"
+                f"  {'yes' if baseline == fast else 'NO'}"
+            )
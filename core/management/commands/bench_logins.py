@@ -0,0 +1,92 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from rest_framework.test import APIRequestFactory
+
+from core.passwords import hash_password
+from user_management.views import LoginView
+
+PASSWORD = 'bench-Pa55word!'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verification cost per configured hasher (logins/s "
+        "per core) and end-to-end POST /api/login/ throughput through the "
+        "bounded hashing pool. Creates a temporary user and deletes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verifies', type=int, default=20,
+                            help="Password checks per hasher for the per-core figure.")
+        parser.add_argument('--logins', type=int, default=100,
+                            help="End-to-end logins to run.")
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help="Concurrent clients for the end-to-end run.")
+
+    def bench_hashers(self, verifies):
+        self.stdout.write(self.style.MIGRATE_HEADING("Per-core verification cost"))
+        self.stdout.write(f"{'hasher':<32} {'ms/login':>9} {'logins/s/core':>14}")
+        for hasher in get_hashers():
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as e:  # library not installed
+                self.stdout.write(f"{hasher.algorithm:<32} skipped: {e}")
+                continue
+            started = time.perf_counter()
+            for _ in range(verifies):
+                hasher.verify(PASSWORD, encoded)
+            per_login = (time.perf_counter() - started) / verifies
+            self.stdout.write(f"{type(hasher).__name__:<32} {per_login * 1000:>9.1f} {1 / per_login:>14.1f}")
+
+    def bench_logins(self, logins, concurrency):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nEnd-to-end logins ({settings.PASSWORD_HASHER}, "
+            f"{settings.PASSWORD_HASH_WORKERS} hashing workers, {concurrency} clients, "
+            f"{os.cpu_count()} CPUs)"
+        ))
+        User = get_user_model()
+        username = f'bench-{uuid.uuid4().hex[:12]}'
+        user = User(username=username, email=f'{username}@example.com')
+        user.password = hash_password(PASSWORD)
+        user.save()
+
+        view = LoginView.as_view(throttle_classes=[])
+        factory = APIRequestFactory()
+
+        def login(_):
+            request = factory.post('/api/login/', {'username': username, 'password': PASSWORD}, format='json')
+            started = time.perf_counter()
+            response = view(request)
+            elapsed = time.perf_counter() - started
+            close_old_connections()
+            return response.status_code, elapsed
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as clients:
+                results = list(clients.map(login, range(logins)))
+            wall = time.perf_counter() - started
+        finally:
+            user.delete()
+
+        latencies = sorted(elapsed for _, elapsed in results)
+        ok = sum(1 for code, _ in results if code == 200)
+        busy = sum(1 for code, _ in results if code == 503)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f"{ok}/{logins} ok, {busy} busy (503) in {wall:.2f}s: {ok / wall:.1f} logins/s, "
+            f"{ok / wall / settings.PASSWORD_HASH_WORKERS:.1f} per hashing worker, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms"
+        )
+
+    def handle(self, *args, **options):
+        self.bench_hashers(options['verifies'])
+        self.bench_logins(options['logins'], options['concurrency'])
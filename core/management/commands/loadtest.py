@@ -0,0 +1,370 @@
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class Scenario:
+    """
+    One request shape. ``path`` and ``body`` may be callables, called per
+    request, for random ids and unique payloads. ``auth`` is "bearer",
+    "cookie" (the ``access_token`` cookie) or None.
+    """
+    method: str
+    path: Union[str, Callable[[], str]]
+    body: Optional[Union[dict, list, Callable[[], object]]] = None
+    auth: Optional[str] = 'bearer'
+    ok: tuple = (200,)
+    writes: bool = False
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the API of one or more running deployments and report "
+        "requests/second and p50/p95/p99 latency per scenario: login, cookie "
+        "and bearer auth, list, detail and write flows over the user, "
+        "inventory and customer endpoints. Seed the database first with "
+        "`seed_data` (its users log in here via --users), and raise "
+        "THROTTLE_RATE_USER / THROTTLE_RATE_LOGIN on the servers, or runs end "
+        "in 429s. Write scenarios change data; run them against a benchmark "
+        "database only. Save runs with --output and compare a later commit "
+        "with --baseline. Compare WSGI and ASGI by serving the project with "
+        "both (e.g. `gunicorn core.wsgi` and `uvicorn core.asgi:application`) "
+        "and passing --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', default=[],
+                            help="label=base_url, repeatable.")
+        parser.add_argument('--scenario', action='append',
+                            help="Scenario to run, repeatable (default: all but the write scenarios). "
+                                 "'all' runs every scenario, 'reads' and 'writes' the groups; "
+                                 "see --list-scenarios.")
+        parser.add_argument('--list-scenarios', action='store_true')
+        parser.add_argument('--path', action='append',
+                            help="Extra GET path to request, repeatable.")
+        parser.add_argument('--username')
+        parser.add_argument('--password')
+        parser.add_argument('--token', help="Use this access token instead of logging in.")
+        parser.add_argument('--users', type=int, default=0,
+                            help="Log in as seeded users <user-prefix>0..N-1 (see seed_data).")
+        parser.add_argument('--user-prefix', default='loadtest-')
+        parser.add_argument('--user-password', default='Loadtest-pass-1')
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per target and scenario.")
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--warmup', type=int, default=50)
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--seed', type=int, default=42, help="Seed for the random ids and payloads.")
+        parser.add_argument('--output', help="Write results as JSON to this file.")
+        parser.add_argument('--baseline', help="Compare with the results JSON of an earlier run.")
+        parser.add_argument('--max-regression', type=float, default=10.0,
+                            help="With --baseline, fail when RPS drops or p95 grows by more than this percent.")
+
+    # -- HTTP ---------------------------------------------------------------
+
+    def send(self, base_url, method, path, body=None, headers=None, timeout=30.0):
+        parts = urlsplit(base_url)
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        headers = {'Accept': 'application/json', **(headers or {})}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            conn.request(method, path, body=payload, headers=headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def login(self, base_url, username, password, timeout):
+        status, payload = self.send(
+            base_url, 'POST', '/api/login/', {"username": username, "password": password}, timeout=timeout
+        )
+        if status != 200:
+            raise CommandError(f"Login against {base_url} failed with HTTP {status}: {payload[:200]!r}")
+        return json.loads(payload)['token']
+
+    def discover(self, base_url, token, timeout):
+        """A page of existing ids for the detail and write scenarios."""
+        headers = {'Authorization': f'Bearer {token}'}
+        page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+        def rows(path):
+            status, payload = self.send(base_url, 'GET', path, headers=headers, timeout=timeout)
+            if status != 200:
+                raise CommandError(f"GET {path} on {base_url} failed with HTTP {status}: {payload[:200]!r}")
+            return json.loads(payload)['results']
+
+        stock = rows(f'/api/product-stock/?normalize=true&page_size={page_size}')
+        ids = {
+            'products': [row['id'] for row in rows(f'/api/products/?fields=id&page_size={page_size}')],
+            'stock': [row['id'] for row in stock],
+            'stock_keys': [(row['product_id'], row['location']) for row in stock],
+            'customers': [row['id'] for row in rows(f'/api/customer/?fields=id&page_size={page_size}')],
+        }
+        missing = [name for name, values in ids.items() if not values]
+        if missing:
+            raise CommandError(f"No {', '.join(missing)} on {base_url}; run seed_data first.")
+        return ids
+
+    # -- Scenarios ----------------------------------------------------------
+
+    def scenarios(self, ids, users, user_password, rng):
+        def pick(name):
+            return lambda: rng.choice(ids[name])
+
+        product, stock, customer = pick('products'), pick('stock'), pick('customers')
+
+        def bulk_items():
+            return {'items': [
+                {'product_id': product_id, 'location': location, 'delta': rng.choice((-1, 1))}
+                for product_id, location in rng.sample(ids['stock_keys'], min(20, len(ids['stock_keys'])))
+            ]}
+
+        def new_customer():
+            tag = uuid.uuid4().hex[:12]
+            return {'first_name': 'Load', 'last_name': f'Test {tag}', 'email': f'loadtest-{tag}@example.com'}
+
+        scenarios = {
+            # Authentication
+            'profile-cookie': Scenario('GET', '/api/profile/', auth='cookie'),
+            'profile-bearer': Scenario('GET', '/api/profile/'),
+            'permissions': Scenario('GET', '/api/permissions/'),
+            # Lists
+            'products-list': Scenario('GET', '/api/products/'),
+            'products-search': Scenario('GET', lambda: f"/api/products/?search={rng.choice(('bolt', 'valve', 'cable', 'hinge'))}"),
+            'stock-list': Scenario('GET', '/api/product-stock/'),
+            'stock-list-sparse': Scenario('GET', '/api/product-stock/?fields=id,quantity,location,product.name'),
+            'stock-list-normalized': Scenario('GET', '/api/product-stock/?normalize=true'),
+            'stock-low': Scenario('GET', '/api/product-stock/low/'),
+            'stock-valuation': Scenario('GET', '/api/product-stock/valuation/'),
+            'customers-list': Scenario('GET', '/api/customer/'),
+            'customers-filter': Scenario('GET', '/api/customer/?city=Pune'),
+            'async-products-list': Scenario('GET', '/api/async/products/'),
+            'async-stock-list': Scenario('GET', '/api/async/product-stock/'),
+            'async-customers-list': Scenario('GET', '/api/async/customer/'),
+            # Details
+            'products-detail': Scenario('GET', lambda: f'/api/products/{product()}/'),
+            'stock-detail': Scenario('GET', lambda: f'/api/product-stock/{stock()}/'),
+            'customers-detail': Scenario('GET', lambda: f'/api/customer/{customer()}/'),
+            'async-products-detail': Scenario('GET', lambda: f'/api/async/products/{product()}/'),
+            'async-customers-detail': Scenario('GET', lambda: f'/api/async/customer/{customer()}/'),
+            # Writes
+            'stock-update': Scenario('PATCH', lambda: f'/api/product-stock/{stock()}/',
+                                     lambda: {'quantity': rng.randint(0, 500)}, writes=True),
+            'stock-bulk-adjust': Scenario('POST', '/api/product-stock/bulk/', bulk_items, writes=True),
+            'customers-create': Scenario('POST', '/api/customer/', new_customer, ok=(201,), writes=True),
+            'customers-update': Scenario('PATCH', lambda: f'/api/customer/{customer()}/',
+                                         lambda: {'city': rng.choice(('Pune', 'Delhi', 'Chennai'))}, writes=True),
+        }
+        if users:
+            # Password hashing bound; throttled by THROTTLE_RATE_LOGIN
+            scenarios['login'] = Scenario(
+                'POST', '/api/login/', auth=None,
+                body=lambda: {'username': rng.choice(users), 'password': user_password},
+            )
+        return scenarios
+
+    def select(self, scenarios, names):
+        if not names:
+            return [name for name, scenario in scenarios.items() if not scenario.writes]
+        selected = []
+        for name in names:
+            if name == 'all':
+                selected.extend(scenarios)
+            elif name in ('reads', 'writes'):
+                selected.extend(n for n, s in scenarios.items() if s.writes == (name == 'writes'))
+            elif name in scenarios:
+                selected.append(name)
+            else:
+                raise CommandError(
+                    f"Unknown scenario {name!r}" + (" (pass --users to enable it)" if name == 'login' else "")
+                )
+        return list(dict.fromkeys(selected))
+
+    def run_one(self, base_url, scenario, token, total, concurrency, timeout):
+        parts = urlsplit(base_url)
+        base_headers = {'Accept': 'application/json'}
+        if scenario.auth == 'bearer':
+            base_headers['Authorization'] = f'Bearer {token}'
+        elif scenario.auth == 'cookie':
+            base_headers['Cookie'] = f'access_token={token}'
+        local = threading.local()
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def request(_):
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                conn = local.conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+            path = scenario.path() if callable(scenario.path) else scenario.path
+            body = scenario.body() if callable(scenario.body) else scenario.body
+            headers = base_headers
+            if body is not None:
+                headers = {**base_headers, 'Content-Type': 'application/json'}
+                body = json.dumps(body)
+            started = time.perf_counter()
+            try:
+                conn.request(scenario.method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                local.conn = None
+                status = type(e).__name__
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                if status in scenario.ok:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(status)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(request, range(total)))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "method": scenario.method,
+            "path": scenario.path if isinstance(scenario.path, str) else None,
+            "requests": total,
+            "ok": len(latencies),
+            "errors": len(errors),
+            "error_samples": [str(e) for e in errors[:5]],
+            "concurrency": concurrency,
+            "rps": round(len(latencies) / wall, 1) if wall else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+        }
+
+    # -- Reporting ----------------------------------------------------------
+
+    def compare(self, results, config, baseline_path, max_regression):
+        """Print changes against an earlier run; return the regressed entries."""
+        with open(baseline_path) as fh:
+            earlier = json.load(fh)
+        baseline = {(r['target'], r['scenario']): r for r in earlier['results']}
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nAgainst {baseline_path} (commit {earlier.get('commit') or 'unknown'})"
+        ))
+        if earlier.get('config') != config:
+            self.stdout.write(self.style.WARNING(
+                f"Settings differ from the baseline ({earlier.get('config')}); the numbers are not comparable."
+            ))
+        regressions = []
+        for result in results:
+            before = baseline.get((result['target'], result['scenario']))
+            if before is None or not before['rps'] or not before['p95_ms']:
+                continue
+            rps_change = (result['rps'] - before['rps']) / before['rps'] * 100
+            p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            regressed = rps_change < -max_regression or p95_change > max_regression
+            line = (
+                f"{result['target']:<8} {result['scenario']:<24} "
+                f"rps {rps_change:>+7.1f}%  p95 {p95_change:>+7.1f}%"
+            )
+            if regressed:
+                regressions.append(result)
+                line = self.style.ERROR(line + "  REGRESSION")
+            self.stdout.write(line)
+        return regressions
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        users = [f"{options['user_prefix']}{n}" for n in range(options['users'])]
+        if options['list_scenarios']:
+            names = self.scenarios({'products': [1], 'stock': [1], 'stock_keys': [(1, '')], 'customers': [1]},
+                                   users or ['-'], options['user_password'], rng)
+            for name, scenario in names.items():
+                path = scenario.path if isinstance(scenario.path, str) else '(generated per request)'
+                self.stdout.write(f"{name:<24} {scenario.method:<6} {path}{'  [write]' if scenario.writes else ''}")
+            return
+
+        if not options['target']:
+            raise CommandError("Pass at least one --target label=http://host:port.")
+        targets = []
+        for target in options['target']:
+            label, sep, url = target.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError(f"--target must look like label=http://host:port, got {target!r}")
+            targets.append((label, url.rstrip('/')))
+
+        username, password = options['username'], options['password']
+        if not username and users:
+            username, password = users[0], options['user_password']
+        if not options['token'] and not (username and password):
+            raise CommandError("Pass --token, --username and --password, or --users to log in.")
+
+        results = []
+        for label, base_url in targets:
+            token = options['token'] or self.login(base_url, username, password, options['timeout'])
+            scenarios = self.scenarios(
+                self.discover(base_url, token, options['timeout']), users, options['user_password'], rng
+            )
+            for path in options['path'] or ():
+                scenarios[path] = Scenario('GET', path)
+            names = self.select(scenarios, options['scenario']) + list(options['path'] or ())
+            for name in dict.fromkeys(names):
+                scenario = scenarios[name]
+                if options['warmup'] and not scenario.writes:
+                    self.run_one(base_url, scenario, token, options['warmup'],
+                                 min(options['concurrency'], options['warmup']), options['timeout'])
+                result = self.run_one(base_url, scenario, token, options['requests'],
+                                      options['concurrency'], options['timeout'])
+                result['target'] = label
+                result['scenario'] = name
+                results.append(result)
+                self.stdout.write(
+                    f"{label:<8} {name:<24} {result['rps']:>9.1f} req/s  "
+                    f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+                    f"p99 {result['p99_ms']:>7.2f} ms  errors {result['errors']}"
+                )
+
+        config = {key: options[key] for key in ('requests', 'concurrency', 'warmup', 'seed')}
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({
+                    "generated_at": time.time(),
+                    "commit": self.git_commit(),
+                    "config": config,
+                    "results": results,
+                }, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['baseline']:
+            regressions = self.compare(results, config, options['baseline'], options['max_regression'])
+            if regressions:
+                raise CommandError(f"{len(regressions)} scenario(s) regressed by more than {options['max_regression']}%.")
@@ -0,0 +1,37 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete change-feed tombstones older than CHANGE_FEED_TOMBSTONE_DAYS "
+        "in small batches. Clients whose watermark is older than that get 410 "
+        "and resync. Schedule it (e.g. daily cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Retention in days (default: CHANGE_FEED_TOMBSTONE_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help="Pause between batches (seconds).")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else settings.CHANGE_FEED_TOMBSTONE_DAYS
+        expired = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days))
+        deleted = batches = 0
+        while True:
+            ids = list(expired.order_by('deleted_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += Tombstone.objects.filter(id__in=ids).delete()[0]
+            batches += 1
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones in {batches} batches."))
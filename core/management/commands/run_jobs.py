@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+import threading
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.jobs import DatabaseBroker, Worker, get_broker
+
+
+def work(stop, burst, poll_interval):
+    """Worker process body: run jobs until ``stop`` is set."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops us through ``stop``
+    django.setup()
+    broker = DatabaseBroker() if settings.JOB_BROKER == 'local' else get_broker()
+    return Worker(stop=stop, burst=burst, poll_interval=poll_interval, broker=broker).run()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (core.jobs) on a pool of worker processes. Jobs "
+        "are claimed from the job table, highest priority first; with "
+        "JOB_BROKER=redis idle workers wait on Redis instead of polling. "
+        "SIGTERM or Ctrl-C lets running jobs finish, then exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help="Worker processes (1 runs in this process).")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once the queue is empty instead of waiting for jobs.")
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help="Seconds between polls when idle (default: JOB_POLL_INTERVAL).")
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        stop = context.Event() if processes > 1 else threading.Event()
+
+        def shutdown(signum, frame):
+            self.stderr.write("Stopping after the running jobs...")
+            stop.set()
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        self.stdout.write(f"Running jobs with {processes} process(es), broker '{settings.JOB_BROKER}'.")
+        if processes == 1:
+            broker = DatabaseBroker() if settings.JOB_BROKER == 'local' else get_broker()
+            processed = Worker(stop=stop, burst=options['burst'],
+                               poll_interval=options['poll_interval'], broker=broker).run()
+            self.stdout.write(self.style.SUCCESS(f"Processed {processed} job(s)."))
+            return
+
+        # Children must not share the parent's database sockets
+        connections.close_all()
+        workers = [
+            context.Process(target=work, args=(stop, options['burst'], options['poll_interval']),
+                            name=f'jobs-{i}')
+            for i in range(processes)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
@@ -0,0 +1,122 @@
+import hmac
+import threading
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+# Upper bounds (seconds) of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Series:
+    __slots__ = ('count', 'duration', 'buckets', 'sampled', 'queries', 'phases')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.sampled = 0
+        self.queries = 0
+        self.phases = {}
+
+
+def _labels(**labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+class RequestMetrics:
+    """
+    Per-process request counters, keyed by (route, method, status class).
+
+    Every request adds to the count and the duration histogram; sampled
+    requests also add their query count and per-phase times. Each process
+    keeps its own numbers, so scrape every worker (or run one per target).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, route, method, status, duration, timings=None):
+        key = (route, method, f'{status // 100}xx')
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.duration += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    series.buckets[index] += 1
+                    break
+            if timings is not None:
+                series.sampled += 1
+                series.queries += timings.queries
+                for phase, seconds in timings.durations.items():
+                    series.phases[phase] = series.phases.get(phase, 0.0) + seconds
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """The counters in the Prometheus text exposition format."""
+        with self._lock:
+            snapshot = sorted(self._series.items())
+            requests, durations, sampled, queries, phases = [], [], [], [], []
+            for (route, method, status), series in snapshot:
+                labels = _labels(route=route, method=method, status=status)
+                requests.append(f'http_requests_total{labels} {series.count}')
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, series.buckets):
+                    cumulative += count
+                    bucket = _labels(route=route, method=method, status=status, le=bound)
+                    durations.append(f'http_request_duration_seconds_bucket{bucket} {cumulative}')
+                bucket = _labels(route=route, method=method, status=status, le='+Inf')
+                durations.append(f'http_request_duration_seconds_bucket{bucket} {series.count}')
+                durations.append(f'http_request_duration_seconds_sum{labels} {series.duration:.6f}')
+                durations.append(f'http_request_duration_seconds_count{labels} {series.count}')
+                sampled.append(f'http_requests_sampled_total{labels} {series.sampled}')
+                queries.append(f'http_request_db_queries_total{labels} {series.queries}')
+                for phase, seconds in sorted(series.phases.items()):
+                    phase_labels = _labels(route=route, method=method, status=status, phase=phase)
+                    phases.append(f'http_request_phase_seconds_total{phase_labels} {seconds:.6f}')
+
+        lines = []
+        for name, kind, help_text, samples in (
+            ('http_requests_total', 'counter', "Requests handled.", requests),
+            ('http_request_duration_seconds', 'histogram', "Total request time.", durations),
+            ('http_requests_sampled_total', 'counter',
+             "Requests whose queries and phases were measured.", sampled),
+            ('http_request_db_queries_total', 'counter', "Queries run by sampled requests.", queries),
+            ('http_request_phase_seconds_total', 'counter',
+             "Time sampled requests spent per phase (db, auth, view, render); phases overlap.", phases),
+        ):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
+
+
+def metrics_view(request):
+    """
+    GET /metrics for Prometheus. Requires ``Authorization: Bearer
+    <METRICS_TOKEN>``; without a configured token it only answers in DEBUG.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not hmac.compare_digest(
+        request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode()
+    ):
+        return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer'})
+    return HttpResponse(request_metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
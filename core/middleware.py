@@ -1,45 +1,180 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework.exceptions import AuthenticationFailed
 from django.utils.encoding import smart_str
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import AccessToken
 
+from .instrumentation import timed
+from .lrucache import LRUTTLCache
+
+
+# Per-process caches: verified access tokens (keyed by the raw token) and,
+# in "cached" user mode, user rows (keyed by user id).
+_token_cache = LRUTTLCache(
+    maxsize=getattr(settings, 'JWT_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'JWT_AUTH_CACHE_TTL', 300),
+)
+_user_cache = LRUTTLCache(
+    maxsize=getattr(settings, 'JWT_AUTH_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'JWT_AUTH_CACHE_TTL', 300),
+)
+
+
+def invalidate_cached_user(user_id):
+    """Forget a user's cached row and verified tokens (called on save/delete)."""
+    _user_cache.delete(str(user_id))
+    _token_cache.delete_where(
+        lambda token: str(token.get(jwt_settings.USER_ID_CLAIM)) == str(user_id)
+    )
+
+
+def auth_cache_stats():
+    """Hit/miss counters for the authentication caches."""
+    return {"tokens": _token_cache.stats(), "users": _user_cache.stats()}
+
+
+def clear_auth_caches():
+    _token_cache.clear()
+    _user_cache.clear()
+
+
+class ClaimsTokenUser(TokenUser):
+    """
+    Stateless user built from access-token claims (see
+    ``user_management.tokens.ClaimsRefreshToken``). Used in "token" user
+    mode so authentication never touches the user table.
+    """
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+
+def get_db_user(user):
+    """
+    Return a real ``User`` row for ``user``. Views that read or write
+    profile fields, passwords or permissions call this, since in "token"
+    mode ``request.user`` is a ``ClaimsTokenUser``.
+    """
+    if isinstance(user, TokenUser):
+        return get_user_model().objects.get(pk=user.pk)
+    return user
+
+
 class JWTCookieAuthentication(JWTAuthentication):
     """
     Custom JWT authentication that supports token in cookies
+
+    The raw token is taken from the Authorization header, falling back to
+    the ``access_token`` cookie, and is verified exactly once. How the user
+    is resolved depends on ``JWT_AUTH_USER_MODE``:
+
+    * ``db``     - load the ``User`` row on every request (the default)
+    * ``cached`` - load the ``User`` row once and keep it in a per-process
+      LRU+TTL cache, invalidated when the user is saved or deleted
+    * ``token``  - build a ``ClaimsTokenUser`` from the claims (no query);
+      deactivation and role changes only apply once the token expires
     """
     def authenticate(self, request):
+        with timed('auth'):
+            validated_token = self.get_request_token(request)
+            if validated_token is None:
+                return None
+            return self.get_user(validated_token), validated_token
+
+    async def aauthenticate(self, request):
+        """Async variant for ASGI views; user rows are fetched with the async ORM."""
+        with timed('auth'):
+            validated_token = self.get_request_token(request)
+            if validated_token is None:
+                return None
+            return await self.aget_user(validated_token), validated_token
+
+    def get_request_token(self, request):
         # First, try to get the token from the Authorization header
+        raw_token = None
         header = self.get_header(request)
-        
         if header is not None:
-            # If Authorization header is present, try it first
-            result = super().authenticate(request)
-            # If header auth succeeded, return it. If it failed (None), fall back to cookie.
-            if result is not None:
-                return result
-            
-        # If no Authorization header, try to get token from cookie
-        raw_token = request.COOKIES.get('access_token')
+            raw_token = self.get_raw_token(header)
+
+        # If the header carried no JWT, try to get token from cookie
+        if raw_token is None:
+            raw_token = request.COOKIES.get('access_token')
         if raw_token is None:
             return None
-            
-        # Validate the token directly without recursion
+
         try:
-            validated_token = self.get_validated_token(raw_token)
-            return self.get_user(validated_token), validated_token
+            return self.get_validated_token(raw_token)
         except (InvalidToken, TokenError) as e:
             raise AuthenticationFailed(str(e))
-    
+
     def get_validated_token(self, raw_token):
         """
         Validates token and returns a validated token wrapper object.
+        Verified tokens are cached until their ``exp`` (or the cache TTL).
         """
+        raw_token = smart_str(raw_token)
+        token = _token_cache.get(raw_token)
+        if token is not None:
+            return token
         try:
-            # Create a token object from the raw token
+            # Creating the token verifies its signature and expiration
             token = AccessToken(token=raw_token)
-            # Verify the token's signature and expiration
-            token.verify()
-            return token
         except Exception as e:
             raise InvalidToken(str(e))
+        _token_cache.set(raw_token, token, expires_at=token.get('exp'))
+        return token
+
+    def get_user(self, validated_token):
+        mode = getattr(settings, 'JWT_AUTH_USER_MODE', 'db')
+
+        if mode == 'token':
+            if jwt_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken("Token contained no recognizable user identification")
+            user = ClaimsTokenUser(validated_token)
+            if not user.is_active:
+                raise AuthenticationFailed("User is inactive", code="user_inactive")
+            return user
+
+        if mode == 'cached':
+            user_id = str(validated_token.get(jwt_settings.USER_ID_CLAIM))
+            user = _user_cache.get(user_id)
+            if user is None:
+                user = super().get_user(validated_token)
+                _user_cache.set(user_id, user)
+            # Hand out a copy so per-request mutations never leak between requests
+            return copy.copy(user)
+
+        return super().get_user(validated_token)
+
+    async def aget_user(self, validated_token):
+        mode = getattr(settings, 'JWT_AUTH_USER_MODE', 'db')
+        if mode == 'token':
+            return self.get_user(validated_token)
+
+        user_id = str(validated_token.get(jwt_settings.USER_ID_CLAIM))
+        if mode == 'cached':
+            user = _user_cache.get(user_id)
+            if user is not None:
+                return copy.copy(user)
+
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if mode == 'cached':
+            _user_cache.set(user_id, user)
+            return copy.copy(user)
+        return user
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['resource', 'deleted_at', 'id'], name='tombstone_feed_idx'), models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def heartbeat_running_jobs(apps, schema_editor):
+    # Jobs already running count as having beaten when they started
+    Job = apps.get_model('core', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(heartbeat_running_jobs, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='job',
+            name='job_running_idx',
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'running')), fields=['heartbeat_at'], name='job_running_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Marker left behind by a deleted row, so change feeds (see
+    ``core.changefeed``) can report deletions. ``resource`` names the feed.
+    """
+    resource = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Keyset reads of one feed: WHERE resource = ? AND (deleted_at, id) > (?, ?)
+            models.Index(fields=['resource', 'deleted_at', 'id'], name='tombstone_feed_idx'),
+            # Pruning by age across all feeds
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.resource} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M:%S}"
+
+
+class Job(models.Model):
+    """
+    A background job (see ``core.jobs``): the task to run, its arguments,
+    and where it is in its life. Workers claim ``queued`` rows that are due,
+    highest ``priority`` first.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the worker while the job runs; a stale one means the worker died
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claiming: WHERE status = 'queued' ORDER BY priority DESC, id (only queued rows indexed)
+            models.Index(
+                fields=['-priority', 'id'], condition=models.Q(status='queued'), name='job_queued_idx'
+            ),
+            # Requeueing jobs whose worker died: WHERE status = 'running' AND heartbeat_at < ?
+            models.Index(
+                fields=['heartbeat_at'], condition=models.Q(status='running'), name='job_running_idx'
+            ),
+            # Pruning finished jobs by age
+            models.Index(fields=['finished_at'], name='job_finished_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
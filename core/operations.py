@@ -0,0 +1,17 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+
+
+class PostgresAddIndexConcurrently(AddIndexConcurrently):
+    """
+    ``AddIndexConcurrently`` for PostgreSQL-only index types (GIN, trigram
+    operator classes). The index is always part of the migration state, but
+    other backends (the SQLite test runs) skip creating it.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,119 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination for the list endpoints.
+
+    Pages are fetched with a ``WHERE (<key>, id) > (<last seen>)`` seek
+    instead of ``OFFSET``, so a deep page costs the same as the first one,
+    and no ``COUNT(*)`` is ever issued. Cursors are opaque, base64 encoded
+    and stable while rows are inserted.
+
+    The ordering comes from the view's ordering filter (``?ordering=``) or
+    defaults to ``id``, and always ends with ``id``. The cursor carries a
+    value for every ordering column, so rows that tie on a non-unique key
+    (a location, a price) are paged through on ``id`` instead of DRF's
+    bounded offset within the tie.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(term.lstrip('-') in ('id', 'pk') for term in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset with the single-column filter
+        # and tie offsets replaced by a composite keyset seek
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            reverse, current_position = False, None
+        else:
+            reverse, current_position = self.cursor.reverse, self.cursor.position
+            self.cursor = Cursor(offset=0, reverse=reverse, position=current_position)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.seek(queryset.model, ordering, current_position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def seek(self, model, ordering, position):
+        """Rows strictly after ``position`` in ``ordering``: ``a > x OR (a = x AND id > y)``."""
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            values = [
+                self._field(model, term.lstrip('-')).to_python(value)
+                for term, value in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
+
+        after = Q()
+        equal = {}
+        for term, value in zip(ordering, values):
+            name = term.lstrip('-')
+            after |= Q(**equal, **{f'{name}__{"lt" if term.startswith("-") else "gt"}': value})
+            equal[name] = value
+        # The redundant bound on the leading key gives the planner an index range to seek to
+        first = ordering[0]
+        return Q(**{f'{first.lstrip("-")}__{"lte" if first.startswith("-") else "gte"}': values[0]}) & after
+
+    @staticmethod
+    def _field(model, name):
+        return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for term in ordering:
+            name = term.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(None if value is None else str(value))
+        return json.dumps(values, separators=(',', ':'))
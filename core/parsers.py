@@ -0,0 +1,41 @@
+import io
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+
+from .renderers import ORJSONRenderer, orjson
+
+# orjson reads integers beyond 64 bits as floats, so bodies with a run of
+# 19+ digits go to json. Mapping digits to '0' and searching for the run
+# is several times cheaper than a regex over the body.
+_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_LONG_DIGIT_RUN = b'0' * 19
+
+
+class ORJSONParser(JSONParser):
+    """
+    Drop-in ``JSONParser`` that decodes UTF-8 bodies with orjson.
+
+    Bodies orjson rejects (malformed JSON, NaN, a BOM ...), bodies that may
+    hold integers too large for 64 bits, and other charsets are handed to
+    ``JSONParser``, so results and error messages stay the same.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '').replace('_', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        if _LONG_DIGIT_RUN not in body.translate(_DIGITS_TO_ZERO):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
+
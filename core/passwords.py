@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password, verify_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PasswordHashingBusy(APIException):
+    """
+    Every hashing worker is busy and the wait queue is full. Rendered by
+    DRF as a 503 with ``Retry-After``, like a throttled request.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many password checks in progress, please retry shortly."
+    default_code = 'password_hashing_busy'
+    wait = 1
+
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASH_QUEUE)
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+    return _pool, _slots
+
+
+def run_hashing(func, *args):
+    """
+    Run a password hashing call in the shared, bounded hashing pool and
+    return its result.
+
+    At most ``PASSWORD_HASH_WORKERS`` hashes run at once, whatever the number
+    of request threads. Once ``PASSWORD_HASH_QUEUE`` more are waiting, the
+    caller waits up to ``PASSWORD_HASH_WAIT`` seconds for a slot and then
+    gets ``PasswordHashingBusy``.
+
+    This bounds the CPU spent on hashing, not the request threads: the
+    caller blocks on the result, so a login still holds its worker thread
+    for the whole hash (plus any queueing). The login endpoints are sync
+    views; an async caller would have to wrap this in ``sync_to_async``.
+    """
+    pool, slots = _get_pool()
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_WAIT):
+        raise PasswordHashingBusy()
+    try:
+        future = pool.submit(func, *args)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+def hash_password(raw_password):
+    return run_hashing(make_password, raw_password)
+
+
+def set_user_password(user, raw_password):
+    """``user.set_password()`` with the hashing done in the pool."""
+    user.password = hash_password(raw_password)
+    # Lets save() notify the password validators, as set_password() does
+    user._password = raw_password
+
+
+def check_user_password(user, raw_password):
+    """
+    ``user.check_password()`` with the hashing done in the pool. A correct
+    password stored with another hasher or cost is re-hashed and saved.
+    """
+    is_correct, must_update = run_hashing(verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        set_user_password(user, raw_password)
+        user._password = None
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+class PooledModelBackend(ModelBackend):
+    """``ModelBackend`` whose password check runs in the bounded hashing pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as known ones
+            hash_password(password)
+            return None
+        if check_user_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import threading
+from fnmatch import fnmatchcase
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from rest_framework.permissions import BasePermission
+
+from .cache import bump_resource_version, get_cache, get_resource_versions
+from .lrucache import LRUTTLCache
+
+# Access-token claim carrying the holder's permissions as a bitmask
+MASK_CLAIM = 'perms'
+VERSION_NAMESPACE = 'permissions'
+
+# Model permission action needed per HTTP method
+METHOD_ACTIONS = {
+    'GET': 'view',
+    'HEAD': 'view',
+    'OPTIONS': 'view',
+    'POST': 'add',
+    'PUT': 'change',
+    'PATCH': 'change',
+    'DELETE': 'delete',
+}
+
+
+def encode_mask(mask):
+    return base64.urlsafe_b64encode(mask.to_bytes((mask.bit_length() + 7) // 8 or 1, 'big')).decode().rstrip('=')
+
+
+def decode_mask(value):
+    return int.from_bytes(base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)), 'big')
+
+
+class PermissionCatalogue:
+    """
+    Every ``auth_permission`` row as ``"app_label.codename"``, with bit
+    ``pk`` standing for it in a mask. Primary keys never move, so masks
+    stay meaningful across processes and deploys; new permissions just get
+    new bits. Role masks (from ``ROLE_PERMISSIONS``) are worked out once.
+    """
+
+    def __init__(self, rows):
+        self.names = {pk: f'{app_label}.{codename}' for pk, app_label, codename in rows}
+        self.bits = {name: pk for pk, name in self.names.items()}
+        self.all = self.mask(self.names.values())
+        self._roles = {}
+        self._names_cache = LRUTTLCache(maxsize=256, ttl=getattr(settings, 'PERMISSION_CACHE_TTL', 300))
+
+    def mask(self, names):
+        mask = 0
+        for name in names:
+            pk = self.bits.get(name)
+            if pk is not None:
+                mask |= 1 << pk
+        return mask
+
+    def role_mask(self, role):
+        mask = self._roles.get(role)
+        if mask is None:
+            patterns = settings.ROLE_PERMISSIONS.get(role, ())
+            mask = self.mask(name for name in self.bits if any(fnmatchcase(name, p) for p in patterns))
+            self._roles[role] = mask
+        return mask
+
+    def names_in(self, mask):
+        """Sorted permission names of ``mask`` (memoized, few masks are in use)."""
+        names = self._names_cache.get(mask)
+        if names is None:
+            names = sorted(name for pk, name in self.names.items() if mask >> pk & 1)
+            self._names_cache.set(mask, names)
+        return names
+
+
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+# Per-process cache of what users are granted directly and through their
+# groups (role permissions are added on top), keyed by user id
+_grant_cache = LRUTTLCache(
+    maxsize=getattr(settings, 'PERMISSION_CACHE_SIZE', 4096),
+    ttl=getattr(settings, 'PERMISSION_CACHE_TTL', 300),
+)
+
+
+def get_catalogue():
+    global _catalogue
+    if _catalogue is None:
+        with _catalogue_lock:
+            if _catalogue is None:
+                _catalogue = PermissionCatalogue(
+                    Permission.objects.values_list('id', 'content_type__app_label', 'codename')
+                )
+    return _catalogue
+
+
+def _grant_key(user_id):
+    version, = get_resource_versions([VERSION_NAMESPACE])
+    return f'permissions:grants:{version}:{user_id}'
+
+
+def grant_mask(user_id):
+    """
+    Bitmask of the permissions given to the user directly or through a
+    group: per-process cache, then the shared cache, then one query.
+    """
+    mask = _grant_cache.get(user_id)
+    if mask is not None:
+        return mask
+    key = _grant_key(user_id)
+    cache = get_cache()
+    mask = cache.get(key)
+    if mask is None:
+        User = get_user_model()
+        direct = User.user_permissions.through.objects.filter(user_id=user_id)
+        groups = User.groups.through.objects.filter(user_id=user_id).values('group_id')
+        via_groups = Group.permissions.through.objects.filter(group_id__in=groups)
+        mask = 0
+        bits = direct.values_list('permission_id', flat=True).union(
+            via_groups.values_list('permission_id', flat=True)
+        )
+        for pk in bits:
+            mask |= 1 << pk
+        cache.set(key, mask, timeout=getattr(settings, 'PERMISSION_CACHE_TTL', 300))
+    _grant_cache.set(user_id, mask)
+    return mask
+
+
+def permission_mask(user):
+    """
+    Everything ``user`` may do: all permissions for active superusers,
+    otherwise the permissions of its role plus its own and its groups'.
+    """
+    if not user.is_active:
+        return 0
+    catalogue = get_catalogue()
+    if user.is_superuser:
+        return catalogue.all
+    return catalogue.role_mask(getattr(user, 'role', None)) | grant_mask(user.pk)
+
+
+def invalidate_permissions(user_id=None):
+    """
+    Forget cached grants of one user, or of everyone (group and permission
+    changes). Other processes drop theirs within ``PERMISSION_CACHE_TTL``.
+    """
+    if user_id is None:
+        bump_resource_version(VERSION_NAMESPACE)
+        _grant_cache.clear()
+    else:
+        get_cache().delete(_grant_key(user_id))
+        _grant_cache.delete(user_id)
+
+
+def clear_permission_catalogue():
+    global _catalogue
+    with _catalogue_lock:
+        _catalogue = None
+    invalidate_permissions()
+
+
+def token_mask(request):
+    """The mask carried by the request's access token, if any."""
+    token = getattr(request, 'auth', None)
+    encoded = token.get(MASK_CLAIM) if hasattr(token, 'get') else None
+    if encoded is None:
+        return None
+    try:
+        return decode_mask(encoded)
+    except (binascii.Error, TypeError, ValueError):
+        return None
+
+
+def request_mask(request):
+    """The mask from the access token, or worked out (cached) for the user."""
+    mask = token_mask(request)
+    return permission_mask(request.user) if mask is None else mask
+
+
+def has_perms(request, perms):
+    mask = request_mask(request)
+    bits = get_catalogue().bits
+    return all(name in bits and mask >> bits[name] & 1 for name in perms)
+
+
+async def ahas_perms(request, perms):
+    if _catalogue is None or token_mask(request) is None:
+        return await sync_to_async(has_perms)(request, perms)
+    return has_perms(request, perms)
+
+
+def required_permissions(request, view):
+    """
+    ``view.required_permissions[method]`` when given, else the model
+    permission for the method on ``view.permission_model`` (defaulting to
+    the model of ``view.queryset``), e.g. ``inventory.change_product``.
+    """
+    required = getattr(view, 'required_permissions', None) or {}
+    if request.method in required:
+        return required[request.method]
+    model = getattr(view, 'permission_model', None)
+    if model is None:
+        model = view.queryset.model
+    action = METHOD_ACTIONS.get(request.method)
+    if action is None:
+        return None
+    return [f'{model._meta.app_label}.{action}_{model._meta.model_name}']
+
+
+class RolePermission(BasePermission):
+    """
+    Model permissions (``view``/``add``/``change``/``delete`` by HTTP method)
+    checked against the role, group and user permissions of the caller.
+
+    Access tokens carry the caller's permissions as a bitmask claim (see
+    ``user_management.tokens.ClaimsRefreshToken``), so a check is a few bit
+    tests. Tokens without the claim fall back to the cached mask of the
+    user. Permission changes reach existing tokens when they are renewed,
+    i.e. within ``ACCESS_TOKEN_LIFETIME``.
+    """
+
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        perms = required_permissions(request, view)
+        return perms is not None and has_perms(request, perms)
@@ -0,0 +1,81 @@
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+class NPlusOneError(Exception):
+    """The same SELECT ran more often than ``NPLUSONE_THRESHOLD`` in one block."""
+
+
+# Set inside ``allow_repeated_queries`` blocks, whose repeats are by design
+_allowed = ContextVar('repeated_queries_allowed', default=False)
+
+
+@contextmanager
+def allow_repeated_queries():
+    """
+    Leave the block's queries out of the N+1 guard, for loops that run the
+    same SELECT once per chunk or group of a large input on purpose.
+    """
+    token = _allowed.set(True)
+    try:
+        yield
+    finally:
+        _allowed.reset(token)
+
+
+class RepeatedQueryLog:
+    """
+    Execute wrapper that counts SELECTs by SQL text (parameters excluded)
+    and raises ``NPlusOneError`` as soon as one runs more than ``threshold``
+    times, so the traceback points at the loop that issues it.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if not many and not _allowed.get() and sql.lstrip()[:6].upper() == 'SELECT':
+            self.counts[sql] += 1
+            if self.counts[sql] > self.threshold:
+                raise NPlusOneError(
+                    f"The same query ran {self.counts[sql]} times (N+1?): {sql[:500]}"
+                )
+        return result
+
+
+@contextmanager
+def detect_n_plus_one(threshold=None):
+    """
+    Raise ``NPlusOneError`` when a SELECT repeats more than ``threshold``
+    (default ``NPLUSONE_THRESHOLD``) times inside the block, on any database
+    connection of the current thread.
+    """
+    log = RepeatedQueryLog(threshold if threshold is not None else settings.NPLUSONE_THRESHOLD)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(log))
+        yield log
+
+
+class NPlusOneMiddleware:
+    """
+    Development guard: with ``NPLUSONE_RAISE`` on, a request that repeats a
+    SELECT more than ``NPLUSONE_THRESHOLD`` times fails with
+    ``NPlusOneError`` instead of quietly running a query per row.
+    """
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_RAISE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with detect_n_plus_one():
+            return self.get_response(request)
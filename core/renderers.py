@@ -0,0 +1,65 @@
+from rest_framework.renderers import JSONRenderer
+
+from .instrumentation import timed, view_finished
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib json module is used without it
+    orjson = None
+
+
+def orjson_dumps(data, encoder_class):
+    """
+    Compact JSON bytes for ``data`` via orjson, or ``None`` when orjson is
+    unavailable or cannot encode it (e.g. integers beyond 64 bits).
+
+    Types orjson does not handle natively (``Decimal``, ``timedelta``,
+    querysets, lazy strings ...) go through ``encoder_class().default``, so
+    they come out exactly as ``json.dumps(cls=encoder_class)`` writes them.
+    datetimes, dates, times and UUIDs are written natively in the same
+    format as DRF's encoder (UTC as ``Z``).
+    """
+    if orjson is None:
+        return None
+    try:
+        ret = orjson.dumps(
+            data,
+            default=encoder_class().default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+    except orjson.JSONEncodeError:
+        return None
+    # Same JavaScript-safe escaping as JSONRenderer
+    return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in ``JSONRenderer`` that encodes with orjson.
+
+    Output is byte-for-byte what ``JSONRenderer`` produces for the compact
+    (default) style, with two exceptions: floats that need an exponent are
+    written without ``+`` (``1e16`` rather than ``1e+16``) and NaN/Infinity
+    become ``null`` instead of raising. Indented output (browsable API,
+    ``; indent=`` media types), non-compact or ASCII-only settings, and
+    anything orjson refuses fall back to ``JSONRenderer``.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        view_finished()
+        with timed('render'):
+            return self._render(data, accepted_media_type, renderer_context or {})
+
+    def _render(self, data, accepted_media_type, renderer_context):
+        if (
+            self.compact
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        ):
+            ret = orjson_dumps(data, self.encoder_class)
+            if ret is not None:
+                return ret
+        return super().render(data, accepted_media_type, renderer_context)
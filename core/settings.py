@@ -23,9 +23,11 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
     # ✅ your apps
+    'core',  # project-wide management commands (loadtest, ...)
     'user_management',
     'inventory',
     'customer',
@@ -39,23 +41,166 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # O(1) token buckets, shared through Redis when REDIS_URL is set
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'core.throttling.AnonTokenBucketThrottle',
+        'core.throttling.UserTokenBucketThrottle',
+        'core.throttling.ScopedTokenBucketThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/day',
-        'user': '1000/day'
+        'anon': os.getenv("THROTTLE_RATE_ANON", '100/day'),
+        'user': os.getenv("THROTTLE_RATE_USER", '1000/day'),
+        # Per-endpoint scopes (views set throttle_scope)
+        'login': os.getenv("THROTTLE_RATE_LOGIN", '10/min'),
+        'register': os.getenv("THROTTLE_RATE_REGISTER", '5/hour'),
+        'token_refresh': os.getenv("THROTTLE_RATE_TOKEN_REFRESH", '30/min'),
+    },
+    # orjson-backed JSON, same output as DRF's JSONRenderer/JSONParser
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Keyset pagination: no OFFSET and no COUNT(*) on the list endpoints
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetCursorPagination',
+    'PAGE_SIZE': int(os.getenv("API_PAGE_SIZE", 100)),
+}
+
+# Upper bound for ?page_size= on paginated list endpoints
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 500))
+
+# Bulk stock adjustments (POST /api/product-stock/bulk/)
+STOCK_BULK_MAX_ROWS = int(os.getenv("STOCK_BULK_MAX_ROWS", 20000))
+STOCK_BULK_BATCH_SIZE = int(os.getenv("STOCK_BULK_BATCH_SIZE", 1000))
+
+# Stock ledger (inventory.ledger). Compaction (`manage.py compact_stock_ledger`,
+# schedule e.g. every few minutes) snapshots the uncompacted movements older
+# than STOCK_LEDGER_LAG_SECONDS. Movements that commit later are still taken
+# by the next run; the lag only keeps them from changing past as-of reads.
+STOCK_LEDGER_LAG_SECONDS = int(os.getenv("STOCK_LEDGER_LAG_SECONDS", 60))
+
+# Product catalogue import (POST /api/products/import/, manage.py import_products)
+PRODUCT_IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", 2000))
+PRODUCT_IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("PRODUCT_IMPORT_MAX_REPORTED_ERRORS", 1000))
+
+# Change feeds (GET /api/<resource>/changes/?since=). Changes younger than
+# CHANGE_FEED_LAG_SECONDS wait for the next poll so writes still committing
+# are not skipped. Tombstones of deleted rows are kept for
+# CHANGE_FEED_TOMBSTONE_DAYS (`manage.py prune_tombstones`); older
+# watermarks get 410 and must sync from scratch.
+CHANGE_FEED_LAG_SECONDS = int(os.getenv("CHANGE_FEED_LAG_SECONDS", 2))
+CHANGE_FEED_TOMBSTONE_DAYS = int(os.getenv("CHANGE_FEED_TOMBSTONE_DAYS", 30))
+
+# Default ?threshold= of the low-stock list (GET /api/product-stock/low/)
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", 10))
+
+# Background jobs (core.jobs): product imports, valuation refreshes and
+# ?async=true exports, run by `manage.py run_jobs` workers. JOB_BROKER
+# "database" has them poll the job table, "redis" has idle workers wait on
+# REDIS_URL to be woken up, and "local" runs jobs on a thread pool inside the
+# web process instead (development and single-process deployments). Failed
+# attempts are retried with exponential backoff. A running job renews its
+# heartbeat every JOB_HEARTBEAT_INTERVAL seconds; one not renewed for
+# JOB_TIMEOUT seconds is taken to be lost and requeued.
+JOB_BROKER = os.getenv("JOB_BROKER", "database")
+JOB_LOCAL_THREADS = int(os.getenv("JOB_LOCAL_THREADS", 2))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", 30))  # seconds, doubled per attempt
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 2))  # seconds
+JOB_HEARTBEAT_INTERVAL = int(os.getenv("JOB_HEARTBEAT_INTERVAL", 30))  # seconds
+JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", 300))  # seconds without a heartbeat
+JOB_SWEEP_INTERVAL = int(os.getenv("JOB_SWEEP_INTERVAL", 60))  # seconds between lost-job/prune sweeps
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", 7))
+# Uploads and export files of jobs; must be shared storage for remote workers
+JOB_FILE_ROOT = os.getenv("JOB_FILE_ROOT", str(BASE_DIR / 'job_files'))
+
+
+
+
+# Shared cache. Set REDIS_URL to use a Redis-protocol server (Redis, Valkey,
+# or a local stand-in); CACHE_BACKEND overrides the backend class outright.
+REDIS_URL = os.getenv("REDIS_URL")
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            "CACHE_BACKEND",
+            'django.core.cache.backends.redis.RedisCache' if REDIS_URL
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': REDIS_URL or 'hitech-default',
+        'KEY_PREFIX': os.getenv("CACHE_KEY_PREFIX", 'hitech'),
     }
 }
 
+# Response caching for list/detail reads (core.cache.CachedResponseMixin)
+API_RESPONSE_CACHE_ENABLED = os.getenv("API_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", 600))  # seconds
 
+# Batch reads (GET .../batch/?ids=1,2,3 or POST {"ids": [...]}): most ids per request
+API_BATCH_MAX_IDS = int(os.getenv("API_BATCH_MAX_IDS", 500))
 
+# JWT authentication (core.middleware.JWTCookieAuthentication)
+# "db": load the User row on every request
+# "cached": load the User row once per process (LRU+TTL), invalidated on save
+# "token": build request.user from token claims, no DB query; opt-in, since a
+#          deactivated user keeps access until their access token expires
+JWT_AUTH_USER_MODE = os.getenv("JWT_AUTH_USER_MODE", "db")
+JWT_AUTH_CACHE_SIZE = int(os.getenv("JWT_AUTH_CACHE_SIZE", 1024))  # 0 disables caching
+JWT_AUTH_CACHE_TTL = int(os.getenv("JWT_AUTH_CACHE_TTL", 300))  # seconds
+
+# Refresh-token blacklist. With JWT_BLACKLIST_CACHE on, each process keeps a
+# Bloom filter of blacklisted JTIs and only queries the table on a hit; it
+# relies on the shared cache to hear about blacklistings in other processes.
+# Prune expired rows with `manage.py prune_token_blacklist` (e.g. hourly cron).
+JWT_BLACKLIST_CACHE = os.getenv("JWT_BLACKLIST_CACHE", "false").lower() == "true"
+JWT_BLACKLIST_BLOOM_CAPACITY = int(os.getenv("JWT_BLACKLIST_BLOOM_CAPACITY", 1000000))
+JWT_BLACKLIST_BLOOM_ERROR_RATE = float(os.getenv("JWT_BLACKLIST_BLOOM_ERROR_RATE", 0.001))
+JWT_BLACKLIST_SYNC_INTERVAL = int(os.getenv("JWT_BLACKLIST_SYNC_INTERVAL", 30))  # seconds
+JWT_BLACKLIST_REBUILD_INTERVAL = int(os.getenv("JWT_BLACKLIST_REBUILD_INTERVAL", 3600))  # seconds
+
+# Authorization (core.permissions.RolePermission). A user holds the
+# permissions of its role (patterns over "app_label.codename") plus those
+# granted directly or through groups; superusers hold all of them. The result
+# travels in the access token as a bitmask, so changes apply when the token
+# is renewed. Grants are cached per process and in the shared cache.
+ROLE_PERMISSIONS = {
+    'admin': ['*'],
+    'manager': ['inventory.*', 'customer.*', 'deal_pipeline.*'],
+    'employee': [
+        'inventory.view_*', 'inventory.change_productstock', 'inventory.add_stockmovement',
+        'customer.view_*', 'customer.add_customer', 'customer.change_customer',
+        'deal_pipeline.view_*', 'deal_pipeline.add_deal', 'deal_pipeline.change_deal',
+    ],
+}
+PERMISSION_CACHE_SIZE = int(os.getenv("PERMISSION_CACHE_SIZE", 4096))  # 0 disables the per-process cache
+PERMISSION_CACHE_TTL = int(os.getenv("PERMISSION_CACHE_TTL", 300))  # seconds
 
 # If using a custom User model
 AUTH_USER_MODEL = 'user_management.User'   # ✅ add this
 
+# Request metrics (core.instrumentation.RequestMetricsMiddleware). Every
+# request is counted and timed per URL name; METRICS_SAMPLE_RATE of them also
+# record query count/time and auth, view and render time, sent back as
+# a Server-Timing header when METRICS_SERVER_TIMING is on. GET /metrics serves
+# the per-process counters to Prometheus with "Authorization: Bearer
+# <METRICS_TOKEN>"; without a token it only answers in DEBUG.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", 0.05))
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", str(DEBUG)).lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# N+1 guard (core.querycount.NPlusOneMiddleware): fail a request that runs
+# the same SELECT more than NPLUSONE_THRESHOLD times. Meant for development.
+NPLUSONE_RAISE = os.getenv("NPLUSONE_RAISE", str(DEBUG)).lower() == "true"
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", 10))
+
 MIDDLEWARE = [
+    'core.instrumentation.RequestMetricsMiddleware',  # first, so it times everything
+    'core.querycount.NPlusOneMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +233,21 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # -------------------------------
 # ✅ PostgreSQL Database Settings
 # -------------------------------
+# Connection reuse: either persistent connections (DATABASE_CONN_MAX_AGE
+# seconds, checked before reuse) or, with DATABASE_POOL=true, a psycopg 3
+# connection pool per process (needs psycopg[pool]; Django requires
+# CONN_MAX_AGE=0 then, the pool does the reuse).
+DATABASE_POOL = os.getenv("DATABASE_POOL", "false").lower() == "true"
+DATABASE_CONN_MAX_AGE = 0 if DATABASE_POOL else int(os.getenv("DATABASE_CONN_MAX_AGE", 60))
+DATABASE_CONN_HEALTH_CHECKS = os.getenv("DATABASE_CONN_HEALTH_CHECKS", "true").lower() == "true"
+DATABASE_OPTIONS = {}
+if DATABASE_POOL:
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': int(os.getenv("DATABASE_POOL_MIN_SIZE", 2)),
+        'max_size': int(os.getenv("DATABASE_POOL_MAX_SIZE", 10)),
+        'timeout': float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),  # seconds to wait for a connection
+    }
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -96,8 +256,44 @@ DATABASES = {
         'NAME': os.getenv("DATABASE_NAME"),
         'USER': os.getenv("DATABASE_USER"),
         'PASSWORD': os.getenv("DATABASE_PASSWORD"),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DATABASE_CONN_HEALTH_CHECKS,
+        'OPTIONS': DATABASE_OPTIONS,
     }
 }
+# DATABASE_ENGINE=sqlite swaps in a local SQLite file for quick runs, e.g.
+# `DATABASE_ENGINE=sqlite python manage.py test`. PostgreSQL-only indexes,
+# triggers and full-text search are skipped there; run the suite against
+# PostgreSQL as well before relying on query budgets.
+if os.getenv("DATABASE_ENGINE", "postgresql") == "sqlite":
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv("DATABASE_NAME") or BASE_DIR / 'db.sqlite3',
+    }
+
+# Optional read replicas: DATABASE_REPLICA_HOSTS="replica1,replica2:5433".
+# Each becomes a "replica_<n>" alias with the primary's credentials
+# (DATABASE_REPLICA_USER / DATABASE_REPLICA_PASSWORD override them). GET and
+# HEAD requests then read from a replica; see core.db_routers.
+DATABASE_REPLICA_HOSTS = [h.strip() for h in os.getenv("DATABASE_REPLICA_HOSTS", "").split(",") if h.strip()]
+for _index, _replica in enumerate(DATABASE_REPLICA_HOSTS, start=1):
+    _host, _, _port = _replica.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'USER': os.getenv("DATABASE_REPLICA_USER", DATABASES['default']['USER']),
+        'PASSWORD': os.getenv("DATABASE_REPLICA_PASSWORD", DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASE_OPTIONS),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter'] if DATABASE_REPLICA_HOSTS else []
+# After a write, the client's reads stay on the primary for this long
+# (cookie), so it reads its own writes despite replication lag.
+DATABASE_REPLICA_PIN_SECONDS = int(os.getenv("DATABASE_REPLICA_PIN_SECONDS", 5))
+# GET/HEAD requests are marked as replica reads by this middleware
+if DATABASE_REPLICA_HOSTS:
+    MIDDLEWARE.insert(1, 'core.db_routers.replica_read_middleware')
 
 
 # Password validation
@@ -108,6 +304,36 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator'},
 ]
 
+# Password hashing. PASSWORD_HASHER picks the hasher for new passwords:
+# "pbkdf2", "argon2" (needs argon2-cffi) or "bcrypt" (needs bcrypt). The
+# others stay listed so existing hashes still verify; they are re-hashed
+# with the preferred hasher and cost on the next successful login.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+_PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "core.hashers.TunedPBKDF2PasswordHasher",
+    "argon2": "core.hashers.TunedArgon2PasswordHasher",
+    "bcrypt": "core.hashers.TunedBCryptSHA256PasswordHasher",
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+# Work factors (defaults are Django's)
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", 1000000))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", 102400))  # KiB
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", 8))
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", 12))
+
+# Hashing runs in a bounded thread pool (the hash functions release the
+# GIL) so a login burst uses at most PASSWORD_HASH_WORKERS cores; beyond
+# PASSWORD_HASH_QUEUE waiting jobs, logins get a 503 instead of piling up.
+# This caps CPU only: the request thread still blocks until its hash is done.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 32))
+PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", 5))  # seconds to wait for a queue slot
+
+AUTHENTICATION_BACKENDS = ['core.passwords.PooledModelBackend']
+
 
 # Internationalization
 LANGUAGE_CODE = 'en-us'
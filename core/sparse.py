@@ -0,0 +1,148 @@
+import decimal
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+def requested_fields(request, param='fields'):
+    """
+    Parse ``?fields=id,quantity,product.name`` into a set of dotted paths,
+    or ``None`` when the client did not ask for a sparse representation.
+    """
+    raw = request.query_params.get(param) if request is not None else None
+    if not raw:
+        return None
+    return {part.strip() for part in raw.split(',') if part.strip()}
+
+
+def is_requested(path, requested):
+    """True when ``path`` itself, one of its parents or one of its children was asked for."""
+    if requested is None or path in requested:
+        return True
+    parts = path.split('.')
+    if any('.'.join(parts[:i]) in requested for i in range(1, len(parts))):
+        return True
+    return any(name.startswith(path + '.') for name in requested)
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin for ``?fields=`` sparse fieldsets on reads.
+
+    ``?fields=id,quantity,product.name`` keeps only those fields; nested
+    serializers using the mixin are trimmed by their dotted path, and a bare
+    ``product`` keeps the whole nested object. Writes always see every field.
+    """
+
+    def _sparse_prefix(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return ''.join(f'{part}.' for part in reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        requested = requested_fields(request)
+        if requested is None:
+            return fields
+        prefix = self._sparse_prefix()
+        return {
+            name: field for name, field in fields.items()
+            if is_requested(prefix + name, requested)
+        }
+
+
+class SideloadedListMixin:
+    """
+    List view mixin for a normalized ``?normalize=true`` representation.
+
+    Rows are read with ``.values()`` and carry ``<relation>_id`` instead of
+    a nested object; each referenced related row is fetched once with
+    ``.values()`` and returned in a side table keyed by id::
+
+        {"next": ..., "previous": ..., "results": [...], "products": {"7": {...}}}
+
+    Views set ``sideload_relation`` (the FK name), ``sideload_key`` (the side
+    table's name), ``values_fields`` for the rows and ``sideload_fields`` for
+    the related objects. ``?fields=`` trims both (``product.name`` etc.).
+    Decimals are emitted as strings, as the serializers do.
+    """
+    sideload_relation = None
+    sideload_key = None
+    values_fields = ()
+    sideload_fields = ()
+
+    def wants_normalized(self):
+        return self.request.query_params.get('normalize', '').lower() in ('1', 'true', 'yes')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        if self.wants_normalized():
+            # Related rows are fetched separately, once each
+            return queryset.select_related(None)
+        requested = requested_fields(self.request)
+        if requested is None:
+            return queryset
+        relation = self.sideload_relation
+        if not is_requested(relation, requested):
+            # No join when the related object is not part of the response at all
+            return queryset.select_related(None)
+        # Otherwise skip loading the related columns nobody asked for
+        related_model = queryset.model._meta.get_field(relation).related_model
+        unused = [
+            f'{relation}__{field.attname}' for field in related_model._meta.concrete_fields
+            if not field.primary_key and not is_requested(f'{relation}.{field.name}', requested)
+        ]
+        return queryset.defer(*unused) if unused else queryset
+
+    @staticmethod
+    def _clean(row):
+        for key, value in row.items():
+            if isinstance(value, decimal.Decimal):
+                row[key] = str(value)
+        return row
+
+    def list(self, request, *args, **kwargs):
+        if not self.wants_normalized():
+            return super().list(request, *args, **kwargs)
+
+        requested = requested_fields(request)
+        fk_field = f'{self.sideload_relation}_id'
+        row_fields = [
+            name for name in self.values_fields
+            if name == fk_field or is_requested(name, requested)
+        ]
+        related_fields = [
+            name for name in self.sideload_fields
+            if name == 'id' or is_requested(f'{self.sideload_relation}.{name}', requested)
+        ]
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # The cursor is read from the ordering columns, so always select them
+        ordering = [term.lstrip('-') for term in queryset.query.order_by if isinstance(term, str)]
+        row_fields += [name for name in ordering if name in self.values_fields and name not in row_fields]
+        queryset = queryset.values(*row_fields)
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+
+        related_model = queryset.model._meta.get_field(self.sideload_relation).related_model
+        related_ids = {row[fk_field] for row in rows}
+        related = {
+            str(obj['id']): self._clean(obj)
+            for obj in related_model.objects.filter(id__in=related_ids).values(*related_fields)
+        }
+
+        rows = [self._clean(row) for row in rows]
+        if page is None:
+            return Response({"results": rows, self.sideload_key: related})
+        response = self.get_paginated_response(rows)
+        response.data[self.sideload_key] = related
+        return response
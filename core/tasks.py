@@ -0,0 +1,27 @@
+import tempfile
+import uuid
+
+from django.core.files import File
+from django.utils.module_loading import import_string
+
+from .jobs import PRIORITY_LOW, job_storage, task
+
+
+@task(priority=PRIORITY_LOW)
+def export_table(view, export_format):
+    """Write the rows of a ``StreamingExportView`` (dotted path) to a job file."""
+    exporter = import_string(view)()
+    rows = exporter.get_rows()
+    stream = exporter.stream_csv(rows) if export_format == 'csv' else exporter.stream_ndjson(rows)
+    with tempfile.TemporaryFile() as tmp:
+        for chunk in stream:
+            tmp.write(chunk.encode())
+        size = tmp.tell()
+        tmp.seek(0)
+        path = job_storage.save(f'exports/{uuid.uuid4().hex}.{export_format}', File(tmp))
+    return {
+        "file": path,
+        "filename": f'{exporter.export_filename}.{export_format}',
+        "content_type": exporter.content_types[export_format],
+        "bytes": size,
+    }
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from user_management.tokens import ClaimsRefreshToken
+
+from .querycount import detect_n_plus_one
+
+
+@override_settings(
+    API_RESPONSE_CACHE_ENABLED=False,
+    JWT_AUTH_USER_MODE='token',
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(APITestCase):
+    """
+    Base for query-count regression tests.
+
+    ``assertQueryBudget`` grows the fixture through ``fixture_sizes`` (via
+    the subclass's ``seed``) and sends the same request at every size. The
+    request must succeed with at most ``budget`` queries, and with the same
+    number at every size: a count that grows with the rows is an N+1. Any
+    SELECT repeated more than ``NPLUSONE_THRESHOLD`` times also fails the
+    test right away with ``NPlusOneError``, with a traceback into the loop.
+
+    Response caching is off so every request reaches the database, and
+    passwords use a fast hasher. The client sends a real access token and
+    authentication runs in the "token" user mode, so budgets count only the
+    endpoint's own queries (the default "db" mode adds one per request).
+    """
+    fixture_sizes = (1, 10, 50)
+    password = 'Budget-pass-1'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            username='budget', email='budget@example.com', password=cls.password
+        )
+
+    def setUp(self):
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def seed(self, count):
+        """Create ``count`` more rows of whatever the endpoint lists."""
+        raise NotImplementedError
+
+    def assertQueryBudget(self, budget, method, path, data=None, status=200):
+        """
+        Request ``path`` once per fixture size and check its query count.
+        ``data`` may be a callable taking the current size, for payloads
+        that must differ (or grow) between requests.
+        """
+        send = getattr(self.client, method.lower())
+        options = {} if method.upper() == 'GET' else {'format': 'json'}
+        counts = {}
+        seeded = 0
+        for size in self.fixture_sizes:
+            if size > seeded:
+                self.seed(size - seeded)
+                seeded = size
+            payload = data(size) if callable(data) else data
+            with CaptureQueriesContext(connection) as queries, detect_n_plus_one():
+                response = send(path, payload, **options)
+            self.assertEqual(
+                response.status_code, status,
+                f"{method} {path} at size {size}: {getattr(response, 'data', response.content)}"
+            )
+            counts[size] = len(queries)
+            if counts[size] > budget:
+                sql = '\n'.join(query['sql'] for query in queries.captured_queries)
+                self.fail(f"{method} {path} ran {counts[size]} queries at size {size} (budget {budget}):\n{sql}")
+        self.assertEqual(
+            len(set(counts.values())), 1,
+            f"{method} {path}: query count depends on the number of rows {counts}"
+        )
@@ -0,0 +1,145 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.db import connections
+from django.http import HttpResponse
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from inventory.models import Product
+from inventory.tests import create_products
+from user_management.tokens import ClaimsRefreshToken
+
+from .db_routers import PIN_COOKIE, ReplicaRouter, replica_read_middleware
+from .metrics import request_metrics
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer, orjson, orjson_dumps
+
+
+@override_settings(DATABASE_REPLICA_PIN_SECONDS=5)
+@mock.patch('core.db_routers.replica_aliases', return_value=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+    router = ReplicaRouter()
+
+    def handle(self, request, status=200):
+        """Send ``request`` through the middleware; return the read alias seen and the response."""
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            if request.method == 'POST':
+                self.router.db_for_write(Product)
+                seen.append(self.router.db_for_read(Product))
+            return HttpResponse(status=status)
+
+        response = replica_read_middleware(view)(request)
+        return seen, response
+
+    def test_reads_go_to_a_replica_only_in_get_requests(self, _aliases):
+        factory = RequestFactory()
+        self.assertEqual(self.router.db_for_read(Product), 'default')  # outside a request
+        self.assertEqual(self.handle(factory.get('/'))[0], ['replica_1'])
+
+        seen, response = self.handle(factory.post('/'))
+        self.assertEqual(seen, ['default', 'default'])
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+        _seen, response = self.handle(factory.post('/'), status=400)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_pinned_clients_and_transactions_read_the_primary(self, _aliases):
+        factory = RequestFactory()
+        request = factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.handle(request)[0], ['default'])
+
+        with mock.patch('core.db_routers._replica_reads') as replica_reads:
+            replica_reads.get.return_value = True
+            self.assertEqual(self.router.db_for_read(Product), 'replica_1')
+            with mock.patch.object(connections['default'], 'in_atomic_block', True):
+                self.assertEqual(self.router.db_for_read(Product), 'default')
+
+    def test_replicas_are_never_migrated(self, _aliases):
+        self.assertTrue(self.router.allow_migrate('default', 'inventory'))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'inventory'))
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False, METRICS_SAMPLE_RATE=1.0, METRICS_SERVER_TIMING=True)
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        request_metrics.reset()
+        create_products(3)
+        user = get_user_model().objects.create_user(username='metrics', email='metrics@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def test_server_timing_breakdown(self):
+        response = self.client.get('/api/products/')
+        phases = dict(part.split(';', 1) for part in response['Server-Timing'].split(', '))
+        self.assertEqual(set(phases), {'auth', 'db', 'view', 'render', 'total'})
+        self.assertIn('desc="2 queries"', phases['db'])  # user row and the page
+
+        response = self.client.get('/api/async/products/')
+        self.assertIn('view;dur=', response['Server-Timing'])
+
+    @override_settings(METRICS_TOKEN='')
+    def test_metrics_hidden_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_metrics_require_the_token(self):
+        self.client.get('/api/products/')
+        self.client.credentials()
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{route="inventory:product-list-create",method="GET",status="2xx"} 1',
+            response.content.decode(),
+        )
+
+
+class ORJSONParityTests(SimpleTestCase):
+    payload = {
+        'price': Decimal('12.50'),
+        'utc': datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'ist': datetime(2026, 3, 1, 15, 0, tzinfo=dt_timezone(timedelta(hours=5, minutes=30))),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'day': date(2026, 3, 1),
+        'at': time(9, 30, 15, 500),
+        'lead_time': timedelta(days=2, seconds=5),
+        'keys': {1: 'int', False: 'bool', None: 'none', 2.5: 'float'},
+        'big': 2 ** 70,
+        'text': 'line\u2028separator',
+        'nested': [None, 1, 'x', {'ok': False}],
+    }
+
+    def test_renders_byte_for_byte_like_json_renderer(self):
+        for key, value in self.payload.items():
+            self.assertEqual(
+                ORJSONRenderer().render({key: value}), JSONRenderer().render({key: value}), key
+            )
+        self.assertEqual(ORJSONRenderer().render(self.payload), JSONRenderer().render(self.payload))
+
+    @skipIf(orjson is None, "orjson is not installed")
+    def test_only_big_ints_fall_back(self):
+        small = {key: value for key, value in self.payload.items() if key != 'big'}
+        self.assertIsNotNone(orjson_dumps(small, JSONRenderer.encoder_class))
+        self.assertIsNone(orjson_dumps({'big': 2 ** 70}, JSONRenderer.encoder_class))
+
+    def parse(self, body):
+        return ORJSONParser().parse(io.BytesIO(body), 'application/json', {})
+
+    def test_parser(self):
+        self.assertEqual(self.parse(b'{"ids": [1, 2], "big": 123456789012345678901}'), {
+            'ids': [1, 2], 'big': 123456789012345678901,
+        })
+        for body in (b'{"a": ', b'{"a": NaN}', b'\xff'):
+            with self.assertRaises(ParseError, msg=body):
+                self.parse(body)
@@ -0,0 +1,144 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.redis import RedisCache
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+
+# Refill-and-take in one atomic step. State is a two-field hash
+# (tokens, timestamp), so work and storage are O(1) per client.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 't', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class LocalBucketStore:
+    """In-process token buckets, used when the cache is not Redis (or is down)."""
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, now):
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                allowed, wait = True, 0.0
+            else:
+                allowed, wait = False, (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker, updated by a Lua script in one round trip."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._scripts = {}
+
+    def consume(self, key, capacity, rate, now):
+        cache_key = self.cache.make_and_validate_key(key)
+        client = self.cache._cache.get_client(cache_key, write=True)
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(TOKEN_BUCKET_LUA)
+        allowed, wait = script(keys=[cache_key], args=[capacity, rate, now])
+        return bool(int(allowed)), float(wait)
+
+
+_local_store = LocalBucketStore()
+_redis_store = None
+
+
+def get_bucket_store(cache):
+    global _redis_store
+    if isinstance(cache, RedisCache):
+        if _redis_store is None or _redis_store.cache is not cache:
+            _redis_store = RedisBucketStore(cache)
+        return _redis_store
+    return _local_store
+
+
+class TokenBucketThrottleMixin:
+    """
+    Token-bucket replacement for DRF's timestamp-list throttles.
+
+    A rate of ``N/period`` becomes a bucket holding at most ``N`` tokens,
+    refilled at ``N / period`` tokens per second; each request takes one.
+    The bucket lives in Redis when the default cache is Redis (one atomic
+    script call per request) and in process memory otherwise.
+    """
+    timer = time.time
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        rate = self.num_requests / self.duration
+        now = self.timer()
+        store = get_bucket_store(self.cache)
+        try:
+            allowed, self.wait_seconds = store.consume(self.key, capacity, rate, now)
+        except Exception:
+            logger.warning("Shared throttle store unavailable; using in-process buckets", exc_info=True)
+            allowed, self.wait_seconds = _local_store.consume(self.key, capacity, rate, now)
+        return allowed
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None) or None
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottleMixin, AnonRateThrottle):
+    """Limit anonymous clients by IP using the ``anon`` rate."""
+
+
+class UserTokenBucketThrottle(TokenBucketThrottleMixin, UserRateThrottle):
+    """Limit authenticated users by id using the ``user`` rate."""
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottleMixin, ScopedRateThrottle):
+    """
+    Per-endpoint limits: views set ``throttle_scope`` (e.g. ``'login'``) and
+    the matching rate comes from ``DEFAULT_THROTTLE_RATES``.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -17,10 +17,16 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .jobs import JobDetailView, JobFileView
+from .metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/jobs/<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+    path('api/jobs/<int:pk>/file/', JobFileView.as_view(), name='job-file'),
     path('api/', include('user_management.urls')),
     path('api/', include('inventory.urls')),
     path('api/', include('customer.urls')),
-    # path('api/', include('deal_pipeline.urls')),
+    path('api/', include('deal_pipeline.urls')),
 ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# 'simple' keeps names and e-mail parts as-is (no stemming); the e-mail is
+# also split on '@' and '.' so "acme" matches "jane@acme.com".
+CUSTOMER_VECTOR_SQL = (
+    "to_tsvector('simple', "
+    "coalesce({row}.first_name, '') || ' ' || coalesce({row}.last_name, '') || ' ' || "
+    "coalesce({row}.email, '') || ' ' || translate(coalesce({row}.email, ''), '@.', '  '))"
+)
+
+
+def create_search_trigger(apps, schema_editor):
+    # tsvector triggers and GIN indexes are PostgreSQL-only; elsewhere the
+    # column stays NULL and ?search= falls back to icontains.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION customer_customer_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {CUSTOMER_VECTOR_SQL.format(row='NEW')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER customer_customer_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF first_name, last_name, email ON customer_customer
+        FOR EACH ROW EXECUTE FUNCTION customer_customer_search_vector_update()
+    """)
+    schema_editor.execute(
+        f"UPDATE customer_customer SET search_vector = {CUSTOMER_VECTOR_SQL.format(row='customer_customer')}"
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS customer_search_vector_idx '
+        'ON customer_customer USING gin (search_vector)'
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS customer_search_vector_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS customer_customer_search_vector_trigger ON customer_customer')
+    schema_editor.execute('DROP FUNCTION IF EXISTS customer_customer_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0003_customer_email_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
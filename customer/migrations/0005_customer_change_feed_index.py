@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0004_customer_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['updated_at', 'id'], name='customer_updated_at_id_idx'),
+        ),
+    ]
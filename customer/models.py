@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 
 # Create your models here.
 class Customer(models.Model):
@@ -15,7 +18,21 @@ class Customer(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     reference = models.CharField(max_length=100, blank=True, null=True)
     gst_number = models.CharField(max_length=50, blank=True, null=True)
+    # Maintained by a PostgreSQL trigger from names + email (see migrations)
+    search_vector = SearchVectorField(null=True, editable=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['city'], name='customer_city_idx'),
+            models.Index(fields=['state'], name='customer_state_idx'),
+            models.Index(fields=['gst_number'], name='customer_gst_number_idx'),
+            models.Index(fields=['phone_number'], name='customer_phone_number_idx'),
+            models.Index(fields=['created_at'], name='customer_created_at_idx'),
+            # ?search= / icontains fallback: Django compares UPPER(email) LIKE UPPER('%...%')
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='customer_email_trgm_idx'),
+            # Change feed keyset (GET /api/customer/changes/)
+            models.Index(fields=['updated_at', 'id'], name='customer_updated_at_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} - {self.email}"
\ No newline at end of file
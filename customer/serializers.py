@@ -4,5 +4,5 @@ from .models import Customer
 class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
-        fields = "__all__"
+        exclude = ("search_vector",)
         read_only_fields = ("id", "created_at", "updated_at")
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.cache import bump_resource_version, bump_object_versions
+from core.changefeed import record_tombstone
+from .models import Customer
+
+
+@receiver(post_save, sender=Customer)
+@receiver(post_delete, sender=Customer)
+def invalidate_customer_cache(sender, instance, **kwargs):
+    def invalidate():
+        bump_resource_version('customer')
+        bump_object_versions('customer', [instance.pk])
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_delete, sender=Customer)
+def record_customer_tombstone(sender, instance, **kwargs):
+    record_tombstone('customer', instance.pk)
@@ -1,3 +1,42 @@
-from django.test import TestCase
+from core.testing import QueryBudgetTestCase
 
-# Create your tests here.
+from .models import Customer
+
+
+class CustomerQueryBudgetTests(QueryBudgetTestCase):
+    """Query counts of the customer endpoints must not grow with the data."""
+
+    def seed(self, count):
+        start = Customer.objects.count()
+        Customer.objects.bulk_create(
+            Customer(
+                first_name=f'First{i}', last_name=f'Last{i}', email=f'customer{i}@example.com',
+                city=('Pune', 'Delhi', 'Chennai')[i % 3], phone_number=f'98{i:08d}',
+            )
+            for i in range(start, start + count)
+        )
+
+    def test_customer_list(self):
+        self.assertQueryBudget(1, 'GET', '/api/customer/')
+        self.assertQueryBudget(1, 'GET', '/api/customer/', {'city': 'Pune'})
+
+    def test_customer_detail(self):
+        self.seed(1)
+        customer = Customer.objects.first()
+        self.assertQueryBudget(1, 'GET', f'/api/customer/{customer.pk}/')
+
+    def test_customer_create(self):
+        def customer(size):
+            return {'first_name': 'New', 'last_name': f'Customer{size}', 'email': f'new{size}@example.com'}
+        self.assertQueryBudget(2, 'POST', '/api/customer/', customer, status=201)
+
+    def test_customer_batch(self):
+        def ids(size):
+            return {'ids': ','.join(str(pk) for pk in Customer.objects.values_list('id', flat=True))}
+        self.assertQueryBudget(1, 'GET', '/api/customer/batch/', ids)
+
+    def test_customer_change_feed(self):
+        self.assertQueryBudget(2, 'GET', '/api/customer/changes/')
+
+    def test_async_customer_list(self):
+        self.assertQueryBudget(1, 'GET', '/api/async/customer/')
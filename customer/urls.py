@@ -1,7 +1,12 @@
 from django.urls import path
 from .views import (
     CustomerListCreateView,
-    CustomerDetailView
+    CustomerDetailView,
+    CustomerBatchView,
+    CustomerExportView,
+    AsyncCustomerListView,
+    AsyncCustomerDetailView,
+    CustomerChangesView,
 )
 
 urlpatterns = [
@@ -10,4 +15,17 @@ urlpatterns = [
 
     # Retrieve, update, delete a single customer
     path('customer/<int:pk>/', CustomerDetailView.as_view(), name='customer-detail'),
+
+    # Many customers by id (?ids=1,2,3, or POST {"ids": [...]})
+    path('customer/batch/', CustomerBatchView.as_view(), name='customer-batch'),
+
+    # Changes and deletions since a watermark (incremental sync)
+    path('customer/changes/', CustomerChangesView.as_view(), name='customer-changes'),
+
+    # Stream all customers as NDJSON / CSV
+    path('customer/export/', CustomerExportView.as_view(), name='customer-export'),
+
+    # Async (ASGI-native) reads
+    path('async/customer/', AsyncCustomerListView.as_view(), name='async-customer-list'),
+    path('async/customer/<int:pk>/', AsyncCustomerDetailView.as_view(), name='async-customer-detail'),
 ]
@@ -3,19 +3,87 @@ from rest_framework import generics
 from .models import Customer
 from .serializers import CustomerSerializer
 from rest_framework.permissions import IsAuthenticated
+from core.async_views import AsyncDetailView, AsyncKeysetListView
+from core.batch import BatchRetrieveView
+from core.cache import CachedResponseMixin
+from core.changefeed import ChangeFeedView
+from core.exports import StreamingExportView
+from core.filters import FullTextSearchFilter, QueryParamFilterBackend, StableOrderingFilter
+from core.permissions import RolePermission
 
 
 # Get +post
-class CustomerListCreateView(generics.ListCreateAPIView):
+class CustomerListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
     """List all customers or create a new customer."""
-    queryset = Customer.objects.all()
+    queryset = Customer.objects.all().order_by('id')
     serializer_class = CustomerSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'customer'
+    filter_backends = [QueryParamFilterBackend, FullTextSearchFilter, StableOrderingFilter]
+    query_filters = {
+        'city': 'city',
+        'state': 'state',
+        'gst_number': 'gst_number',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lte',
+        'updated_after': 'updated_at__gte',
+    }
+    search_config = 'simple'
+    search_fallback_fields = ('first_name', 'last_name', 'email')
+    ordering_fields = ('id', 'first_name', 'last_name', 'created_at', 'updated_at')
 
 # Get(single) + put + delete
 
-class CustomerDetailView(generics.RetrieveUpdateDestroyAPIView):
+class CustomerDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     """Retrieve, update or delete a customer."""
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'customer'
+
+# Get many by id
+
+class CustomerBatchView(BatchRetrieveView):
+    """Customers by id: ``?ids=1,2,3`` or POST ``{"ids": [...]}`` (see ``BatchRetrieveView``)."""
+    queryset = Customer.objects.defer('search_vector')
+    serializer_class = CustomerSerializer
+    cache_namespace = 'customer'
+
+# Get (streamed bulk export)
+
+class CustomerExportView(StreamingExportView):
+    """Stream every customer as NDJSON or CSV."""
+    queryset = Customer.objects.order_by('id')
+    export_fields = (
+        'id', 'first_name', 'last_name', 'email', 'phone_number',
+        'office_address', 'actual_address', 'city', 'state', 'zip_code',
+        'created_at', 'updated_at', 'reference', 'gst_number'
+    )
+    export_filename = 'customers'
+
+# Async (ASGI-native) reads
+
+CUSTOMER_FIELDS = (
+    'id', 'first_name', 'last_name', 'email', 'phone_number',
+    'office_address', 'actual_address', 'city', 'state', 'zip_code',
+    'created_at', 'updated_at', 'reference', 'gst_number'
+)
+
+class AsyncCustomerListView(AsyncKeysetListView):
+    """List customers on the event loop (async ORM, keyset pages)."""
+    queryset = Customer.objects.all()
+    fields = CUSTOMER_FIELDS
+
+class AsyncCustomerDetailView(AsyncDetailView):
+    """Retrieve a customer on the event loop."""
+    queryset = Customer.objects.all()
+    fields = CUSTOMER_FIELDS
+
+
+# Incremental sync
+
+class CustomerChangesView(ChangeFeedView):
+    """Customers changed or deleted since ``?since=`` (see ``ChangeFeedView``)."""
+    queryset = Customer.objects.all()
+    resource = 'customer'
+    feed_fields = CUSTOMER_FIELDS
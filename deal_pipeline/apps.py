@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DealPipelineConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'deal_pipeline'
+
+    def ready(self):
+        from . import signals  # noqa: F401
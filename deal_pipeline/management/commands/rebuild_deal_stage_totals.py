@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from deal_pipeline.models import DealStageTotal
+from deal_pipeline.totals import rebuild_stage_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the running per-stage deal totals from the deals table. "
+        "Needed only after writes that bypass Deal.save()/delete() (e.g. QuerySet.update())."
+    )
+
+    def handle(self, *args, **options):
+        rebuild_stage_totals()
+        for total in DealStageTotal.objects.order_by('id'):
+            self.stdout.write(f"{total.stage:<12} {total.deal_count:>8} deals  {total.total_value:>16}")
+        self.stdout.write(self.style.SUCCESS("Stage totals rebuilt."))
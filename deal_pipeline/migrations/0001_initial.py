@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('customer', '0004_customer_search_vector'),
+        ('inventory', '0005_product_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealStageTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('lead', 'Lead'), ('qualified', 'Qualified'), ('proposal', 'Proposal'), ('negotiation', 'Negotiation'), ('won', 'Won'), ('lost', 'Lost')], max_length=20, unique=True)),
+                ('deal_count', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Deal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('stage', models.CharField(choices=[('lead', 'Lead'), ('qualified', 'Qualified'), ('proposal', 'Proposal'), ('negotiation', 'Negotiation'), ('won', 'Won'), ('lost', 'Lost')], default='lead', max_length=20)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expected_close_date', models.DateField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deals', to='customer.customer')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deals', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DealLineItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('deal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='line_items', to='deal_pipeline.deal')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='inventory.product')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['stage', 'value'], name='deal_stage_value_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['stage', '-updated_at'], name='deal_stage_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deal',
+            index=models.Index(fields=['owner', 'stage'], name='deal_owner_stage_idx'),
+        ),
+    ]
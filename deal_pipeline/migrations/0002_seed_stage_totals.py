@@ -0,0 +1,20 @@
+from django.db import migrations
+
+STAGES = ("lead", "qualified", "proposal", "negotiation", "won", "lost")
+
+
+def seed_stage_totals(apps, schema_editor):
+    DealStageTotal = apps.get_model('deal_pipeline', 'DealStageTotal')
+    for stage in STAGES:
+        DealStageTotal.objects.get_or_create(stage=stage)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('deal_pipeline', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_stage_totals, migrations.RunPython.noop),
+    ]
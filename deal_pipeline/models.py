@@ -1,3 +1,101 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 
-# Create your models here.
+from customer.models import Customer
+from inventory.models import Product
+
+
+STAGE_CHOICES = (
+    ("lead", "Lead"),
+    ("qualified", "Qualified"),
+    ("proposal", "Proposal"),
+    ("negotiation", "Negotiation"),
+    ("won", "Won"),
+    ("lost", "Lost"),
+)
+
+
+class Deal(models.Model):
+    title = models.CharField(max_length=255)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='deals')
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='deals'
+    )
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, default="lead")
+    # Sum of the line items; written only by deal_pipeline.totals.replace_line_items
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expected_close_date = models.DateField(blank=True, null=True)
+    notes = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Covers the kanban GROUP BY stage / SUM(value) as an index-only scan
+            models.Index(fields=['stage', 'value'], name='deal_stage_value_idx'),
+            # Newest cards per column
+            models.Index(fields=['stage', '-updated_at'], name='deal_stage_updated_idx'),
+            models.Index(fields=['owner', 'stage'], name='deal_owner_stage_idx'),
+        ]
+
+    def lock_counted_state(self, using=None):
+        """
+        Read what the stage totals currently count this deal as, under a row
+        lock, so concurrent writes adjust them one after the other.
+        """
+        self._counted_stage = self._counted_value = None
+        if self.pk is not None:
+            counted = (
+                type(self)._base_manager.db_manager(using).select_for_update()
+                .filter(pk=self.pk).values_list('stage', 'value').first()
+            )
+            if counted:
+                self._counted_stage, self._counted_value = counted
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic(using=kwargs.get('using')):
+            if update_fields is None or {'stage', 'value'} & set(update_fields):
+                self.lock_counted_state(kwargs.get('using'))
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            self.lock_counted_state(using)
+            return super().delete(using=using, keep_parents=keep_parents)
+
+    def recalculate_value(self):
+        """Set ``value`` from the line items with one aggregate query."""
+        total = self.line_items.aggregate(
+            total=models.Sum(models.F('quantity') * models.F('unit_price'))
+        )['total']
+        self.value = total or 0
+        return self.value
+
+    def __str__(self):
+        return f"{self.title} ({self.get_stage_display()})"
+
+
+class DealLineItem(models.Model):
+    deal = models.ForeignKey(Deal, on_delete=models.CASCADE, related_name='line_items')
+    product = models.ForeignKey(Product, on_delete=models.PROTECT)
+    quantity = models.PositiveIntegerField(default=1)
+    # Price agreed on the deal; defaults to the product's unit_price
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} on deal {self.deal_id}"
+
+
+class DealStageTotal(models.Model):
+    """
+    Denormalized running count and value of deals per stage, adjusted with
+    ``F()`` updates on every deal write so the kanban header never has to
+    aggregate the deals table.
+    """
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, unique=True)
+    deal_count = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.stage}: {self.deal_count} deals, {self.total_value}"
@@ -0,0 +1,68 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from customer.models import Customer
+from inventory.models import Product
+from .models import Deal, DealLineItem
+from .totals import replace_line_items
+
+
+class DealLineItemSerializer(serializers.ModelSerializer):
+    product_id = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.all(), source='product'
+    )
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    unit_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+
+    class Meta:
+        model = DealLineItem
+        fields = ['id', 'product_id', 'product_name', 'quantity', 'unit_price']
+        read_only_fields = ['id']
+
+
+class DealSerializer(serializers.ModelSerializer):
+    """
+    Deal with nested line items. Writing ``line_items`` replaces the deal's
+    items; ``value`` is always derived from them.
+    """
+    line_items = DealLineItemSerializer(many=True, required=False)
+    owner_id = serializers.IntegerField(read_only=True)
+    customer_id = serializers.PrimaryKeyRelatedField(
+        queryset=Customer.objects.all(), source='customer'
+    )
+
+    class Meta:
+        model = Deal
+        fields = [
+            'id', 'title', 'customer_id', 'owner_id', 'stage', 'value',
+            'expected_close_date', 'notes', 'line_items', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['value', 'created_at', 'updated_at']
+
+    @transaction.atomic
+    def create(self, validated_data):
+        items = validated_data.pop('line_items', [])
+        deal = Deal.objects.create(**validated_data)
+        if items:
+            replace_line_items(deal, items)
+        return deal
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        items = validated_data.pop('line_items', None)
+        instance = super().update(instance, validated_data)
+        if items is not None:
+            replace_line_items(instance, items)
+        return instance
+
+
+class DealCardSerializer(serializers.ModelSerializer):
+    """Compact deal representation for kanban columns."""
+    customer_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Deal
+        fields = ['id', 'title', 'customer_id', 'customer_name', 'owner_id', 'value', 'updated_at']
+
+    def get_customer_name(self, obj):
+        return f"{obj.customer.first_name} {obj.customer.last_name}"
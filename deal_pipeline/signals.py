@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Deal
+from .totals import adjust_stage_total
+
+
+@receiver(post_save, sender=Deal)
+def update_stage_totals_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'stage', 'value'} & set(update_fields):
+        return
+
+    old_stage = getattr(instance, '_counted_stage', None)
+    old_value = getattr(instance, '_counted_value', None)
+
+    if created or old_stage is None:
+        adjust_stage_total(instance.stage, 1, instance.value)
+    elif old_stage != instance.stage:
+        adjust_stage_total(old_stage, -1, -old_value)
+        adjust_stage_total(instance.stage, 1, instance.value)
+    elif old_value != instance.value:
+        adjust_stage_total(instance.stage, 0, instance.value - old_value)
+
+    instance._counted_stage = instance.stage
+    instance._counted_value = instance.value
+
+
+@receiver(post_delete, sender=Deal)
+def update_stage_totals_on_delete(sender, instance, **kwargs):
+    # Deal.delete() read the counted state under a lock; cascaded deletes use the fetched row
+    if getattr(instance, '_counted_stage', None) is None:
+        adjust_stage_total(instance.stage, -1, -instance.value)
+    else:
+        adjust_stage_total(instance._counted_stage, -1, -instance._counted_value)
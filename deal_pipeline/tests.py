@@ -1,3 +1,113 @@
-from django.test import TestCase
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from customer.models import Customer
+from inventory.models import Product
+from inventory.tests import create_products
+from user_management.tokens import ClaimsRefreshToken
+
+from .models import Deal, DealStageTotal
+from .totals import live_stage_totals, rebuild_stage_totals
+
+
+def stored_totals():
+    return {
+        row['stage']: (row['deal_count'], row['total_value'])
+        for row in DealStageTotal.objects.values('stage', 'deal_count', 'total_value')
+        if row['deal_count'] or row['total_value']
+    }
+
+
+def counted_totals():
+    return {stage: (row['deal_count'], row['total_value']) for stage, row in live_stage_totals().items()}
+
+
+class DealTestMixin:
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='seller', email='seller@example.com', role='manager'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}')
+        self.customer = Customer.objects.create(first_name='Asha', last_name='Rao', email='asha@example.com')
+        self.products = create_products(2)  # unit_price 10.00
+
+    def create_deal(self, **data):
+        payload = {'title': 'Deal', 'customer_id': self.customer.pk, **data}
+        response = self.client.post('/api/deals/', payload, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+
+class StageTotalTests(DealTestMixin, APITestCase):
+    def test_totals_follow_line_items_stage_moves_and_deletes(self):
+        first, second = (p.pk for p in self.products)
+        deal = self.create_deal(line_items=[{'product_id': first, 'quantity': 3}])
+        self.assertEqual(deal['value'], '30.00')
+        self.create_deal(stage='proposal')
+        self.assertEqual(stored_totals(), {'lead': (1, Decimal('30.00')), 'proposal': (1, Decimal('0.00'))})
+
+        response = self.client.patch(f"/api/deals/{deal['id']}/", {
+            'stage': 'proposal',
+            'line_items': [{'product_id': second, 'quantity': 1, 'unit_price': '5.50'}],
+        }, format='json')
+        self.assertEqual(response.data['value'], '5.50')
+        self.assertEqual(stored_totals(), {'proposal': (2, Decimal('5.50'))})
+
+        self.assertEqual(self.client.delete(f"/api/deals/{deal['id']}/").status_code, 204)
+        self.assertEqual(stored_totals(), {'proposal': (1, Decimal('0.00'))})
+        self.assertEqual(stored_totals(), counted_totals())
+
+    def test_stale_instance_adjusts_from_the_stored_row(self):
+        deal = Deal.objects.create(title='Deal', customer=self.customer, value=Decimal('10.00'))
+        stale = Deal.objects.get(pk=deal.pk)
+        deal.stage = 'won'
+        deal.save()
+        # A second writer that loaded the deal before the first saved
+        stale.value = Decimal('25.00')
+        stale.save()
+        self.assertEqual(stored_totals(), {'lead': (1, Decimal('25.00'))})
+        self.assertEqual(stored_totals(), counted_totals())
+
+    def test_products_on_line_items_cannot_be_deleted(self):
+        product = self.products[0]
+        self.create_deal(line_items=[{'product_id': product.pk}])
+        response = self.client.delete(f'/api/products/{product.pk}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('line items', response.data['error'])
+        self.assertTrue(Product.objects.filter(pk=product.pk).exists())
+        self.assertEqual(self.client.delete(f'/api/products/{self.products[1].pk}/').status_code, 204)
+
+    def test_cascaded_deletes_and_rebuild(self):
+        self.create_deal(line_items=[{'product_id': self.products[0].pk}])
+        self.customer.delete()
+        self.assertEqual(stored_totals(), {})
+        DealStageTotal.objects.update(deal_count=7)
+        rebuild_stage_totals()
+        self.assertEqual(stored_totals(), {})
+
+
+class KanbanTests(DealTestMixin, APITestCase):
+    def test_columns_cards_and_filters(self):
+        other = Customer.objects.create(first_name='Ben', last_name='Das', email='ben@example.com')
+        for i in range(3):
+            self.create_deal(title=f'Lead {i}')
+        self.create_deal(title='Other', customer_id=other.pk, stage='won')
+
+        with self.assertNumQueries(2 + 6):  # user row, stage totals, one LIMIT query per stage
+            response = self.client.get('/api/deals/kanban/', {'per_stage': 2})
+        columns = {column['stage']: column for column in response.data['stages']}
+        self.assertEqual(columns['lead']['deal_count'], 3)
+        self.assertEqual([card['title'] for card in columns['lead']['deals']], ['Lead 2', 'Lead 1'])
+        self.assertEqual(columns['won']['deals'][0]['customer_name'], 'Ben Das')
+
+        response = self.client.get('/api/deals/kanban/', {'customer': other.pk, 'owner': 'me'})
+        counts = {column['stage']: column['deal_count'] for column in response.data['stages']}
+        self.assertEqual((counts['lead'], counts['won']), (0, 1))
+
+    def test_invalid_filters(self):
+        for params in ({'owner': 'abc'}, {'customer': 'abc'}, {'per_stage': 'x'}):
+            response = self.client.get('/api/deals/kanban/', params)
+            self.assertEqual(response.status_code, 400, params)
 
-# Create your tests here.
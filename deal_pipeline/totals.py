@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import STAGE_CHOICES, Deal, DealLineItem, DealStageTotal
+
+
+def adjust_stage_total(stage, count_delta, value_delta):
+    """Add to one stage's running totals with an atomic ``F()`` update."""
+    if not count_delta and not value_delta:
+        return
+    updated = DealStageTotal.objects.filter(stage=stage).update(
+        deal_count=F('deal_count') + count_delta,
+        total_value=F('total_value') + value_delta,
+    )
+    if not updated:
+        DealStageTotal.objects.get_or_create(stage=stage)
+        adjust_stage_total(stage, count_delta, value_delta)
+
+
+@transaction.atomic
+def replace_line_items(deal, items):
+    """
+    Replace ``deal``'s line items with ``items`` (dicts of ``product`` and
+    optional ``quantity``/``unit_price``) and store the new ``value``.
+
+    This is the only writer of line items, so ``Deal.value`` and the stage
+    totals always match them.
+    """
+    # Serialize concurrent replacements of the same deal's items
+    list(Deal.objects.select_for_update().filter(pk=deal.pk).values_list('pk'))
+    DealLineItem.objects.filter(deal=deal).delete()
+    DealLineItem.objects.bulk_create([
+        DealLineItem(
+            deal=deal,
+            product=item['product'],
+            quantity=item.get('quantity', 1),
+            unit_price=item.get('unit_price', item['product'].unit_price),
+        )
+        for item in items
+    ])
+    deal.recalculate_value()
+    deal.save(update_fields=['value', 'updated_at'])
+
+
+def live_stage_totals(queryset=None):
+    """Count and value per stage with a single ``GROUP BY stage`` query."""
+    queryset = Deal.objects.all() if queryset is None else queryset
+    rows = (
+        queryset.order_by()
+        .values('stage')
+        .annotate(deal_count=Count('id'), total_value=Sum('value'))
+    )
+    return {row['stage']: row for row in rows}
+
+
+@transaction.atomic
+def rebuild_stage_totals():
+    """Recompute the running totals from the deals table (repairs drift)."""
+    live = live_stage_totals()
+    for stage, _label in STAGE_CHOICES:
+        row = live.get(stage, {})
+        DealStageTotal.objects.update_or_create(
+            stage=stage,
+            defaults={
+                'deal_count': row.get('deal_count') or 0,
+                'total_value': row.get('total_value') or 0,
+            },
+        )
@@ -0,0 +1,15 @@
+from django.urls import path
+from .views import (
+    DealListCreateView,
+    DealRetrieveUpdateDestroyView,
+    DealKanbanView,
+)
+
+urlpatterns = [
+    # Deal APIs
+    path('deals/', DealListCreateView.as_view(), name='deal-list-create'),
+    path('deals/<int:pk>/', DealRetrieveUpdateDestroyView.as_view(), name='deal-detail'),
+
+    # Kanban board (stage totals + newest cards per stage)
+    path('deals/kanban/', DealKanbanView.as_view(), name='deal-kanban'),
+]
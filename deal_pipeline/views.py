@@ -1,3 +1,118 @@
-from django.shortcuts import render
+from decimal import Decimal
 
-# Create your views here.
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.filters import QueryParamFilterBackend, StableOrderingFilter
+from core.permissions import RolePermission
+from .models import STAGE_CHOICES, Deal, DealStageTotal
+from .serializers import DealCardSerializer, DealSerializer
+from .totals import live_stage_totals
+
+
+class DealListCreateView(generics.ListCreateAPIView):
+    """List deals or create one; the creator becomes the owner."""
+    queryset = Deal.objects.prefetch_related('line_items__product').order_by('id')
+    serializer_class = DealSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    filter_backends = [QueryParamFilterBackend, StableOrderingFilter]
+    query_filters = {
+        'stage': 'stage',
+        'owner': 'owner',
+        'customer': 'customer',
+        'min_value': 'value__gte',
+        'max_value': 'value__lte',
+        'updated_after': 'updated_at__gte',
+    }
+    # Non-nullable columns only: the keyset cursor cannot seek past NULLs
+    ordering_fields = ('id', 'value', 'created_at', 'updated_at')
+
+    def perform_create(self, serializer):
+        serializer.save(owner_id=self.request.user.pk)
+
+
+class DealRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+    """Retrieve, update or delete a deal."""
+    queryset = Deal.objects.prefetch_related('line_items__product')
+    serializer_class = DealSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+
+
+class DealKanbanView(APIView):
+    """
+    Kanban board: one column per stage with its count, total value and the
+    most recently updated cards.
+
+    Unfiltered boards read the running ``DealStageTotal`` rows (constant
+    time). With ``?owner=`` / ``?customer=`` filters, or ``?live=true``, the
+    totals come from a single ``GROUP BY stage`` over the indexed columns.
+    Cards are fetched with one ``LIMIT`` query per stage, each an index
+    range scan on ``(stage, updated_at)``; ``?per_stage=`` sets how many
+    (0-100, default 20).
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    permission_model = Deal
+    max_cards_per_stage = 100
+
+    def get_per_stage(self, request):
+        try:
+            per_stage = int(request.query_params.get('per_stage', 20))
+        except ValueError:
+            raise ValidationError({'per_stage': ['A valid integer is required.']})
+        return max(0, min(per_stage, self.max_cards_per_stage))
+
+    def get_id_param(self, request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        if name == 'owner' and value == 'me':
+            return request.user.pk
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: ['A valid integer is required.']})
+
+    def get(self, request):
+        deals = Deal.objects.all()
+        filtered = False
+
+        owner = self.get_id_param(request, 'owner')
+        if owner is not None:
+            deals = deals.filter(owner_id=owner)
+            filtered = True
+        customer = self.get_id_param(request, 'customer')
+        if customer is not None:
+            deals = deals.filter(customer_id=customer)
+            filtered = True
+
+        if filtered or request.query_params.get('live') == 'true':
+            totals = live_stage_totals(deals)
+        else:
+            totals = {
+                row['stage']: row
+                for row in DealStageTotal.objects.values('stage', 'deal_count', 'total_value')
+            }
+
+        per_stage = self.get_per_stage(request)
+        cards = {
+            stage: list(
+                deals.filter(stage=stage).select_related('customer')
+                .order_by('-updated_at', '-id')[:per_stage]
+            ) if per_stage else []
+            for stage, _label in STAGE_CHOICES
+        }
+
+        columns = []
+        for stage, label in STAGE_CHOICES:
+            total = totals.get(stage, {})
+            columns.append({
+                "stage": stage,
+                "label": label,
+                "deal_count": total.get('deal_count') or 0,
+                "total_value": str(Decimal(total.get('total_value') or 0).quantize(Decimal('0.01'))),
+                "deals": DealCardSerializer(cards[stage], many=True).data,
+            })
+        return Response({"stages": columns}, status=status.HTTP_200_OK)
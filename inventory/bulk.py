@@ -0,0 +1,172 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cache import bump_resource_version
+from core.querycount import allow_repeated_queries
+from .ledger import posted_adjustments
+from .models import Product, ProductStock, StockMovement
+from .valuation import record_stock_deltas
+
+
+def validate_stock_deltas(rows):
+    """
+    Validate raw ``{"product_id", "location", "delta"}`` rows.
+
+    Returns ``(deltas, errors)`` where ``deltas`` maps
+    ``(product_id, location)`` to the summed delta of every valid row and
+    ``errors`` is a list of ``{"index": i, "errors": {...}}`` entries.
+    Product ids are checked with a single ``id__in`` query.
+    """
+    parsed = []
+    errors = []
+    max_location_length = ProductStock._meta.get_field('location').max_length
+
+    for index, row in enumerate(rows):
+        row_errors = {}
+        if not isinstance(row, dict):
+            errors.append({"index": index, "errors": {"non_field_errors": ["Expected an object."]}})
+            continue
+
+        product_id = row.get('product_id')
+        location = row.get('location')
+        delta = row.get('delta')
+
+        if isinstance(product_id, bool) or not isinstance(product_id, int):
+            row_errors['product_id'] = ["A valid integer is required."]
+        if not isinstance(location, str) or not location.strip():
+            row_errors['location'] = ["This field is required."]
+        elif len(location) > max_location_length:
+            row_errors['location'] = [f"Ensure this field has no more than {max_location_length} characters."]
+        if isinstance(delta, bool) or not isinstance(delta, int):
+            row_errors['delta'] = ["A valid integer is required."]
+
+        if row_errors:
+            errors.append({"index": index, "errors": row_errors})
+        else:
+            parsed.append((index, product_id, location.strip(), delta))
+
+    known_ids = set(
+        Product.objects.filter(id__in={p[1] for p in parsed}).values_list('id', flat=True)
+    )
+
+    deltas = {}
+    for index, product_id, location, delta in parsed:
+        if product_id not in known_ids:
+            errors.append({"index": index, "errors": {"product_id": [f'Invalid pk "{product_id}" - object does not exist.']}})
+            continue
+        key = (product_id, location)
+        deltas[key] = deltas.get(key, 0) + delta
+
+    errors.sort(key=lambda e: e['index'])
+    return deltas, errors
+
+
+def _pairs(keys):
+    """Exactly the given ``(product_id, location)`` rows (not the cross product)."""
+    condition = Q()
+    for product_id, location in keys:
+        condition |= Q(product_id=product_id, location=location)
+    return condition
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _insert_missing(missing, batch_size):
+    """
+    Insert zero rows for ``missing`` and return the keys this call created.
+
+    A concurrent batch may insert some of the same keys first; the whole
+    insert then fails on the unique key and falls back to one savepoint per
+    row, so rows created elsewhere are neither counted nor valued twice.
+    """
+    try:
+        with transaction.atomic():
+            ProductStock.objects.bulk_create(missing, batch_size=batch_size)
+        return missing
+    except IntegrityError:
+        created = []
+        for stock in missing:
+            try:
+                with transaction.atomic():
+                    ProductStock.objects.bulk_create([stock])
+                created.append(stock)
+            except IntegrityError:
+                pass
+        return created
+
+
+def apply_stock_deltas(deltas, record_movements=True):
+    """
+    Atomically add ``deltas`` (``{(product_id, location): delta}``) to stock.
+
+    Missing ``(product, location)`` rows are inserted at zero first (see
+    ``_insert_missing``). Then exactly the affected rows are locked with
+    ``SELECT ... FOR UPDATE`` in ``id`` order, so overlapping batches queue
+    behind each other instead of deadlocking, and are written back with
+    one ``bulk_update``. Increments therefore never overwrite each other,
+    and the whole batch costs a handful of queries. The batch goes into
+    the stock ledger as posted adjustments unless ``record_movements`` is
+    off (compaction applying the ledger itself).
+
+    Returns ``(created, updated)`` row counts.
+    """
+    if not deltas:
+        return 0, 0
+
+    batch_size = getattr(settings, 'STOCK_BULK_BATCH_SIZE', 1000)
+    keys = sorted(deltas)
+
+    with transaction.atomic():
+        # One SELECT per chunk of keys, the same SQL for every full chunk
+        with allow_repeated_queries():
+            ids = {}
+            for chunk in _chunks(keys, batch_size):
+                for pk, product_id, location in (
+                    ProductStock.objects.filter(_pairs(chunk)).values_list('id', 'product_id', 'location')
+                ):
+                    ids[(product_id, location)] = pk
+            missing = [
+                ProductStock(product_id=product_id, location=location, quantity=0)
+                for product_id, location in keys
+                if (product_id, location) not in ids
+            ]
+            created = _insert_missing(missing, batch_size) if missing else []
+            ids.update({(s.product_id, s.location): s.pk for s in created if s.pk is not None})
+            unresolved = [key for key in keys if key not in ids]
+            for chunk in _chunks(unresolved, batch_size):
+                # Rows a concurrent batch inserted, or backends without RETURNING
+                for pk, product_id, location in (
+                    ProductStock.objects.filter(_pairs(chunk)).values_list('id', 'product_id', 'location')
+                ):
+                    ids[(product_id, location)] = pk
+
+            now = timezone.now()
+            to_update = []
+            for chunk in _chunks(sorted(ids.values()), batch_size):
+                locked = (
+                    ProductStock.objects.select_for_update()
+                    .filter(id__in=chunk)
+                    .order_by('id')
+                    .only('id', 'product_id', 'location', 'quantity')
+                )
+                for stock in locked:
+                    delta = deltas.get((stock.product_id, stock.location))
+                    if delta is None:
+                        continue
+                    stock.quantity += delta
+                    stock.last_updated = now
+                    to_update.append(stock)
+        ProductStock.objects.bulk_update(to_update, ['quantity', 'last_updated'], batch_size=batch_size)
+        # bulk_create/bulk_update send no post_save, so keep the valuation
+        # summary and the response caches in step explicitly
+        record_stock_deltas(deltas, created_keys=[(s.product_id, s.location) for s in created])
+        if record_movements:
+            StockMovement.objects.bulk_create(posted_adjustments(deltas), batch_size=batch_size)
+        transaction.on_commit(lambda: bump_resource_version('product-stock'))
+
+    return len(created), len(to_update) - len(created)
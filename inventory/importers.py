@@ -0,0 +1,213 @@
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from core.cache import bump_resource_version, bump_object_versions
+from .models import Product
+
+
+DECIMAL_FIELDS = ('unit_price', 'card_rate', 'replacement_rate', 'weight')
+UPDATE_FIELDS = ('name', 'updated_at') + DECIMAL_FIELDS
+# Updated only when the file has the column, so leaving one out keeps the stored values
+OPTIONAL_FIELDS = ('category', 'description')
+
+
+class ImportFormatError(Exception):
+    """Raised when an import file cannot be read at all (bad type, no header...)."""
+
+
+def iter_csv_rows(fileobj):
+    """Yield one dict per CSV row, reading the file lazily."""
+    if isinstance(fileobj, io.TextIOBase):
+        text = fileobj
+    else:
+        text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text)
+    if not reader.fieldnames:
+        raise ImportFormatError("The file has no header row.")
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames]
+    yield from reader
+
+
+def iter_xlsx_rows(fileobj):
+    """Yield one dict per worksheet row using openpyxl's read-only (streaming) mode."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError("XLSX import requires the 'openpyxl' package.")
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if not header:
+            raise ImportFormatError("The file has no header row.")
+        header = [str(name or '').strip().lower() for name in header]
+        for values in rows:
+            if values is None or all(v is None for v in values):
+                continue
+            yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_product_rows(fileobj, filename):
+    """Pick the row reader from the file extension."""
+    name = (filename or '').lower()
+    if name.endswith('.csv'):
+        return iter_csv_rows(fileobj)
+    if name.endswith('.xlsx'):
+        return iter_xlsx_rows(fileobj)
+    raise ImportFormatError("Unsupported file type; upload a .csv or .xlsx file.")
+
+
+def _parse_decimal(raw):
+    if raw is None or (isinstance(raw, str) and not raw.strip()):
+        raise ValueError("This field is required.")
+    try:
+        value = Decimal(str(raw).replace(',', '').strip())
+    except InvalidOperation:
+        raise ValueError("A valid number is required.")
+    if not value.is_finite():
+        raise ValueError("A valid number is required.")
+    if value.as_tuple().exponent < -2:
+        raise ValueError("Ensure that there are no more than 2 decimal places.")
+    if abs(value) >= Decimal('1e8'):
+        raise ValueError("Ensure that there are no more than 10 digits in total.")
+    return value
+
+
+def _clean_text(raw):
+    if raw is None:
+        return ''
+    return str(raw).strip()
+
+
+def validate_product_rows(rows, start):
+    """
+    Validate one chunk of raw rows.
+
+    Returns ``(products, errors)``; ``errors`` entries carry the 1-based data
+    row number (``start`` is the number of the first row in the chunk).
+    Rows that name an ``id`` must point at an existing product, which is
+    checked with one ``id__in`` query for the whole chunk.
+    """
+    name_max_length = Product._meta.get_field('name').max_length
+    category_max_length = Product._meta.get_field('category').max_length
+    candidates = []
+    errors = []
+
+    for offset, row in enumerate(rows):
+        row_number = start + offset
+        row_errors = {}
+        values = {}
+
+        raw_id = row.get('id')
+        product_id = None
+        if raw_id not in (None, ''):
+            try:
+                product_id = int(str(raw_id).strip())
+            except ValueError:
+                row_errors['id'] = ["A valid integer is required."]
+
+        name = _clean_text(row.get('name'))
+        if not name:
+            row_errors['name'] = ["This field is required."]
+        elif len(name) > name_max_length:
+            row_errors['name'] = [f"Ensure this field has no more than {name_max_length} characters."]
+        values['name'] = name
+
+        category = _clean_text(row.get('category')) or None
+        if category and len(category) > category_max_length:
+            row_errors['category'] = [f"Ensure this field has no more than {category_max_length} characters."]
+        values['category'] = category
+        values['description'] = _clean_text(row.get('description'))
+
+        for field in DECIMAL_FIELDS:
+            try:
+                values[field] = _parse_decimal(row.get(field))
+            except ValueError as e:
+                row_errors[field] = [str(e)]
+
+        if row_errors:
+            errors.append({"row": row_number, "errors": row_errors})
+        else:
+            candidates.append((row_number, product_id, values))
+
+    wanted_ids = {product_id for _, product_id, _ in candidates if product_id is not None}
+    known_ids = set(
+        Product.objects.filter(id__in=wanted_ids).values_list('id', flat=True)
+    ) if wanted_ids else set()
+
+    products = []
+    for row_number, product_id, values in candidates:
+        if product_id is not None and product_id not in known_ids:
+            errors.append({"row": row_number, "errors": {"id": [f'Invalid pk "{product_id}" - object does not exist.']}})
+            continue
+        products.append(Product(id=product_id, **values))
+
+    errors.sort(key=lambda e: e['row'])
+    return products, errors
+
+
+def import_products(rows, chunk_size=None, max_reported_errors=None):
+    """
+    Validate and upsert products from an iterable of row dicts.
+
+    Rows are consumed ``chunk_size`` at a time; each chunk is validated and
+    written with one ``bulk_create(update_conflicts=True)`` keyed on ``id``
+    (rows with an ``id`` update that product, rows without one are
+    inserted). ``category`` and ``description`` are only overwritten when
+    the file has those columns. Only the current chunk and the first ``max_reported_errors``
+    rejected rows are ever held in memory.
+    """
+    chunk_size = chunk_size or getattr(settings, 'PRODUCT_IMPORT_CHUNK_SIZE', 2000)
+    if max_reported_errors is None:
+        max_reported_errors = getattr(settings, 'PRODUCT_IMPORT_MAX_REPORTED_ERRORS', 1000)
+
+    summary = {"total": 0, "created": 0, "updated": 0, "rejected": 0, "errors": []}
+    rows = iter(rows)
+    update_fields = None
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        if update_fields is None:
+            # Every row carries the header's keys
+            update_fields = list(UPDATE_FIELDS) + [field for field in OPTIONAL_FIELDS if field in chunk[0]]
+        products, errors = validate_product_rows(chunk, start=summary['total'] + 1)
+        summary['total'] += len(chunk)
+
+        if products:
+            updated = [p.id for p in products if p.id is not None]
+            with transaction.atomic():
+                Product.objects.bulk_create(
+                    products,
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=update_fields,
+                )
+                if updated:
+                    transaction.on_commit(lambda ids=updated: bump_object_versions('product', ids))
+            summary['updated'] += len(updated)
+            summary['created'] += len(products) - len(updated)
+
+        summary['rejected'] += len(errors)
+        room = max_reported_errors - len(summary['errors'])
+        if room > 0:
+            summary['errors'].extend(errors[:room])
+
+    if summary['created'] or summary['updated']:
+        # bulk_create sends no post_save, so invalidate cached product payloads here
+        transaction.on_commit(lambda: bump_resource_version('product'))
+    if summary['updated']:
+        # Updated prices/categories re-value existing stock; rebuilt by a worker
+        from .tasks import refresh_valuation_summary  # tasks imports this module
+        refresh_valuation_summary.enqueue()
+    return summary
@@ -0,0 +1,201 @@
+"""
+Append-only stock ledger.
+
+Every stock change is a ``StockMovement`` row. Periodic compaction rolls
+the movements no compaction has taken yet into ``StockSnapshot`` rows (one
+per ``(product, location)`` that moved), stamps them with its ``as_of`` in
+``compacted_at`` and folds the ones posted through the ledger API into
+``ProductStock``, which stays the current-stock projection the rest of the
+API reads. Balances are never summed over the whole history:
+
+* now: the stock row plus the uncompacted, unposted movements;
+* as of ``t``: the latest snapshot at or before ``t`` plus the movements
+  up to ``t`` that compaction had not taken by then.
+
+Movements are taken by ``compacted_at``, not by a time window, so one
+whose transaction commits after a compaction that covered its
+``created_at`` goes into the next compaction instead of being lost.
+Compaction still stops ``STOCK_LEDGER_LAG_SECONDS`` short of now, so such
+late movements rarely change as-of balances that were already read.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ProductStock, StockLedgerState, StockMovement, StockSnapshot
+
+
+def post_movement(product, location, kind, quantity, to_location='', reference='', user=None):
+    """
+    Append a receipt, issue, transfer or adjustment of ``quantity`` units
+    (a positive amount; adjustments are signed) and return its rows. It
+    reaches ``ProductStock`` at the next compaction and ledger reads at once.
+    """
+    now = timezone.now()
+    common = dict(product=product, kind=kind, reference=reference, created_by_id=getattr(user, 'pk', None), created_at=now)
+    if kind == StockMovement.TRANSFER:
+        rows = [
+            StockMovement(location=location, quantity=-quantity, counterpart_location=to_location, **common),
+            StockMovement(location=to_location, quantity=quantity, counterpart_location=location, **common),
+        ]
+    else:
+        sign = -1 if kind == StockMovement.ISSUE else 1
+        rows = [StockMovement(location=location, quantity=sign * quantity, **common)]
+    return StockMovement.objects.bulk_create(rows)
+
+
+def posted_adjustments(deltas):
+    """Ledger rows for ``{(product_id, location): delta}`` already applied to stock."""
+    now = timezone.now()
+    return [
+        StockMovement(
+            product_id=product_id, location=location, kind=StockMovement.ADJUSTMENT,
+            quantity=delta, posted=True, created_at=now,
+        )
+        for (product_id, location), delta in deltas.items()
+        if delta
+    ]
+
+
+def record_stock_write(old, new):
+    """
+    Record a direct stock row write, ``old`` and ``new`` being
+    ``(product_id, location, quantity)`` tuples or ``None``.
+    """
+    deltas = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state:
+            key = (state[0], state[1])
+            deltas[key] = deltas.get(key, 0) + sign * state[2]
+    StockMovement.objects.bulk_create(posted_adjustments(deltas))
+
+
+def _latest_snapshot(as_of=None):
+    """
+    The latest snapshot of the outer query's ``(product_id, location)`` at
+    or before ``as_of``: an ``ORDER BY as_of DESC LIMIT 1`` seek on the
+    ``unique_stock_snapshot`` index.
+    """
+    snapshots = StockSnapshot.objects.filter(product_id=OuterRef('product_id'), location=OuterRef('location'))
+    if as_of is not None:
+        snapshots = snapshots.filter(as_of__lte=as_of)
+    return snapshots.order_by('-as_of')
+
+
+def latest_snapshots(as_of=None, **filters):
+    """``{(product_id, location): quantity}`` of the latest snapshot per row at or before ``as_of``."""
+    snapshots = StockSnapshot.objects.filter(**filters)
+    if as_of is not None:
+        snapshots = snapshots.filter(as_of__lte=as_of)
+    if connection.vendor == 'postgresql':
+        # DISTINCT ON in the order of the unique index, walked backwards:
+        # the first entry per row is its latest, with no sort or window
+        latest = snapshots.order_by('-product_id', '-location', '-as_of').distinct('product_id', 'location')
+    else:
+        latest = snapshots.filter(as_of=Subquery(_latest_snapshot(as_of).values('as_of')[:1]))
+    return {
+        (product_id, location): quantity
+        for product_id, location, quantity in latest.values_list('product_id', 'location', 'quantity')
+    }
+
+
+def _movement_totals(movements, **annotations):
+    totals = movements.order_by().values('product_id', 'location').annotate(
+        total=Sum('quantity'),
+        unposted=Coalesce(Sum('quantity', filter=Q(posted=False)), 0),
+        **annotations,
+    )
+    return {(row['product_id'], row['location']): row for row in totals}
+
+
+def compacted_until(as_of=None):
+    """When the ledger was last compacted (at or before ``as_of``)."""
+    if as_of is None:
+        return StockLedgerState.objects.filter(pk=1).values_list('compacted_until', flat=True).first()
+    return StockSnapshot.objects.filter(as_of__lte=as_of).aggregate(at=Max('as_of'))['at']
+
+
+def ledger_quantities(as_of=None, product_id=None, location=None):
+    """
+    ``(compacted_until, {(product_id, location): quantity})``: stock per
+    row now or as of a past moment, optionally for one product/location.
+    """
+    filters = {}
+    if product_id is not None:
+        filters['product_id'] = product_id
+    if location is not None:
+        filters['location'] = location
+
+    since = compacted_until(as_of)
+    movements = StockMovement.objects.filter(**filters)
+    if as_of is None:
+        # The stock row already counts everything but the unposted tail
+        quantities = dict(
+            ((product, loc), quantity)
+            for product, loc, quantity in ProductStock.objects.filter(**filters)
+            .values_list('product_id', 'location', 'quantity')
+        )
+        tail = movements.filter(compacted_at__isnull=True, posted=False)
+    else:
+        quantities = latest_snapshots(as_of, **filters)
+        tail = movements.filter(created_at__lte=as_of)
+        if since is not None:
+            # Not yet taken by the compaction the snapshots are from
+            tail = tail.filter(Q(compacted_at__isnull=True) | Q(compacted_at__gt=since))
+    for key, row in _movement_totals(tail).items():
+        quantities[key] = quantities.get(key, 0) + row['total']
+    return since, quantities
+
+
+def compact_stock_ledger(until=None):
+    """
+    Snapshot every row with uncompacted movements up to ``until``
+    (default: ``STOCK_LEDGER_LAG_SECONDS`` ago) as of ``until``, mark those
+    movements compacted and add the unposted ones to ``ProductStock``.
+
+    The ledger state row is locked for the duration, so compactions run
+    one at a time. Returns ``{"compacted_until", "rows", "movements"}``.
+    """
+    from .bulk import apply_stock_deltas  # bulk records its adjustments through this module
+
+    if until is None:
+        until = timezone.now() - timedelta(seconds=getattr(settings, 'STOCK_LEDGER_LAG_SECONDS', 60))
+    batch_size = getattr(settings, 'STOCK_BULK_BATCH_SIZE', 1000)
+
+    with transaction.atomic():
+        StockLedgerState.objects.get_or_create(pk=1)
+        state = StockLedgerState.objects.select_for_update().get(pk=1)
+        since = state.compacted_until
+        if since is not None and until <= since:
+            return {"compacted_until": since, "rows": 0, "movements": 0}
+
+        # Take the movements in one UPDATE and total exactly what it marked,
+        # so a movement committing in between waits for the next run
+        moved = StockMovement.objects.filter(compacted_at__isnull=True, created_at__lte=until).update(
+            compacted_at=until
+        )
+        totals = _movement_totals(
+            StockMovement.objects.filter(compacted_at=until),
+            previous=Coalesce(Subquery(_latest_snapshot().values('quantity')[:1]), 0),
+        ) if moved else {}
+
+        if totals:
+            StockSnapshot.objects.bulk_create([
+                StockSnapshot(
+                    product_id=product_id, location=location, as_of=until,
+                    quantity=row['previous'] + row['total'],
+                )
+                for (product_id, location), row in totals.items()
+            ], batch_size=batch_size)
+            apply_stock_deltas(
+                {key: row['unposted'] for key, row in totals.items() if row['unposted']},
+                record_movements=False,
+            )
+
+        state.compacted_until = until
+        state.save(update_fields=['compacted_until'])
+    return {"compacted_until": until, "rows": len(totals), "movements": moved}
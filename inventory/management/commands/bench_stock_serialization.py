@@ -0,0 +1,76 @@
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from inventory.models import ProductStock
+from inventory.views import ProductStockListCreateView
+
+
+# (label, query parameters) for each representation of the stock list
+STRATEGIES = [
+    ("nested (full ProductSerializer)", {}),
+    ("nested, ?fields= sparse", {'fields': 'id,location,quantity,last_updated,product.id,product.name'}),
+    ("normalized side table", {'normalize': 'true'}),
+    ("normalized, ?fields= sparse", {
+        'normalize': 'true', 'fields': 'id,location,quantity,last_updated,product.id,product.name',
+    }),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure serialization throughput of GET /api/product-stock/ for the "
+        "nested, sparse (?fields=) and normalized (?normalize=true) "
+        "representations. Runs the real view in-process with the response "
+        "cache and throttles off; seed data first with `manage.py seed_data`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help="Stock rows to fetch per run (followed across cursor pages).")
+        parser.add_argument('--page-size', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Runs per strategy; the best run is reported.")
+
+    def fetch(self, view, user, params, rows, page_size):
+        factory = APIRequestFactory()
+        url = '/api/product-stock/?' + urlencode({**params, 'page_size': page_size})
+        fetched = size = 0
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            while url and fetched < rows:
+                request = factory.get(url)
+                force_authenticate(request, user=user)
+                response = view(request)
+                response.render()
+                fetched += len(response.data['results'])
+                size += len(response.content)
+                url = response.data['next']
+            elapsed = time.perf_counter() - started
+        return fetched, size, elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        if not ProductStock.objects.exists():
+            raise CommandError("No stock rows; run `manage.py seed_data` first.")
+
+        view = ProductStockListCreateView.as_view(throttle_classes=[])
+        # Unsaved user: authenticated for the permission check, no DB lookups
+        user = get_user_model()(username='bench')
+
+        self.stdout.write(f"{'strategy':<34} {'rows':>7} {'best ms':>9} {'rows/s':>10} {'KB':>9} {'queries':>8}")
+        with override_settings(API_RESPONSE_CACHE_ENABLED=False):
+            for label, params in STRATEGIES:
+                runs = [
+                    self.fetch(view, user, params, options['rows'], options['page_size'])
+                    for _ in range(max(1, options['repeat']))
+                ]
+                fetched, size, elapsed, queries = min(runs, key=lambda run: run[2])
+                self.stdout.write(
+                    f"{label:<34} {fetched:>7} {elapsed * 1000:>9.1f} {fetched / elapsed:>10.0f} "
+                    f"{size / 1024:>9.1f} {queries:>8}"
+                )
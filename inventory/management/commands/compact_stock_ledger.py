@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from inventory.ledger import compact_stock_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll stock movements older than STOCK_LEDGER_LAG_SECONDS into ledger snapshots and "
+        "post ledger API movements to the stock table. Schedule it (e.g. cron every few "
+        "minutes); runs never overlap."
+    )
+
+    def handle(self, *args, **options):
+        summary = compact_stock_ledger()
+        self.stdout.write(self.style.SUCCESS(
+            f"Stock ledger compacted until {summary['compacted_until']:%Y-%m-%d %H:%M:%S} "
+            f"({summary['movements']} movements, {summary['rows']} stock rows)."
+        ))
@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from customer.models import Customer
+from inventory.models import Product, ProductStock
+
+
+# Planner switches turned off for the --compare baseline: the queries run
+# as if no index existed, without touching the schema
+INDEX_SCAN_SETTINGS = ('enable_indexscan', 'enable_indexonlyscan', 'enable_bitmapscan')
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for the indexed lookup paths. "
+        "Seed data first with `manage.py seed_data`; pass --compare to also "
+        "run every query with index scans disabled in a transaction first "
+        "(read-only, PostgreSQL only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compare', action='store_true',
+                            help="Show plans without the indexes first, then with them.")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Executions per query for the timing column.")
+
+    def get_queries(self):
+        sample_product = Product.objects.order_by('id').values('id', 'name', 'category').first() or {}
+        sample_customer = Customer.objects.order_by('id').values('gst_number', 'phone_number').first() or {}
+        since = timezone.now() - timedelta(days=7)
+        return [
+            ("product by category", Product.objects.filter(category=sample_product.get('category'))),
+            ("product by name", Product.objects.filter(name=sample_product.get('name'))),
+            ("product name search", Product.objects.filter(name__icontains='valve')),
+            ("stock by location", ProductStock.objects.filter(location='WH-07')),
+            ("stock by product+location", ProductStock.objects.filter(
+                product_id=sample_product.get('id'), location='WH-07')),
+            ("customer by city", Customer.objects.filter(city='Pune')),
+            ("customer by state", Customer.objects.filter(state='Karnataka')),
+            ("customer by gst", Customer.objects.filter(gst_number=sample_customer.get('gst_number'))),
+            ("customer by phone", Customer.objects.filter(phone_number=sample_customer.get('phone_number'))),
+            ("customers created last week", Customer.objects.filter(created_at__gte=since)),
+            ("customer email search", Customer.objects.filter(email__icontains='customer4242')),
+        ]
+
+    def run_queries(self, repeat):
+        analyze = connection.vendor == 'postgresql'
+        for label, queryset in self.get_queries():
+            plan = queryset.explain(analyze=True) if analyze else queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset[:100].values_list('id', flat=True))
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"\n{label}  (best of {repeat}: {min(timings):.2f} ms)"
+            ))
+            self.stdout.write(plan)
+
+    def disable_index_scans(self):
+        # SET LOCAL ends with the transaction; no DDL, no table locks
+        with connection.cursor() as cursor:
+            for name in INDEX_SCAN_SETTINGS:
+                cursor.execute(f'SET LOCAL {name} = off')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if options['compare']:
+            if connection.vendor != 'postgresql':
+                self.stderr.write("--compare needs PostgreSQL planner settings; showing current plans only.")
+            else:
+                self.stdout.write(self.style.WARNING("=== WITHOUT index scans ==="))
+                with transaction.atomic():
+                    self.disable_index_scans()
+                    self.run_queries(repeat)
+                self.stdout.write(self.style.WARNING("\n=== WITH lookup indexes ==="))
+        self.run_queries(repeat)
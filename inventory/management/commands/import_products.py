@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventory.importers import ImportFormatError, import_products, iter_product_rows
+
+
+class Command(BaseCommand):
+    help = "Import (create or update) products from a CSV or XLSX price list."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path to a .csv or .xlsx file.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help="Rows validated and written per batch (default: PRODUCT_IMPORT_CHUNK_SIZE)."
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, 'rb') as fileobj:
+                summary = import_products(
+                    iter_product_rows(fileobj, path),
+                    chunk_size=options['chunk_size'],
+                )
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(summary, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {summary['created']} new and {summary['updated']} updated products; "
+            f"{summary['rejected']} rows rejected."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory.models import StockValuationSummary
+from inventory.valuation import rebuild_valuation_summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per location/category stock valuation summary from the stock table. "
+        "Stock and product saves keep it current; schedule this (e.g. nightly cron) to repair "
+        "drift from writes that bypass them, such as QuerySet.update() or raw SQL."
+    )
+
+    def handle(self, *args, **options):
+        groups = rebuild_valuation_summary()
+        if options['verbosity'] > 1:
+            for row in StockValuationSummary.objects.order_by('location', 'category'):
+                self.stdout.write(
+                    f"{row.location:<30} {row.category or '-':<20} {row.total_quantity:>12} {row.stock_value:>18}"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Stock valuation summary rebuilt ({groups} groups)."))
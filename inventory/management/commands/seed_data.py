@@ -0,0 +1,161 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from customer.models import Customer
+from inventory.ledger import posted_adjustments
+from inventory.models import Product, ProductStock, StockMovement
+from inventory.tasks import refresh_valuation_summary
+
+
+CATEGORIES = ['Hardware', 'Electrical', 'Plumbing', 'Paint', 'Tools', 'Fasteners', 'Safety', 'Garden']
+LOCATIONS = [f'WH-{n:02d}' for n in range(1, 41)]
+CITIES = [
+    ('Mumbai', 'Maharashtra'), ('Pune', 'Maharashtra'), ('Delhi', 'Delhi'),
+    ('Bengaluru', 'Karnataka'), ('Chennai', 'Tamil Nadu'), ('Hyderabad', 'Telangana'),
+    ('Ahmedabad', 'Gujarat'), ('Kolkata', 'West Bengal'), ('Jaipur', 'Rajasthan'),
+]
+WORDS = ['bolt', 'nut', 'washer', 'pipe', 'valve', 'cable', 'switch', 'brush', 'drill', 'hinge', 'clamp', 'tape']
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users, products, stock rows and customers in bulk for benchmarks "
+        "and query-plan checks. Users are named <user-prefix><n> and share "
+        "--user-password, for `loadtest --users`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=100_000)
+        parser.add_argument('--stock', type=int, default=1_000_000,
+                            help="Stock rows; capped at products x locations.")
+        parser.add_argument('--customers', type=int, default=200_000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--user-prefix', default='loadtest-')
+        parser.add_argument('--user-password', default='Loadtest-pass-1')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        created = self.seed_users(options['users'], options['user_prefix'], options['user_password'], batch_size)
+        self.stdout.write(f"users: {created}")
+        created = self.seed_products(rng, options['products'], batch_size)
+        self.stdout.write(f"products: {created}")
+        created = self.seed_stock(rng, options['stock'], batch_size)
+        self.stdout.write(f"stock rows: {created}")
+        # bulk_create skips the signals that keep the summary current; a worker rebuilds it
+        job = refresh_valuation_summary.enqueue()
+        self.stdout.write(f"valuation summary: queued as job {job.pk}")
+        created = self.seed_customers(rng, options['customers'], batch_size)
+        self.stdout.write(f"customers: {created}")
+        self.stdout.write(self.style.SUCCESS("Seeding complete."))
+
+    def _flush(self, model, objs, batch_size, **kwargs):
+        model.objects.bulk_create(objs, batch_size=batch_size, **kwargs)
+        objs.clear()
+
+    def seed_users(self, count, prefix, password, batch_size):
+        User = get_user_model()
+        # One hash for all of them; hashing each would dominate the run
+        encoded = make_password(password)
+        users = [
+            User(username=f"{prefix}{n}", email=f"{prefix}{n}@example.com", password=encoded, role='employee')
+            for n in range(count)
+        ]
+        # Re-running keeps the existing users (and their passwords)
+        self._flush(User, users, batch_size, ignore_conflicts=True)
+        return count
+
+    def seed_products(self, rng, count, batch_size):
+        start = Product.objects.count()
+        batch = []
+        for n in range(start, start + count):
+            price = Decimal(rng.randint(100, 500_000)) / 100
+            batch.append(Product(
+                name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}",
+                category=rng.choice(CATEGORIES),
+                unit_price=price,
+                card_rate=price * Decimal('1.10'),
+                replacement_rate=price * Decimal('1.25'),
+                weight=Decimal(rng.randint(1, 10_000)) / 100,
+                description=f"Seeded product {n}",
+            ))
+            if len(batch) >= batch_size:
+                self._flush(Product, batch, batch_size)
+        self._flush(Product, batch, batch_size)
+        return count
+
+    def seed_stock(self, rng, count, batch_size):
+        """
+        Add stock rows, each with a posted opening adjustment in the stock
+        ledger so snapshots and as-of reads start from the seeded quantity.
+        """
+        product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        count = min(count, len(product_ids) * len(LOCATIONS))
+        batch = []
+        walked = created = 0
+        # Walk (product, location) pairs, skipping the ones a previous run seeded
+        for location in LOCATIONS:
+            if walked >= count:
+                break
+            existing = set(ProductStock.objects.filter(location=location).values_list('product_id', flat=True))
+            for product_id in product_ids:
+                if walked >= count:
+                    break
+                walked += 1
+                if product_id in existing:
+                    continue
+                batch.append(ProductStock(
+                    product_id=product_id, location=location, quantity=rng.randint(0, 500),
+                ))
+                created += 1
+                if len(batch) >= batch_size:
+                    self._flush_stock(batch, batch_size)
+        self._flush_stock(batch, batch_size)
+        return created
+
+    def _flush_stock(self, batch, batch_size):
+        openings = posted_adjustments({(stock.product_id, stock.location): stock.quantity for stock in batch})
+        with transaction.atomic():
+            self._flush(ProductStock, batch, batch_size)
+            self._flush(StockMovement, openings, batch_size)
+
+    def seed_customers(self, rng, count, batch_size):
+        start = Customer.objects.count()
+        last_id = Customer.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        batch = []
+        for n in range(start, start + count):
+            city, state = rng.choice(CITIES)
+            batch.append(Customer(
+                first_name=f"First{n}",
+                last_name=f"Last{n % 5000}",
+                email=f"customer{n}@example.com",
+                phone_number=f"9{rng.randint(100_000_000, 999_999_999)}",
+                city=city,
+                state=state,
+                zip_code=str(rng.randint(110_000, 859_999)),
+                gst_number=f"{rng.randint(10, 37)}ABCDE{n:05d}Z{rng.randint(1, 9)}",
+            ))
+            if len(batch) >= batch_size:
+                self._flush(Customer, batch, batch_size)
+        self._flush(Customer, batch, batch_size)
+
+        # auto_now_add stamps every row with "now"; spread created_at over a
+        # year so date-range plans see a realistic distribution.
+        now = timezone.now()
+        span = count // 365 + 1
+        for day in range(365):
+            low = last_id + day * span
+            Customer.objects.filter(id__gt=low, id__lte=low + span).update(
+                created_at=now - timedelta(days=day)
+            )
+        return count
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:10
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_stock_rows(apps, schema_editor):
+    """Fold duplicate (product, location) rows into the lowest id before the constraint is added."""
+    ProductStock = apps.get_model('inventory', 'ProductStock')
+    duplicates = (
+        ProductStock.objects.values('product_id', 'location')
+        .annotate(rows=Count('id'), keep_id=Min('id'), total=Sum('quantity'))
+        .filter(rows__gt=1)
+    )
+    for dup in duplicates.iterator():
+        ProductStock.objects.filter(id=dup['keep_id']).update(quantity=dup['total'])
+        ProductStock.objects.filter(
+            product_id=dup['product_id'], location=dup['location']
+        ).exclude(id=dup['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_stock_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='productstock',
+            constraint=models.UniqueConstraint(fields=('product', 'location'), name='unique_product_location'),
+        ),
+    ]
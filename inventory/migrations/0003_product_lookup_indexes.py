@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_productstock_unique_product_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category'], name='product_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name'], name='product_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productstock',
+            index=models.Index(fields=['location'], name='productstock_location_idx'),
+        ),
+    ]
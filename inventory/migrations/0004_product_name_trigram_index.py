@@ -0,0 +1,28 @@
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+from core.operations import PostgresAddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0003_product_lookup_indexes'),
+    ]
+
+    operations = [
+        # pg_trgm is a trusted extension: the database owner can create it
+        TrigramExtension(),
+        PostgresAddIndexConcurrently(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(
+                OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'),
+                name='product_name_trgm_idx',
+            ),
+        ),
+    ]
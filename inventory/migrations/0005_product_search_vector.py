@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+PRODUCT_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce({row}.name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce({row}.description, '')), 'B')"
+)
+
+
+def create_search_trigger(apps, schema_editor):
+    # tsvector triggers and GIN indexes are PostgreSQL-only; elsewhere the
+    # column stays NULL and ?search= falls back to icontains.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION inventory_product_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {PRODUCT_VECTOR_SQL.format(row='NEW')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER inventory_product_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description ON inventory_product
+        FOR EACH ROW EXECUTE FUNCTION inventory_product_search_vector_update()
+    """)
+    schema_editor.execute(
+        f"UPDATE inventory_product SET search_vector = {PRODUCT_VECTOR_SQL.format(row='inventory_product')}"
+    )
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS product_search_vector_idx '
+        'ON inventory_product USING gin (search_vector)'
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS product_search_vector_idx')
+    schema_editor.execute('DROP TRIGGER IF EXISTS inventory_product_search_vector_trigger ON inventory_product')
+    schema_editor.execute('DROP FUNCTION IF EXISTS inventory_product_search_vector_update()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_product_name_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
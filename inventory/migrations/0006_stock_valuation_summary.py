@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockValuationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=150)),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('sku_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('card_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('replacement_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_weight', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productstock',
+            index=models.Index(fields=['quantity'], name='productstock_quantity_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='stockvaluationsummary',
+            constraint=models.UniqueConstraint(fields=('location', 'category'), name='unique_valuation_location_category'),
+        ),
+    ]
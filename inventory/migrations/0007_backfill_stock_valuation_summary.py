@@ -0,0 +1,57 @@
+from django.db import migrations
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_valuation_summary(apps, schema_editor):
+    ProductStock = apps.get_model('inventory', 'ProductStock')
+    StockValuationSummary = apps.get_model('inventory', 'StockValuationSummary')
+    money = DecimalField(max_digits=20, decimal_places=2)
+
+    def value_of(field):
+        return Coalesce(
+            Sum(ExpressionWrapper(F('quantity') * F(f'product__{field}'), output_field=money)),
+            Value(0, output_field=money),
+        )
+
+    rows = (
+        ProductStock.objects.order_by()
+        .annotate(group_category=Coalesce('product__category', Value('')))
+        .values('location', 'group_category')
+        .annotate(
+            sku_count=Count('id'),
+            total_quantity=Coalesce(Sum('quantity'), 0),
+            stock_value=value_of('unit_price'),
+            card_value=value_of('card_rate'),
+            replacement_value=value_of('replacement_rate'),
+            total_weight=value_of('weight'),
+        )
+    )
+    StockValuationSummary.objects.bulk_create([
+        StockValuationSummary(
+            location=row['location'],
+            category=row['group_category'],
+            sku_count=row['sku_count'],
+            total_quantity=row['total_quantity'],
+            stock_value=row['stock_value'],
+            card_value=row['card_value'],
+            replacement_value=row['replacement_value'],
+            total_weight=row['total_weight'],
+        )
+        for row in rows
+    ])
+
+
+def clear_valuation_summary(apps, schema_editor):
+    apps.get_model('inventory', 'StockValuationSummary').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_stock_valuation_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_valuation_summary, clear_valuation_summary),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_backfill_stock_valuation_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='product_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productstock',
+            index=models.Index(fields=['last_updated', 'id'], name='productstock_updated_id_idx'),
+        ),
+    ]
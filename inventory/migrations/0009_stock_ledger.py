@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_change_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLedgerState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compacted_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=150)),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('issue', 'Issue'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('counterpart_location', models.CharField(blank=True, default='', max_length=150)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('posted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='stockmovement_created_idx'), models.Index(fields=['product', 'location', 'created_at'], name='stockmovement_key_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=150)),
+                ('quantity', models.IntegerField()),
+                ('as_of', models.DateTimeField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='inventory.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['as_of'], name='stocksnapshot_as_of_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'location', 'as_of'), name='unique_stock_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def snapshot_current_stock(apps, schema_editor):
+    """Open the ledger with today's stock as the first snapshot."""
+    ProductStock = apps.get_model('inventory', 'ProductStock')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    as_of = timezone.now()
+    batch = []
+    for product_id, location, quantity in (
+        ProductStock.objects.order_by('id').values_list('product_id', 'location', 'quantity').iterator(chunk_size=5000)
+    ):
+        batch.append(StockSnapshot(product_id=product_id, location=location, quantity=quantity, as_of=as_of))
+        if len(batch) >= 5000:
+            StockSnapshot.objects.bulk_create(batch)
+            batch = []
+    StockSnapshot.objects.bulk_create(batch)
+    apps.get_model('inventory', 'StockLedgerState').objects.update_or_create(pk=1, defaults={'compacted_until': as_of})
+
+
+def clear_snapshots(apps, schema_editor):
+    apps.get_model('inventory', 'StockSnapshot').objects.all().delete()
+    apps.get_model('inventory', 'StockLedgerState').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(snapshot_current_stock, clear_snapshots),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def stamp_compacted_movements(apps, schema_editor):
+    """Stamp the movements earlier compactions took (by their time window) with that compaction."""
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    StockSnapshot = apps.get_model('inventory', 'StockSnapshot')
+    state = apps.get_model('inventory', 'StockLedgerState').objects.filter(pk=1).first()
+    if state is None or state.compacted_until is None:
+        return
+    since = None
+    compactions = StockSnapshot.objects.filter(as_of__lte=state.compacted_until).values_list('as_of', flat=True)
+    for as_of in compactions.order_by('as_of').distinct():
+        window = StockMovement.objects.filter(created_at__lte=as_of)
+        if since is not None:
+            window = window.filter(created_at__gt=since)
+        window.update(compacted_at=as_of)
+        since = as_of
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_stock_ledger_baseline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockmovement',
+            name='stockmovement_created_idx',
+        ),
+        migrations.AddField(
+            model_name='stockmovement',
+            name='compacted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(stamp_compacted_movements, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(condition=models.Q(('compacted_at__isnull', True)), fields=['created_at'], name='stockmovement_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['compacted_at'], name='stockmovement_compacted_idx'),
+        ),
+    ]
@@ -1,6 +1,24 @@
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 # Create your models here.
+VALUATION_FIELDS = ('category', 'unit_price', 'card_rate', 'replacement_rate', 'weight')
+
+
+def valuation_snapshot(product):
+    """The product attributes stock valuation depends on (None if any is deferred)."""
+    if not set(VALUATION_FIELDS) <= product.__dict__.keys():
+        return None
+    return {
+        field: product._meta.get_field(field).to_python(getattr(product, field))
+        for field in VALUATION_FIELDS
+    }
+
+
 class Product(models.Model):
     name = models.CharField(max_length=255)
     category = models.CharField(max_length=100, blank=True, null=True)  # Optional if needed
@@ -11,6 +29,43 @@ class Product(models.Model):
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True) 
+    # Maintained by a PostgreSQL trigger from name + description (see migrations)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category'], name='product_category_idx'),
+            models.Index(fields=['name'], name='product_name_idx'),
+            # ?search= / icontains fallback: Django compares UPPER(name) LIKE UPPER('%...%')
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='product_name_trgm_idx'),
+            # Change feed keyset (GET /api/products/changes/)
+            models.Index(fields=['updated_at', 'id'], name='product_updated_at_id_idx'),
+        ]
+
+    def lock_valuation_state(self, using=None):
+        """
+        Read the attributes the valuation summary currently counts this
+        product's stock with, under a row lock, so concurrent writers
+        re-value the stock one after the other.
+        """
+        self._valuation_snapshot = None
+        if self.pk is not None:
+            self._valuation_snapshot = (
+                type(self)._base_manager.db_manager(using).select_for_update()
+                .filter(pk=self.pk).values(*VALUATION_FIELDS).first()
+            )
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        with transaction.atomic(using=kwargs.get('using')):
+            if update_fields is None or set(VALUATION_FIELDS) & set(update_fields):
+                self.lock_valuation_state(kwargs.get('using'))
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            self.lock_valuation_state(using)
+            return super().delete(using=using, keep_parents=keep_parents)
 
     def __str__(self):
         return self.name
@@ -21,5 +76,153 @@ class ProductStock(models.Model):
     quantity = models.IntegerField()
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One stock row per product per location; bulk deltas upsert on it
+            models.UniqueConstraint(fields=['product', 'location'], name='unique_product_location'),
+        ]
+        indexes = [
+            # (product, location) is covered by the unique constraint above
+            models.Index(fields=['location'], name='productstock_location_idx'),
+            models.Index(fields=['quantity'], name='productstock_quantity_idx'),
+            # Change feed keyset (GET /api/product-stock/changes/)
+            models.Index(fields=['last_updated', 'id'], name='productstock_updated_id_idx'),
+        ]
+
+    def lock_valuation_state(self, using=None):
+        """Read what the valuation summary counts this row as, under a row lock."""
+        self._valuation_snapshot = None
+        if self.pk is not None:
+            self._valuation_snapshot = (
+                type(self)._base_manager.db_manager(using).select_for_update()
+                .filter(pk=self.pk).values_list('product_id', 'location', 'quantity').first()
+            )
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            self.lock_valuation_state(kwargs.get('using'))
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using):
+            self.lock_valuation_state(using)
+            return super().delete(using=using, keep_parents=keep_parents)
+
     def __str__(self):
         return f"{self.product.name} - {self.location}"
+
+
+class StockValuationSummary(models.Model):
+    """
+    Stock totals per (location, category), kept up to date incrementally
+    by stock and product writes (see ``inventory.valuation``) and rebuilt
+    by ``manage.py refresh_inventory_valuation``. Uncategorized products are
+    grouped under an empty category.
+    """
+    location = models.CharField(max_length=150)
+    category = models.CharField(max_length=100, blank=True, default='')
+    sku_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    stock_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    card_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    replacement_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_weight = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'category'], name='unique_valuation_location_category'),
+        ]
+
+    def __str__(self):
+        return f"{self.location} / {self.category or '-'}"
+
+
+class StockMovement(models.Model):
+    """
+    One entry of the append-only stock ledger (see ``inventory.ledger``):
+    a signed change of ``quantity`` at ``(product, location)``. A transfer
+    is two rows, out of one location and into the other.
+
+    Movements posted through the ledger API are folded into
+    ``ProductStock.quantity`` when the ledger is compacted. Direct stock
+    writes (stock endpoints, bulk adjustments) are recorded here too, as
+    ``posted`` adjustments that are already counted in the stock row.
+    ``compacted_at`` is the ``as_of`` of the compaction that took the
+    movement, ``NULL`` until then.
+    """
+    RECEIPT = 'receipt'
+    ISSUE = 'issue'
+    TRANSFER = 'transfer'
+    ADJUSTMENT = 'adjustment'
+    KIND_CHOICES = (
+        (RECEIPT, 'Receipt'),
+        (ISSUE, 'Issue'),
+        (TRANSFER, 'Transfer'),
+        (ADJUSTMENT, 'Adjustment'),
+    )
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    location = models.CharField(max_length=150)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    quantity = models.IntegerField()
+    # The other side of a transfer
+    counterpart_location = models.CharField(max_length=150, blank=True, default='')
+    reference = models.CharField(max_length=100, blank=True, default='')
+    posted = models.BooleanField(default=False)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    compacted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Compaction and current reads: movements no compaction has taken yet
+            models.Index(
+                fields=['created_at'], condition=models.Q(compacted_at__isnull=True),
+                name='stockmovement_pending_idx',
+            ),
+            # As-of reads and compaction totals: movements taken after a compaction
+            models.Index(fields=['compacted_at'], name='stockmovement_compacted_idx'),
+            # History of one stock row
+            models.Index(fields=['product', 'location', 'created_at'], name='stockmovement_key_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.quantity:+d} {self.product_id} @ {self.location}"
+
+
+class StockSnapshot(models.Model):
+    """
+    Ledger balance of ``(product, location)`` at ``as_of``, written by each
+    compaction for the rows that moved since the previous one. A balance at
+    any time is the latest snapshot at or before it plus the movements after.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    location = models.CharField(max_length=150)
+    quantity = models.IntegerField()
+    as_of = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'location', 'as_of'], name='unique_stock_snapshot'),
+        ]
+        indexes = [
+            # Latest compaction at or before a time
+            models.Index(fields=['as_of'], name='stocksnapshot_as_of_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} @ {self.location}: {self.quantity} as of {self.as_of:%Y-%m-%d %H:%M:%S}"
+
+
+class StockLedgerState(models.Model):
+    """
+    Single row: how far the stock ledger has been compacted. Compactions
+    lock it, so they never run concurrently.
+    """
+    compacted_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Stock ledger compacted until {self.compacted_until}"
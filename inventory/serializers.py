@@ -1,7 +1,8 @@
 from rest_framework import serializers
-from .models import Product, ProductStock
+from core.sparse import SparseFieldsetMixin
+from .models import Product, ProductStock, StockMovement
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = [
@@ -11,7 +12,7 @@ class ProductSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['created_at', 'updated_at']
 
-class ProductStockSerializer(serializers.ModelSerializer):
+class ProductStockSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), source='product', write_only=True
@@ -21,6 +22,51 @@ class ProductStockSerializer(serializers.ModelSerializer):
         model = ProductStock
         fields = [
             'id', 'product', 'product_id', 'quantity',
-            'location', 'last_restocked', 'created_at', 'updated_at'
+            'location', 'last_updated'
         ]
-        read_only_fields = ['created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['last_updated']
+
+
+class LowStockSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    category = serializers.CharField(source='product.category', read_only=True)
+
+    class Meta:
+        model = ProductStock
+        fields = ['id', 'product_id', 'product_name', 'category', 'location', 'quantity', 'last_updated']
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    """
+    Input is an amount: receipts, issues and transfers take a positive
+    ``quantity`` (stored negative out of a location), adjustments a signed
+    one. Transfers name the receiving ``to_location``.
+    """
+    product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all(), source='product')
+    to_location = serializers.CharField(max_length=150, required=False, write_only=True)
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id', 'product_id', 'location', 'kind', 'quantity', 'to_location',
+            'counterpart_location', 'reference', 'posted', 'created_at'
+        ]
+        read_only_fields = ['counterpart_location', 'posted', 'created_at']
+
+    def validate(self, attrs):
+        kind = attrs['kind']
+        quantity = attrs['quantity']
+        to_location = attrs.get('to_location')
+        if kind == StockMovement.ADJUSTMENT:
+            if quantity == 0:
+                raise serializers.ValidationError({"quantity": ["An adjustment cannot be zero."]})
+        elif quantity <= 0:
+            raise serializers.ValidationError({"quantity": ["Ensure this value is greater than 0."]})
+        if kind == StockMovement.TRANSFER:
+            if not to_location:
+                raise serializers.ValidationError({"to_location": ["This field is required for transfers."]})
+            if to_location == attrs['location']:
+                raise serializers.ValidationError({"to_location": ["Must differ from location."]})
+        elif to_location:
+            raise serializers.ValidationError({"to_location": ["Only transfers have a to_location."]})
+        return attrs
@@ -0,0 +1,74 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.cache import bump_resource_version, bump_object_versions
+from core.changefeed import record_tombstone
+from .ledger import record_stock_write
+from .models import VALUATION_FIELDS, Product, ProductStock, valuation_snapshot
+from .valuation import record_product_change, record_stock_change
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_cache(sender, instance, **kwargs):
+    def invalidate():
+        bump_resource_version('product')
+        bump_object_versions('product', [instance.pk])
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=ProductStock)
+@receiver(post_delete, sender=ProductStock)
+def invalidate_product_stock_cache(sender, **kwargs):
+    transaction.on_commit(lambda: bump_resource_version('product-stock'))
+
+
+@receiver(post_delete, sender=Product)
+def record_product_tombstone(sender, instance, **kwargs):
+    record_tombstone('product', instance.pk)
+
+
+@receiver(post_delete, sender=ProductStock)
+def record_product_stock_tombstone(sender, instance, **kwargs):
+    record_tombstone('product-stock', instance.pk)
+
+
+# Stock valuation summary upkeep (see inventory.valuation). Product and
+# ProductStock save()/delete() read the counted state under a row lock first.
+def _stored_product_values(product_id):
+    return Product.objects.filter(pk=product_id).values(*VALUATION_FIELDS).first()
+
+
+@receiver(post_save, sender=Product)
+def revalue_product_stock(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not set(VALUATION_FIELDS) & set(update_fields)):
+        return
+    new = valuation_snapshot(instance) or _stored_product_values(instance.pk)
+    record_product_change(instance.pk, getattr(instance, '_valuation_snapshot', None), new)
+
+
+@receiver(pre_delete, sender=Product)
+def remove_product_valuation(sender, instance, **kwargs):
+    # The cascaded stock deletes skip their own adjustment (see below)
+    old = getattr(instance, '_valuation_snapshot', None) or _stored_product_values(instance.pk)
+    record_product_change(instance.pk, old, None)
+
+
+@receiver(post_save, sender=ProductStock)
+def update_valuation_on_stock_save(sender, instance, created, **kwargs):
+    old = None if created else getattr(instance, '_valuation_snapshot', None)
+    new = (instance.product_id, instance.location, instance.quantity)
+    record_stock_change(old, new)
+    record_stock_write(old, new)
+
+
+@receiver(post_delete, sender=ProductStock)
+def update_valuation_on_stock_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, Product) or getattr(origin, 'model', None) is Product:
+        return
+    old = getattr(instance, '_valuation_snapshot', None) or (
+        instance.product_id, instance.location, instance.quantity
+    )
+    record_stock_change(old, None)
+    record_stock_write(old, None)
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from core.jobs import PRIORITY_HIGH, JobFailed, job_storage, task
+
+from .importers import ImportFormatError, import_products, iter_product_rows
+from .ledger import compact_stock_ledger
+from .valuation import rebuild_valuation_summary
+
+
+@task()
+def import_product_file(path, filename):
+    """
+    Import an uploaded catalogue file (see ``ProductImportView``), then
+    delete it. The file goes in as one transaction: rows without an ``id``
+    are inserted, so an attempt that fails or whose worker dies must leave
+    nothing behind for the retry to insert again.
+    """
+    try:
+        with transaction.atomic(), job_storage.open(path, 'rb') as fileobj:
+            summary = import_products(iter_product_rows(fileobj, filename))
+    except ImportFormatError as e:
+        raise JobFailed(str(e))
+    job_storage.delete(path)
+    return summary
+
+
+@task(priority=PRIORITY_HIGH)
+def refresh_valuation_summary():
+    """Rebuild the stock valuation summary from the stock table."""
+    return {"groups": rebuild_valuation_summary()}
+
+
+@task()
+def compact_ledger():
+    """Snapshot the stock ledger and post its movements to stock."""
+    summary = compact_stock_ledger()
+    return {**summary, "compacted_until": summary["compacted_until"].isoformat()}
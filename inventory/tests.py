@@ -1,3 +1,840 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import tempfile
+import time
+from unittest import mock
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.cache import get_cache, object_cache_keys
+from core.jobs import JobFailed, LocalBroker, claim, enqueue, job_storage, requeue_lost_jobs, run_job, task
+from core.pagination import KeysetCursorPagination
+from core.querycount import detect_n_plus_one
+from core.models import Job
+from core.testing import QueryBudgetTestCase
+from user_management.tokens import ClaimsRefreshToken
+
+from . import importers
+from .bulk import _insert_missing
+from .importers import import_products, iter_csv_rows
+from .ledger import compact_stock_ledger, ledger_quantities
+from .models import Product, ProductStock, StockMovement, StockSnapshot, StockValuationSummary
+from .valuation import live_valuation
+from .views import ProductStockListCreateView
+
+LOCATIONS = ('WH-A', 'WH-B', 'WH-C')
+
+
+def create_products(count, start=0):
+    products = []
+    for i in range(start, start + count):
+        product = Product.objects.create(
+            name=f'Product {i}', category=f'cat-{i % 4}', description=f'Description {i}',
+            unit_price=Decimal('10.00'), card_rate=Decimal('12.00'),
+            replacement_rate=Decimal('9.00'), weight=Decimal('1.50'),
+        )
+        ProductStock.objects.create(product=product, location=LOCATIONS[i % len(LOCATIONS)], quantity=i % 20)
+        products.append(product)
+    return products
+
+
+class InventoryQueryBudgetTests(QueryBudgetTestCase):
+    """Query counts of the inventory endpoints must not grow with the data."""
+
+    def seed(self, count):
+        create_products(count, start=Product.objects.count())
+
+    def test_product_list(self):
+        self.assertQueryBudget(1, 'GET', '/api/products/')
+
+    def test_product_detail(self):
+        product = create_products(1)[0]
+        self.assertQueryBudget(1, 'GET', f'/api/products/{product.pk}/')
+
+    def test_product_batch(self):
+        def ids(size):
+            return {'ids': list(Product.objects.values_list('id', flat=True))}
+        self.assertQueryBudget(1, 'POST', '/api/products/batch/', ids)
+
+    def test_product_stock_list(self):
+        # One joined query; dropping select_related('product') makes it one per row
+        self.assertQueryBudget(1, 'GET', '/api/product-stock/')
+
+    def test_product_stock_list_sparse_and_normalized(self):
+        self.assertQueryBudget(1, 'GET', '/api/product-stock/', {'fields': 'id,quantity,product.name'})
+        self.assertQueryBudget(2, 'GET', '/api/product-stock/', {'normalize': 'true'})
+
+    def test_product_stock_detail(self):
+        stock = create_products(1)[0].productstock_set.get()
+        self.assertQueryBudget(2, 'GET', f'/api/product-stock/{stock.pk}/')
+
+    def test_low_stock_list(self):
+        self.assertQueryBudget(1, 'GET', '/api/product-stock/low/', {'threshold': 15})
+
+    def test_stock_valuation(self):
+        self.assertQueryBudget(1, 'GET', '/api/product-stock/valuation/')
+        self.assertQueryBudget(1, 'GET', '/api/product-stock/valuation/', {'live': 'true'})
+
+    def test_bulk_adjust(self):
+        # The valuation summary takes one UPDATE per (location, category)
+        # touched, so the payload stays within one of them as it grows; the
+        # ledger rows are one INSERT
+        def items(size):
+            stock = ProductStock.objects.filter(location='WH-A', product__category='cat-0')
+            return {'items': [
+                {'product_id': product_id, 'location': location, 'delta': 1}
+                for product_id, location in stock.values_list('product_id', 'location')
+            ]}
+        self.assertQueryBudget(9, 'POST', '/api/product-stock/bulk/', items)
+
+    def test_stock_ledger(self):
+        # Compaction point, latest snapshots, movements after them
+        product = create_products(1)[0]
+        self.assertQueryBudget(3, 'GET', '/api/product-stock/ledger/', {'location': 'WH-A'})
+        self.assertQueryBudget(3, 'GET', '/api/product-stock/ledger/', {
+            'product': product.pk, 'as_of': timezone.now().isoformat(),
+        })
+
+    def test_change_feeds(self):
+        # One keyset read for the changed rows and one for the tombstones
+        self.assertQueryBudget(2, 'GET', '/api/products/changes/')
+        self.assertQueryBudget(2, 'GET', '/api/product-stock/changes/')
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class BulkAdjustTests(APITestCase):
+    def setUp(self):
+        self.products = create_products(3)  # 0 at WH-A, 1 at WH-B, 2 at WH-C
+        user = get_user_model().objects.create_user(username='bulk', email='bulk@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def stock(self):
+        return dict(((s.product_id, s.location), s.quantity) for s in ProductStock.objects.all())
+
+    def test_deltas_are_summed_applied_and_reported(self):
+        first, second, third = (p.pk for p in self.products)
+        response = self.client.post('/api/product-stock/bulk/', {'items': [
+            {'product_id': first, 'location': 'WH-A', 'delta': 5},
+            {'product_id': first, 'location': 'WH-A', 'delta': -2},
+            {'product_id': second, 'location': 'WH-A', 'delta': 4},
+            {'product_id': 999, 'location': 'WH-A', 'delta': 1},
+            {'product_id': first, 'location': '', 'delta': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ('received', 'applied', 'created', 'updated')},
+            {'received': 5, 'applied': 3, 'created': 1, 'updated': 1},
+        )
+        self.assertEqual([e['index'] for e in response.data['errors']], [3, 4])
+        self.assertEqual(self.stock(), {
+            (first, 'WH-A'): 3, (second, 'WH-A'): 4, (second, 'WH-B'): 1, (third, 'WH-C'): 2,
+        })
+        summary = StockValuationSummary.objects.get(location='WH-A', category='cat-1')
+        self.assertEqual((summary.sku_count, summary.total_quantity), (1, 4))
+
+    def test_invalid_payloads(self):
+        self.assertEqual(self.client.post('/api/product-stock/bulk/', [], format='json').status_code, 400)
+        response = self.client.post('/api/product-stock/bulk/', [{'product_id': 'x'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        with self.settings(STOCK_BULK_MAX_ROWS=1):
+            rows = [{'product_id': self.products[0].pk, 'location': 'WH-A', 'delta': 1}] * 2
+            self.assertEqual(self.client.post('/api/product-stock/bulk/', rows, format='json').status_code, 400)
+
+    @override_settings(STOCK_BULK_BATCH_SIZE=2, NPLUSONE_THRESHOLD=3)
+    def test_chunked_batches_pass_the_n_plus_one_guard(self):
+        rows = [
+            {'product_id': product.pk, 'location': f'BIN-{i}', 'delta': 1}
+            for product in self.products for i in range(5)
+        ]
+        with detect_n_plus_one():
+            response = self.client.post('/api/product-stock/bulk/', rows, format='json')
+        self.assertEqual((response.status_code, response.data['created']), (200, 15))
+
+    def test_rows_created_concurrently_are_not_counted(self):
+        first, second, _ = self.products
+        # Raced: another batch inserts (first, WH-Z) between our read and our insert
+        ProductStock.objects.create(product=first, location='WH-Z', quantity=0)
+        created = _insert_missing([
+            ProductStock(product=first, location='WH-Z', quantity=0),
+            ProductStock(product=second, location='WH-Z', quantity=0),
+        ], batch_size=10)
+        self.assertEqual([(s.product_id, s.location) for s in created], [(second.pk, 'WH-Z')])
+
+
+class ProductImportTests(TestCase):
+    def test_columns_missing_from_the_file_are_kept(self):
+        product = create_products(1)[0]
+        rows = iter_csv_rows(io.StringIO(
+            'id,name,unit_price,card_rate,replacement_rate,weight\n'
+            f'{product.pk},Renamed,11.00,13.00,9.50,1.50\n'
+            ',New,1.00,1.00,1.00,1.00\n'
+        ))
+        summary = import_products(rows)
+        self.assertEqual((summary['created'], summary['updated'], summary['rejected']), (1, 1, 0))
+        product.refresh_from_db()
+        self.assertEqual(
+            (product.name, product.unit_price, product.category, product.description),
+            ('Renamed', Decimal('11.00'), 'cat-0', 'Description 0'),
+        )
+
+    def test_present_columns_are_overwritten(self):
+        product = create_products(1)[0]
+        rows = [{'id': str(product.pk), 'name': 'P', 'category': '', 'description': 'New',
+                 'unit_price': '1', 'card_rate': '1', 'replacement_rate': '1', 'weight': '1'}]
+        import_products(rows)
+        product.refresh_from_db()
+        self.assertEqual((product.category, product.description), (None, 'New'))
+
+    def test_rejected_rows_are_reported_by_row_number(self):
+        rows = [{'name': 'Ok', 'unit_price': '1', 'card_rate': '1', 'replacement_rate': '1', 'weight': '1'},
+                {'name': '', 'unit_price': 'x', 'card_rate': '1', 'replacement_rate': '1', 'weight': '1'}]
+        summary = import_products(rows)
+        self.assertEqual(summary['errors'], [{'row': 2, 'errors': {
+            'name': ['This field is required.'], 'unit_price': ['A valid number is required.'],
+        }}])
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False, JWT_AUTH_USER_MODE='token')
+class SparseRepresentationTests(APITestCase):
+    def setUp(self):
+        self.products = create_products(4)
+        user = get_user_model().objects.create_user(username='sparse', email='sparse@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def test_sparse_fieldsets(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/product-stock/', {'fields': 'id,quantity,product.name'})
+        first = ProductStock.objects.order_by('id').first()
+        self.assertEqual(response.data['results'][0], {'id': first.pk, 'quantity': 0, 'product': {'name': 'Product 0'}})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/product-stock/', {'fields': 'id,location'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'location'})
+        self.assertNotIn('JOIN', queries.captured_queries[0]['sql'])
+
+    def test_normalized_list_sideloads_each_product_once(self):
+        ProductStock.objects.create(product=self.products[0], location='WH-B', quantity=5)
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/product-stock/', {'normalize': 'true', 'fields': 'quantity,product.name'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'product_id', 'quantity'})
+        self.assertEqual(response.data['products'][str(self.products[0].pk)], {'id': self.products[0].pk, 'name': 'Product 0'})
+        self.assertEqual(len(response.data['products']), 4)
+
+
+class StockValuationTests(TestCase):
+    def assertSummaryMatchesStock(self):
+        stored = {
+            (row['location'], row['category']): (row['sku_count'], row['total_quantity'], row['stock_value'])
+            for row in StockValuationSummary.objects.values('location', 'category', 'sku_count', 'total_quantity', 'stock_value')
+            if row['sku_count']
+        }
+        live = {
+            (row['location'], row['group_category']): (row['sku_count'], row['total_quantity'], row['stock_value'])
+            for row in live_valuation()
+        }
+        self.assertEqual(stored, live)
+
+    def test_stale_instances_adjust_from_the_stored_row(self):
+        product = create_products(1)[0]
+        stock = ProductStock.objects.get(product=product)
+        stale_stock = ProductStock.objects.get(pk=stock.pk)
+        stale_product = Product.objects.get(pk=product.pk)
+
+        stock.quantity = 7
+        stock.save()
+        stale_stock.quantity = 3  # loaded before the first save
+        stale_stock.save()
+        product.unit_price = Decimal('20.00')
+        product.save()
+        stale_product.category = 'cat-9'
+        stale_product.save()
+        self.assertSummaryMatchesStock()
+
+        stale_stock.delete()
+        self.assertSummaryMatchesStock()
+
+    def test_import_updates_queue_a_rebuild(self):
+        product = create_products(1)[0]
+        rows = [{'id': str(product.pk), 'name': 'P', 'unit_price': '5', 'card_rate': '1',
+                 'replacement_rate': '1', 'weight': '1'}]
+        import_products(rows)
+        self.assertEqual(
+            list(Job.objects.values_list('name', 'status')),
+            [('inventory.tasks.refresh_valuation_summary', Job.QUEUED)],
+        )
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username='pages', email='pages@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def walk(self, url, params=None, link='next'):
+        ids = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [row['id'] for row in response.data['results']]
+            if not response.data[link]:
+                return ids, response
+            response = self.client.get(response.data[link])
+
+    def test_forward_and_back(self):
+        products = create_products(12)
+        ids, last = self.walk('/api/products/', {'page_size': 5})
+        self.assertEqual(ids, [p.pk for p in products])
+
+        back, _ = self.walk(last.data['previous'], link='previous')
+        self.assertEqual(back, [p.pk for p in products][5:10] + [p.pk for p in products][:5])
+
+    def test_ties_on_the_ordering_key_page_through(self):
+        # Every row shares the location and the price; DRF's tie offset is capped
+        create_products(30)
+        ProductStock.objects.update(location='WH-A')
+        expected = list(ProductStock.objects.order_by('id').values_list('id', flat=True))
+        with mock.patch.object(KeysetCursorPagination, 'offset_cutoff', 2):
+            ids, _ = self.walk('/api/product-stock/', {'ordering': 'location', 'page_size': 4})
+            self.assertEqual(ids, expected)
+            ids, _ = self.walk('/api/product-stock/', {'ordering': '-location', 'page_size': 4, 'normalize': 'true'})
+            self.assertEqual(ids, expected[::-1])
+            ids, _ = self.walk('/api/products/', {'ordering': '-unit_price', 'page_size': 7})
+            self.assertEqual(len(set(ids)), 30)
+
+    def test_low_stock_ties_page_through(self):
+        create_products(30)
+        ProductStock.objects.update(quantity=0)
+        expected = list(ProductStock.objects.order_by('id').values_list('id', flat=True))
+        with mock.patch.object(KeysetCursorPagination, 'offset_cutoff', 2):
+            ids, _ = self.walk('/api/product-stock/low/', {'page_size': 4})
+        self.assertEqual(ids, expected)
+
+    def test_filters_and_search(self):
+        create_products(8)
+        response = self.client.get('/api/products/', {'category': 'cat-1'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Product 1', 'Product 5'])
+        response = self.client.get('/api/products/', {'search': 'Description 7'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Product 7'])
+        self.assertEqual(self.client.get('/api/products/', {'min_price': 'cheap'}).status_code, 400)
+
+    def test_bad_cursor(self):
+        for position in ('[1,2]', '["x"]', 'nope'):
+            cursor = base64.b64encode(f'p={position}'.encode()).decode()
+            self.assertEqual(self.client.get('/api/products/', {'cursor': cursor}).status_code, 404)
+
+
+class LookupIndexTests(TestCase):
+    def test_hot_lookups_use_their_indexes(self):
+        create_products(3)
+        out, err = io.StringIO(), io.StringIO()
+        call_command('explain_lookups', '--compare', '--repeat', '1', stdout=out, stderr=err)
+        self.assertIn('needs PostgreSQL', err.getvalue())
+        plans = out.getvalue()
+        for index in ('productstock_location_idx', 'product_category_idx', 'customer_city_idx'):
+            self.assertIn(index, plans)
+
+
+class ProductStockStrTests(TestCase):
+    def test_str_over_list_queryset_uses_the_join(self):
+        create_products(5)
+        with self.assertNumQueries(1):
+            labels = [str(stock) for stock in ProductStockListCreateView.queryset.all()]
+        self.assertEqual(len(labels), 5)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class AsyncEndpointTests(APITestCase):
+    def setUp(self):
+        self.products = create_products(5)
+        user = get_user_model().objects.create_user(username='async', email='async@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def test_list_pages_forward_like_the_sync_view(self):
+        seen, url = [], '/api/async/products/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(seen, [p.pk for p in self.products])
+
+    def test_next_link_keeps_repeated_parameters(self):
+        response = self.client.get('/api/async/products/?page_size=2&tag=a&tag=b')
+        self.assertIn('tag=a&tag=b', response.json()['next'])
+
+    def test_malformed_cursor_is_a_404_like_the_sync_view(self):
+        cursor = base64.urlsafe_b64encode(b'p=x').decode()
+        for path in ('/api/async/products/', '/api/products/'):
+            response = self.client.get(path, {'cursor': cursor})
+            self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Invalid cursor'}), path)
+
+    def test_detail_matches_the_sync_view(self):
+        stock = ProductStock.objects.get(product=self.products[1])
+        for path in (f'products/{self.products[1].pk}/', f'product-stock/{stock.pk}/'):
+            self.assertEqual(self.client.get(f'/api/async/{path}').json(), self.client.get(f'/api/{path}').json())
+        self.assertEqual(self.client.get('/api/async/products/0/').status_code, 404)
+
+    def test_credentials_required(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/async/products/').status_code, 401)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class StreamingExportTests(APITestCase):
+    def setUp(self):
+        self.products = create_products(3)
+        user = get_user_model().objects.create_user(username='export', email='export@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def export(self, path, export_format):
+        response = self.client.get(path, {'export_format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode().splitlines()
+
+    def test_csv(self):
+        response, lines = self.export('/api/product-stock/export/', 'csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="product_stock.csv"')
+        self.assertEqual(lines[0], 'id,product_id,product__name,location,quantity,last_updated')
+        self.assertEqual(len(lines), 1 + 3)
+
+    def test_ndjson(self):
+        response, lines = self.export('/api/products/export/', 'ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['id'] for row in rows], [p.pk for p in self.products])
+        self.assertEqual(rows[0]['unit_price'], '10.00')
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get('/api/products/export/', {'export_format': 'xml'}).status_code, 400)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False, CHANGE_FEED_LAG_SECONDS=0)
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.products = create_products(5)
+        user = get_user_model().objects.create_user(username='feed', email='feed@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def sync(self, since=None):
+        """Poll until ``has_more`` is false; return the changed ids, deleted ids and watermark."""
+        changed, deleted, pages = [], [], 0
+        while True:
+            params = {'page_size': 2, **({'since': since} if since else {})}
+            response = self.client.get('/api/products/changes/', params)
+            self.assertEqual(response.status_code, 200)
+            changed += [row['id'] for row in response.data['results']]
+            deleted += response.data['deleted']
+            since, pages = response.data['next_since'], pages + 1
+            if not response.data['has_more']:
+                return changed, deleted, since, pages
+
+    def test_pages_and_resumes_from_the_watermark(self):
+        changed, deleted, since, pages = self.sync()
+        self.assertEqual(changed, [p.pk for p in self.products])
+        self.assertEqual((deleted, pages), ([], 3))
+
+        self.assertEqual(self.sync(since)[:2], ([], []))
+        self.products[1].name = 'Renamed'
+        self.products[1].save()
+        self.assertEqual(self.sync(since)[:2], ([self.products[1].pk], []))
+
+    def test_deletes_come_back_as_tombstones(self):
+        since = self.sync()[2]
+        gone = [self.products[0].pk, self.products[3].pk]
+        Product.objects.filter(pk__in=gone).delete()
+        changed, deleted, _, _ = self.sync(since)
+        self.assertEqual((changed, sorted(deleted)), ([], gone))
+
+    def test_bad_and_expired_watermarks(self):
+        response = self.client.get('/api/products/changes/', {'since': 'not-a-watermark'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+        expired = (timezone.now() - timedelta(days=31)).isoformat()
+        with self.settings(CHANGE_FEED_TOMBSTONE_DAYS=30):
+            self.assertEqual(self.client.get('/api/products/changes/', {'since': expired}).status_code, 410)
+
+
+@override_settings(JWT_AUTH_USER_MODE='token')
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.product = create_products(1)[0]
+        user = get_user_model().objects.create_user(username='cache', email='cache@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def test_cached_payload_and_etag(self):
+        response = self.client.get('/api/product-stock/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/product-stock/').data, response.data)
+            self.assertEqual(self.client.get('/api/product-stock/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_embedded_resource_save_invalidates(self):
+        etag = self.client.get('/api/product-stock/')['ETag']
+        self.product.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response = self.client.get('/api/product-stock/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['product']['name'], 'Renamed')
+
+
+@override_settings(JWT_AUTH_USER_MODE='token')
+class ProductBatchTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.products = create_products(3)
+        user = get_user_model().objects.create_user(username='batch', email='batch@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def test_input_order_and_missing_ids(self):
+        first, second, third = (p.pk for p in self.products)
+        response = self.client.get('/api/products/batch/', {'ids': f'{third},999,{first},{third}'})
+        self.assertEqual([row['id'] for row in response.data['results']], [third, first])
+        self.assertEqual(response.data['missing'], [999])
+
+        response = self.client.post('/api/products/batch/', {'ids': [second, 998]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(([row['id'] for row in response.data['results']], response.data['missing']), ([second], [998]))
+
+    def test_cached_objects_are_not_read_again(self):
+        first, second, third = (p.pk for p in self.products)
+        self.client.get('/api/products/batch/', {'ids': f'{first},{second}'})
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/products/batch/', {'ids': f'{first},{second},{third}'})
+        self.assertIn(f'IN ({third})', queries.captured_queries[0]['sql'])
+        self.assertEqual(len(response.data['results']), 3)
+
+        # Saving one product drops its entry only
+        self.products[0].name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].save()
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get('/api/products/batch/', {'ids': f'{first},{second},{third}'})
+        self.assertIn(f'IN ({first})', queries.captured_queries[0]['sql'])
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed')
+
+    def test_payload_read_before_a_write_is_not_served_after_it(self):
+        product = self.products[0]
+        # A reader looks up the key, then the row; a save commits in between
+        key = object_cache_keys('product', [product.pk])[product.pk]
+        stale = self.client.get('/api/products/batch/', {'ids': str(product.pk)}).data['results'][0]
+        product.name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        get_cache().set(key, stale)
+        response = self.client.get('/api/products/batch/', {'ids': str(product.pk)})
+        self.assertEqual(response.data['results'][0]['name'], 'Renamed')
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.client.get('/api/products/batch/', {'ids': '1,x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/products/batch/').status_code, 400)
+        with self.settings(API_BATCH_MAX_IDS=2):
+            self.assertEqual(self.client.post('/api/products/batch/', [1, 2, 3], format='json').status_code, 400)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class StockLedgerTests(APITestCase):
+    def setUp(self):
+        self.product = create_products(1)[0]  # 0 units at WH-A
+        self.user = get_user_model().objects.create_user(username='ledger', email='ledger@example.com')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        )
+
+    def move(self, kind, quantity, location='WH-A', **extra):
+        return self.client.post('/api/stock-movements/', {
+            'product_id': self.product.pk, 'location': location, 'kind': kind, 'quantity': quantity, **extra,
+        }, format='json')
+
+    def balances(self, **params):
+        response = self.client.get('/api/product-stock/ledger/', {'product': self.product.pk, **params})
+        return {row['location']: row['quantity'] for row in response.data['results']}
+
+    def stock(self):
+        return dict(ProductStock.objects.filter(product=self.product).values_list('location', 'quantity'))
+
+    def test_movements_post_at_compaction(self):
+        self.assertEqual(self.move('receipt', 10).status_code, 201)
+        transfer = self.move('transfer', 4, to_location='WH-B')
+        self.assertEqual([row['quantity'] for row in transfer.data], [-4, 4])
+        self.move('issue', 1, location='WH-B')
+
+        self.assertEqual(self.balances(), {'WH-A': 6, 'WH-B': 3})
+        self.assertEqual(self.stock(), {'WH-A': 0})
+
+        summary = compact_stock_ledger(until=timezone.now())
+        self.assertEqual((summary['movements'], summary['rows']), (4, 2))
+        self.assertEqual(self.stock(), {'WH-A': 6, 'WH-B': 3})
+        self.assertEqual(self.balances(), {'WH-A': 6, 'WH-B': 3})
+        # Nothing new: nothing posted twice
+        compact_stock_ledger(until=timezone.now())
+        self.assertEqual(self.stock(), {'WH-A': 6, 'WH-B': 3})
+
+    def test_direct_stock_writes_are_recorded_as_posted(self):
+        stock = ProductStock.objects.get(product=self.product)
+        self.client.patch(f'/api/product-stock/{stock.pk}/', {'quantity': 5}, format='json')
+        self.client.post('/api/product-stock/bulk/', [
+            {'product_id': self.product.pk, 'location': 'WH-C', 'delta': 2},
+        ], format='json')
+        self.assertEqual(
+            set(StockMovement.objects.values_list('location', 'quantity', 'posted')),
+            {('WH-A', 5, True), ('WH-C', 2, True)},
+        )
+        compact_stock_ledger(until=timezone.now())
+        self.assertEqual(self.stock(), {'WH-A': 5, 'WH-C': 2})
+        self.assertEqual(self.balances(), {'WH-A': 5, 'WH-C': 2})
+
+    def test_as_of(self):
+        self.move('receipt', 10)
+        first = timezone.now()
+        compact_stock_ledger(until=first)
+        self.move('issue', 3)
+        second = timezone.now()
+        self.move('issue', 2)
+        compact_stock_ledger(until=timezone.now())
+        self.move('receipt', 7)
+
+        self.assertEqual(self.balances(as_of=first.isoformat()), {'WH-A': 10})
+        self.assertEqual(self.balances(as_of=second.isoformat()), {'WH-A': 7})
+        self.assertEqual(self.balances(as_of=timezone.now().isoformat()), {'WH-A': 12})
+        self.assertEqual(ledger_quantities(product_id=self.product.pk)[1], {(self.product.pk, 'WH-A'): 12})
+        self.assertEqual(StockSnapshot.objects.filter(product=self.product).count(), 2)
+
+    def test_seeded_stock_survives_compaction(self):
+        call_command('seed_data', products=2, stock=6, customers=1, users=1, stdout=io.StringIO())
+        call_command('seed_data', products=0, stock=6, customers=0, users=0, stdout=io.StringIO())  # nothing new
+        seeded = dict(
+            ((product_id, location), quantity)
+            for product_id, location, quantity in ProductStock.objects.values_list('product_id', 'location', 'quantity')
+        )
+        self.assertEqual(len(seeded), 7)  # and the setUp row
+        compact_stock_ledger(until=timezone.now())
+
+        stock = dict(
+            ((product_id, location), quantity)
+            for product_id, location, quantity in ProductStock.objects.values_list('product_id', 'location', 'quantity')
+        )
+        self.assertEqual(stock, seeded)
+        for product_id in {product_id for product_id, _ in seeded}:
+            self.assertEqual(
+                ledger_quantities(as_of=timezone.now(), product_id=product_id)[1],
+                {key: quantity for key, quantity in seeded.items() if key[0] == product_id and quantity},
+            )
+
+    def test_late_commits_go_into_the_next_compaction(self):
+        self.move('receipt', 10)
+        first = timezone.now()
+        compact_stock_ledger(until=first)
+        # Stamped before the compaction's cut-off, committed after it ran
+        StockMovement.objects.create(
+            product=self.product, location='WH-A', kind='issue', quantity=-4, created_at=first - timedelta(seconds=1)
+        )
+        self.assertEqual(self.balances(), {'WH-A': 6})
+
+        summary = compact_stock_ledger(until=timezone.now())
+        self.assertEqual((summary['movements'], summary['rows']), (1, 1))
+        self.assertEqual(self.stock(), {'WH-A': 6})
+        self.assertEqual(self.balances(as_of=timezone.now().isoformat()), {'WH-A': 6})
+        self.assertFalse(StockMovement.objects.filter(compacted_at__isnull=True).exists())
+
+    def test_invalid_movements(self):
+        self.assertEqual(self.move('issue', -1).status_code, 400)
+        self.assertEqual(self.move('adjustment', 0).status_code, 400)
+        self.assertEqual(self.move('transfer', 1).status_code, 400)
+        self.assertEqual(self.move('transfer', 1, to_location='WH-A').status_code, 400)
+        self.assertEqual(self.move('receipt', 1, to_location='WH-B').status_code, 400)
+        self.assertFalse(StockMovement.objects.exists())
+        self.assertEqual(self.client.get('/api/product-stock/ledger/').status_code, 400)
+
+
+@task(name='tests.flaky', max_attempts=2)
+def flaky(fail_with):
+    raise {'error': RuntimeError, 'failed': JobFailed}[fail_with]("no luck")
+
+
+@task(name='tests.outlived')
+def outlived():
+    # The worker looks dead to a sweep while this attempt is still running
+    Job.objects.update(heartbeat_at=timezone.now() - timedelta(days=1))
+    requeue_lost_jobs()
+    return 'late'
+
+
+@task(name='tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+
+
+@override_settings(JOB_BROKER='database', API_RESPONSE_CACHE_ENABLED=False)
+class BackgroundJobTests(APITestCase):
+    def setUp(self):
+        self.files = tempfile.TemporaryDirectory()
+        self.addCleanup(self.files.cleanup)
+        self.enterContext(override_settings(JOB_FILE_ROOT=self.files.name))
+        self.user = get_user_model().objects.create_user(username='jobs', email='jobs@example.com', role='manager')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(self.user).access_token}'
+        )
+
+    def run_jobs(self):
+        while (job := claim()) is not None:
+            run_job(job)
+
+    def test_import_is_queued_and_reports_through_the_job(self):
+        upload = SimpleUploadedFile('products.csv', (
+            b'name,unit_price,card_rate,replacement_rate,weight\n'
+            b'Bolt,1.50,1.80,1.40,0.01\nNut,0.20,0.25,0.18,0.01\n,1,1,1,1\n'
+        ))
+        response = self.client.post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Product.objects.exists())
+
+        self.run_jobs()
+        job = self.client.get(f"/api/jobs/{response.data['job_id']}/").data
+        self.assertEqual(job['status'], Job.SUCCEEDED)
+        self.assertEqual((job['result']['created'], job['result']['rejected']), (2, 1))
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(job_storage.listdir('imports')[1], [])
+
+    @override_settings(PRODUCT_IMPORT_CHUNK_SIZE=1)
+    def test_failed_import_attempt_leaves_no_rows_for_the_retry(self):
+        upload = SimpleUploadedFile('products.csv', (
+            b'name,unit_price,card_rate,replacement_rate,weight\n'
+            b'Bolt,1.50,1.80,1.40,0.01\nNut,0.20,0.25,0.18,0.01\n'
+        ))
+        job_id = self.client.post('/api/products/import/', {'file': upload}, format='multipart').data['job_id']
+        validate = importers.validate_product_rows
+
+        def fail_second_chunk(rows, start):
+            # After the first chunk was written
+            if start > 1:
+                raise RuntimeError("connection lost")
+            return validate(rows, start)
+
+        with mock.patch.object(importers, 'validate_product_rows', side_effect=fail_second_chunk):
+            with self.assertLogs('core.jobs', 'WARNING'):
+                run_job(claim())
+        self.assertEqual(Job.objects.get(pk=job_id).status, Job.QUEUED)
+        self.assertFalse(Product.objects.exists())
+
+        Job.objects.filter(pk=job_id).update(run_after=timezone.now())
+        self.run_jobs()
+        self.assertEqual(Job.objects.get(pk=job_id).status, Job.SUCCEEDED)
+        self.assertEqual(sorted(Product.objects.values_list('name', flat=True)), ['Bolt', 'Nut'])
+
+    def test_unsupported_import_is_rejected_up_front(self):
+        upload = SimpleUploadedFile('products.txt', b'name\nBolt\n')
+        response = self.client.post('/api/products/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Job.objects.exists())
+
+    def test_valuation_refresh(self):
+        create_products(3)
+        StockValuationSummary.objects.all().delete()
+        response = self.client.post('/api/product-stock/valuation/')
+        self.assertEqual(response.status_code, 202)
+        self.run_jobs()
+        self.assertEqual(Job.objects.get().result, {'groups': 3})
+        self.assertEqual(StockValuationSummary.objects.count(), 3)
+
+    def test_async_export_produces_a_file(self):
+        create_products(3)
+        response = self.client.get('/api/products/export/', {'export_format': 'csv', 'async': 'true'})
+        self.assertEqual(response.status_code, 202)
+        self.run_jobs()
+        job = self.client.get(f"/api/jobs/{response.data['job_id']}/").data
+        download = self.client.get(job['file_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(len(b''.join(download.streaming_content).splitlines()), 4)
+
+    def test_jobs_are_private(self):
+        job = enqueue('tests.flaky', {'fail_with': 'error'}, user=self.user)
+        other = get_user_model().objects.create_user(username='other', email='other@example.com')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(other).access_token}')
+        self.assertEqual(self.client.get(f'/api/jobs/{job.pk}/').status_code, 404)
+
+    def test_priority_order(self):
+        low = enqueue('tests.flaky', {'fail_with': 'error'}, priority=-10)
+        high = enqueue('tests.flaky', {'fail_with': 'error'}, priority=10)
+        self.assertEqual([claim().pk, claim().pk, claim()], [high.pk, low.pk, None])
+
+    def test_retries_with_backoff_then_fails(self):
+        job = flaky.enqueue(fail_with='error')
+        with self.assertLogs('core.jobs', 'WARNING'):
+            run_job(claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_job(claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIn('RuntimeError: no luck', job.error)
+
+    def test_job_failed_is_not_retried(self):
+        job = flaky.enqueue(fail_with='failed')
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_job(claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), (Job.FAILED, 'no luck'))
+
+    def test_lost_jobs_are_requeued(self):
+        job = flaky.enqueue(fail_with='error')
+        claim()
+        Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(requeue_lost_jobs(), 0)  # long-running, but its heartbeat is fresh
+
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(requeue_lost_jobs(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_outcome_of_a_requeued_attempt_is_dropped(self):
+        job = enqueue('tests.outlived')
+        with self.assertLogs('core.jobs', 'WARNING') as logs:
+            self.assertFalse(run_job(claim()))
+        self.assertIn('requeued as lost', logs.output[0])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (Job.QUEUED, None))
+
+
+@override_settings(JOB_BROKER='database', JOB_HEARTBEAT_INTERVAL=0.05)
+class JobHeartbeatTests(TransactionTestCase):
+    def test_running_job_renews_its_heartbeat(self):
+        job = enqueue('tests.slow', {'seconds': 0.3})
+        claimed = claim()
+        self.assertTrue(run_job(claimed))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertGreater(job.heartbeat_at, claimed.heartbeat_at)
+
+    def test_local_broker_picks_up_orphaned_jobs_on_start(self):
+        # Queued by a process that exited before running it
+        job = Job.objects.create(name='tests.slow', kwargs={'seconds': 0})
+        broker = LocalBroker(1)
+        self.addCleanup(broker.executor.shutdown)
+        self.addCleanup(broker.stop.set)
+        for _ in range(50):
+            job.refresh_from_db()
+            if job.status == Job.SUCCEEDED:
+                break
+            time.sleep(0.05)
+        self.assertEqual(job.status, Job.SUCCEEDED)
@@ -2,8 +2,23 @@ from django.urls import path
 from .views import (
     ProductListCreateView,
     ProductRetrieveUpdateDestroyView,
+    ProductBatchView,
     ProductStockListCreateView,
     ProductStockRetrieveUpdateDestroyView,
+    ProductExportView,
+    ProductStockExportView,
+    ProductStockBulkAdjustView,
+    ProductImportView,
+    LowStockListView,
+    StockValuationView,
+    AsyncProductListView,
+    AsyncProductDetailView,
+    AsyncProductStockListView,
+    AsyncProductStockDetailView,
+    ProductChangesView,
+    ProductStockChangesView,
+    StockMovementListCreateView,
+    StockLedgerView,
 )
 
 app_name = 'inventory'
@@ -12,8 +27,33 @@ urlpatterns = [
     # Product APIs
     path('products/', ProductListCreateView.as_view(), name='product-list-create'),
     path('products/<int:pk>/', ProductRetrieveUpdateDestroyView.as_view(), name='product-detail'),
+    path('products/batch/', ProductBatchView.as_view(), name='product-batch'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
 
     # Product Stock APIs
     path('product-stock/', ProductStockListCreateView.as_view(), name='product-stock-list-create'),
     path('product-stock/<int:pk>/', ProductStockRetrieveUpdateDestroyView.as_view(), name='product-stock-detail'),
+    path('product-stock/bulk/', ProductStockBulkAdjustView.as_view(), name='product-stock-bulk'),
+
+    # Stock summaries
+    path('product-stock/low/', LowStockListView.as_view(), name='product-stock-low'),
+    path('product-stock/valuation/', StockValuationView.as_view(), name='product-stock-valuation'),
+
+    # Stock ledger: movements and balances now or as of a moment
+    path('stock-movements/', StockMovementListCreateView.as_view(), name='stock-movement-list-create'),
+    path('product-stock/ledger/', StockLedgerView.as_view(), name='product-stock-ledger'),
+
+    # Incremental sync: changes and deletions since a watermark
+    path('products/changes/', ProductChangesView.as_view(), name='product-changes'),
+    path('product-stock/changes/', ProductStockChangesView.as_view(), name='product-stock-changes'),
+
+    # Bulk export APIs (NDJSON / CSV streams)
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('product-stock/export/', ProductStockExportView.as_view(), name='product-stock-export'),
+
+    # Async (ASGI-native) read APIs
+    path('async/products/', AsyncProductListView.as_view(), name='async-product-list'),
+    path('async/products/<int:pk>/', AsyncProductDetailView.as_view(), name='async-product-detail'),
+    path('async/product-stock/', AsyncProductStockListView.as_view(), name='async-product-stock-list'),
+    path('async/product-stock/<int:pk>/', AsyncProductStockDetailView.as_view(), name='async-product-stock-detail'),
 ]
@@ -0,0 +1,198 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.cache import bump_resource_version
+from core.querycount import allow_repeated_queries
+from .models import VALUATION_FIELDS, Product, ProductStock, StockValuationSummary
+
+SUMMARY_FIELDS = (
+    'sku_count', 'total_quantity', 'stock_value', 'card_value', 'replacement_value', 'total_weight'
+)
+MONEY_FIELDS = ('stock_value', 'card_value', 'replacement_value', 'total_weight')
+ZERO = Decimal('0')
+CENT = Decimal('0.01')
+
+
+def _contribution(quantity, product, sign=1):
+    """What one stock row adds to its (location, category) summary row."""
+    quantity = sign * quantity
+    return [
+        sign,
+        quantity,
+        quantity * product['unit_price'],
+        quantity * product['card_rate'],
+        quantity * product['replacement_rate'],
+        quantity * product['weight'],
+    ]
+
+
+def _group(location, product):
+    return (location, product['category'] or '')
+
+
+def _add(changes, key, contribution):
+    totals = changes.setdefault(key, [0, 0, ZERO, ZERO, ZERO, ZERO])
+    for i, amount in enumerate(contribution):
+        totals[i] += amount
+
+
+def _product_values(product_ids):
+    return {
+        row['id']: row
+        for row in Product.objects.filter(id__in=product_ids).values('id', *VALUATION_FIELDS)
+    }
+
+
+def adjust_valuation(changes):
+    """
+    Add ``{(location, category): [sku, quantity, stock, card, replacement, weight]}``
+    to the summary with one atomic ``F()`` update per group.
+
+    Groups are written in sorted order so concurrent writers touching the
+    same groups lock them in the same order and cannot deadlock.
+    """
+    with allow_repeated_queries():  # get_or_create reads each new group once
+        for (location, category) in sorted(changes):
+            deltas = changes[(location, category)]
+            if not any(deltas):
+                continue
+            updates = {field: F(field) + delta for field, delta in zip(SUMMARY_FIELDS, deltas)}
+            updated = StockValuationSummary.objects.filter(location=location, category=category).update(**updates)
+            if not updated:
+                StockValuationSummary.objects.get_or_create(location=location, category=category)
+                StockValuationSummary.objects.filter(location=location, category=category).update(**updates)
+    if changes:
+        transaction.on_commit(lambda: bump_resource_version('stock-valuation'))
+
+
+def record_stock_change(old, new):
+    """
+    Move one stock row's contribution from ``old`` to ``new``, each a
+    ``(product_id, location, quantity)`` tuple or ``None`` (insert/delete).
+    """
+    if old == new:
+        return
+    products = _product_values({state[0] for state in (old, new) if state})
+    changes = {}
+    for state, sign in ((old, -1), (new, 1)):
+        if state and state[0] in products:
+            product = products[state[0]]
+            _add(changes, _group(state[1], product), _contribution(state[2], product, sign))
+    adjust_valuation(changes)
+
+
+def record_product_change(product_id, old, new):
+    """Re-value a product's stock after its prices, weight or category changed."""
+    if old == new:
+        return
+    changes = {}
+    for location, quantity in ProductStock.objects.filter(product_id=product_id).values_list('location', 'quantity'):
+        if old is not None:
+            _add(changes, _group(location, old), _contribution(quantity, old, -1))
+        if new is not None:
+            _add(changes, _group(location, new), _contribution(quantity, new))
+    adjust_valuation(changes)
+
+
+def record_stock_deltas(deltas, created_keys=()):
+    """
+    Account for a bulk ``{(product_id, location): delta}`` adjustment;
+    ``created_keys`` are the rows the batch inserted.
+    """
+    products = _product_values({product_id for product_id, _ in deltas})
+    created_keys = set(created_keys)
+    changes = {}
+    for (product_id, location), delta in deltas.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        contribution = _contribution(delta, product)
+        contribution[0] = 1 if (product_id, location) in created_keys else 0
+        _add(changes, _group(location, product), contribution)
+    adjust_valuation(changes)
+
+
+def live_valuation(queryset=None):
+    """Per (location, category) totals aggregated from the stock table in one query."""
+    queryset = ProductStock.objects.all() if queryset is None else queryset
+    money = DecimalField(max_digits=20, decimal_places=2)
+
+    def value_of(field):
+        return Coalesce(
+            Sum(ExpressionWrapper(F('quantity') * F(f'product__{field}'), output_field=money)),
+            Value(ZERO, output_field=money),
+        )
+
+    return (
+        queryset.order_by()
+        .annotate(group_category=Coalesce('product__category', Value('')))
+        .values('location', 'group_category')
+        .annotate(
+            sku_count=Count('id'),
+            total_quantity=Coalesce(Sum('quantity'), 0),
+            stock_value=value_of('unit_price'),
+            card_value=value_of('card_rate'),
+            replacement_value=value_of('replacement_rate'),
+            total_weight=value_of('weight'),
+        )
+    )
+
+
+@transaction.atomic
+def rebuild_valuation_summary():
+    """
+    Recompute the whole summary from the stock table (repairs drift after
+    writes that bypass the signals, such as ``QuerySet.update()``).
+
+    The existing summary rows are locked first, so stock writers in flight
+    either finish before the aggregate runs or apply their delta on top of
+    the rebuilt totals afterwards.
+    """
+    existing = {
+        (row.location, row.category): row
+        for row in StockValuationSummary.objects.select_for_update()
+    }
+    now = timezone.now()
+    to_create, to_update = [], []
+    for row in live_valuation():
+        key = (row['location'], row['group_category'])
+        summary = existing.pop(key, None)
+        if summary is None:
+            summary = StockValuationSummary(location=key[0], category=key[1])
+            to_create.append(summary)
+        else:
+            to_update.append(summary)
+        for field in SUMMARY_FIELDS:
+            setattr(summary, field, row[field])
+        summary.updated_at = now
+
+    StockValuationSummary.objects.bulk_create(to_create)
+    StockValuationSummary.objects.bulk_update(to_update, list(SUMMARY_FIELDS) + ['updated_at'])
+    StockValuationSummary.objects.filter(id__in=[row.id for row in existing.values()]).delete()
+    transaction.on_commit(lambda: bump_resource_version('stock-valuation'))
+    return len(to_create) + len(to_update)
+
+
+def summarize(rows, group_by=('location', 'category')):
+    """
+    Roll per (location, category) rows up to ``group_by`` (a subset of
+    ``('location', 'category')``) and return ``(groups, totals)``, with
+    money and weight as two-decimal strings like the serializers emit.
+    """
+    groups = {}
+    totals = dict.fromkeys(SUMMARY_FIELDS, 0)
+    for row in rows:
+        key = tuple(row[field] for field in group_by)
+        group = groups.setdefault(key, {**dict(zip(group_by, key)), **dict.fromkeys(SUMMARY_FIELDS, 0)})
+        for field in SUMMARY_FIELDS:
+            group[field] += row[field]
+            totals[field] += row[field]
+    groups = [groups[key] for key in sorted(groups)]
+    for entry in groups + [totals]:
+        for field in MONEY_FIELDS:
+            entry[field] = str(Decimal(entry[field]).quantize(CENT))
+    return groups, totals
@@ -1,26 +1,410 @@
+import uuid
+
+from django.conf import settings
+from django.db.models import ProtectedError
 from django.shortcuts import render
-from rest_framework import generics
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from .models import Product,ProductStock
-from .serializers import ProductSerializer,ProductStockSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.async_views import AsyncDetailView, AsyncKeysetListView
+from core.batch import BatchRetrieveView
+from core.cache import CachedResponseMixin
+from core.changefeed import ChangeFeedView
+from core.exports import StreamingExportView
+from core.filters import FullTextSearchFilter, QueryParamFilterBackend, StableOrderingFilter
+from core.jobs import job_accepted, job_storage
+from core.permissions import RolePermission
+from core.sparse import SideloadedListMixin
+from .bulk import apply_stock_deltas, validate_stock_deltas
+from .importers import ImportFormatError, iter_product_rows
+from .ledger import ledger_quantities, post_movement
+from .models import Product,ProductStock,StockMovement,StockValuationSummary
+from .serializers import LowStockSerializer,ProductSerializer,ProductStockSerializer,StockMovementSerializer
+from .tasks import import_product_file, refresh_valuation_summary
+from .valuation import SUMMARY_FIELDS, live_valuation, summarize
 # Create your views here.
-class ProductListCreateView(generics.ListCreateAPIView):
-    queryset = Product.objects.all().order_by('id')
+class ProductListCreateView(CachedResponseMixin, generics.ListCreateAPIView):
+    queryset = Product.objects.defer('search_vector').order_by('id')
     serializer_class = ProductSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'product'
+    filter_backends = [QueryParamFilterBackend, FullTextSearchFilter, StableOrderingFilter]
+    query_filters = {
+        'category': 'category',
+        'min_price': 'unit_price__gte',
+        'max_price': 'unit_price__lte',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lte',
+        'updated_after': 'updated_at__gte',
+    }
+    search_fallback_fields = ('name', 'description')
+    ordering_fields = ('id', 'name', 'unit_price', 'created_at', 'updated_at')
 
-class ProductRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'product'
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            # Deal line items keep their product (on_delete=PROTECT)
+            return Response(
+                {"error": "This product is on deal line items and cannot be deleted."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+
+class ProductBatchView(BatchRetrieveView):
+    """Products by id: ``?ids=1,2,3`` or POST ``{"ids": [...]}`` (see ``BatchRetrieveView``)."""
+    queryset = Product.objects.defer('search_vector')
+    serializer_class = ProductSerializer
+    cache_namespace = 'product'
+
+
+class ProductImportView(APIView):
+    """
+    Create or update products from an uploaded ``.csv`` / ``.xlsx`` file.
+
+    The multipart ``file`` is stored and imported by a background job
+    (``inventory.tasks.import_product_file``): the response is a 202 with the
+    job id, and the job result summarises created, updated and rejected rows.
+    The import reads the file row by row and writes it in chunks with
+    ``bulk_create(update_conflicts=True)``.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    required_permissions = {'POST': ['inventory.add_product', 'inventory.change_product']}
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {"error": "Upload a .csv or .xlsx file in the 'file' field."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            iter_product_rows(upload, upload.name)  # rejects unsupported file types up front
+        except ImportFormatError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        path = job_storage.save(f'imports/{uuid.uuid4().hex}-{upload.name}', upload)
+        job = import_product_file.enqueue(user=request.user, path=path, filename=upload.name)
+        return job_accepted(request, job)
 
 # Product Stock Views
-class ProductStockListCreateView(generics.ListCreateAPIView):
-    queryset = ProductStock.objects.select_related('product').all().order_by('id')
+PRODUCT_FIELDS = (
+    'id', 'name', 'category', 'unit_price', 'card_rate',
+    'replacement_rate', 'weight', 'description', 'created_at', 'updated_at'
+)
+
+class ProductStockListCreateView(CachedResponseMixin, SideloadedListMixin, generics.ListCreateAPIView):
+    """
+    Stock rows with the product nested in each row, trimmed with
+    ``?fields=id,quantity,product.name``. ``?normalize=true`` instead returns
+    ``product_id`` per row and each product once in a ``products`` side table.
+    """
+    # The search vector is never serialized; it is the widest product column
+    queryset = ProductStock.objects.select_related('product').defer('product__search_vector').order_by('id')
     serializer_class = ProductStockSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsAuthenticated, RolePermission]
+    # Stock payloads embed the product, so product writes invalidate them too
+    cache_namespace = 'product-stock'
+    cache_depends_on = ('product',)
+    filter_backends = [QueryParamFilterBackend, FullTextSearchFilter, StableOrderingFilter]
+    query_filters = {
+        'product': 'product',
+        'location': 'location',
+        'category': 'product__category',
+        'quantity_below': 'quantity__lt',
+        'min_quantity': 'quantity__gte',
+        'updated_after': 'last_updated__gte',
+    }
+    search_vector_field = 'product__search_vector'
+    search_fallback_fields = ('product__name', 'location')
+    ordering_fields = ('id', 'location', 'quantity', 'last_updated')
+    sideload_relation = 'product'
+    sideload_key = 'products'
+    values_fields = ('id', 'product_id', 'location', 'quantity', 'last_updated')
+    sideload_fields = PRODUCT_FIELDS
 
-class ProductStockRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ProductStockRetrieveUpdateDestroyView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ProductStock.objects.all()
     serializer_class = ProductStockSerializer
-    permission_classes = [IsAuthenticated]
\ No newline at end of file
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'product-stock'
+    cache_depends_on = ('product',)
+
+class ProductStockBulkAdjustView(APIView):
+    """
+    Apply many ``(product_id, location, delta)`` stock changes in one request.
+
+    Accepts ``{"items": [...]}`` or a bare list. Valid rows are summed per
+    ``(product, location)`` and applied in a single transaction; invalid rows
+    are reported by index and skipped.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    required_permissions = {'POST': ['inventory.change_productstock']}
+
+    def post(self, request):
+        rows = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {"error": "Expected a non-empty list of items."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_rows = getattr(settings, 'STOCK_BULK_MAX_ROWS', 20000)
+        if len(rows) > max_rows:
+            return Response(
+                {"error": f"Too many items; the limit is {max_rows} per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        deltas, errors = validate_stock_deltas(rows)
+        if not deltas:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        created, updated = apply_stock_deltas(deltas)
+        return Response({
+            "received": len(rows),
+            "applied": len(rows) - len(errors),
+            "created": created,
+            "updated": updated,
+            "errors": errors,
+        }, status=status.HTTP_200_OK)
+
+
+# Stock summary views
+class LowStockListView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Stock rows at or below ``?threshold=`` (default ``LOW_STOCK_THRESHOLD``),
+    lowest quantity first, served from the quantity index.
+    """
+    queryset = ProductStock.objects.select_related('product').only(
+        'id', 'product_id', 'product__name', 'product__category', 'location', 'quantity', 'last_updated'
+    )
+    serializer_class = LowStockSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    cache_namespace = 'product-stock'
+    cache_depends_on = ('product',)
+    filter_backends = [QueryParamFilterBackend, StableOrderingFilter]
+    query_filters = {
+        'product': 'product',
+        'location': 'location',
+        'category': 'product__category',
+    }
+    ordering = ('quantity', 'id')
+    ordering_fields = ('quantity', 'location', 'last_updated')
+
+    def get_queryset(self):
+        threshold = self.request.query_params.get('threshold', settings.LOW_STOCK_THRESHOLD)
+        try:
+            threshold = int(threshold)
+        except (TypeError, ValueError):
+            raise ValidationError({"threshold": ["A valid integer is required."]})
+        return super().get_queryset().filter(quantity__lte=threshold)
+
+class StockValuationView(APIView):
+    """
+    Stock quantity, value (at unit price, card rate and replacement rate)
+    and weight per location and/or category.
+
+    Reads the precomputed ``StockValuationSummary`` rows, so the cost does
+    not grow with the stock table. ``?group_by=location``, ``category`` or
+    ``location,category`` (default) picks the breakdown; ``?location=`` and
+    ``?category=`` narrow it; ``?live=true`` aggregates the stock table
+    instead (slow on large inventories, useful to check the summary).
+
+    ``POST`` queues a rebuild of the summary from the stock table
+    (``inventory.tasks.refresh_valuation_summary``) and returns its job id.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    permission_model = ProductStock
+    required_permissions = {'POST': ['inventory.change_stockvaluationsummary']}
+    group_by_choices = ('location', 'category')
+
+    def get(self, request):
+        group_by = tuple(
+            part.strip() for part in request.query_params.get('group_by', 'location,category').split(',') if part.strip()
+        )
+        if not group_by or not set(group_by) <= set(self.group_by_choices):
+            return Response(
+                {"error": "group_by must be 'location', 'category' or 'location,category'."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        location = request.query_params.get('location')
+        category = request.query_params.get('category')
+        live = request.query_params.get('live', '').lower() in ('1', 'true', 'yes')
+
+        if live:
+            stock = ProductStock.objects.all()
+            if location is not None:
+                stock = stock.filter(location=location)
+            if category is not None:
+                stock = stock.filter(product__category=category) if category else stock.filter(product__category__isnull=True)
+            rows = [
+                {**row, 'category': row['group_category']}
+                for row in live_valuation(stock)
+            ]
+            updated_at = None
+        else:
+            summary = StockValuationSummary.objects.all()
+            if location is not None:
+                summary = summary.filter(location=location)
+            if category is not None:
+                summary = summary.filter(category=category)
+            rows = list(summary.values('location', 'category', 'updated_at', *SUMMARY_FIELDS))
+            updated_at = max((row['updated_at'] for row in rows), default=None)
+
+        groups, totals = summarize(rows, group_by)
+        return Response({
+            "group_by": list(group_by),
+            "live": live,
+            "updated_at": updated_at,
+            "totals": totals,
+            "groups": groups,
+        }, status=status.HTTP_200_OK)
+
+    def post(self, request):
+        return job_accepted(request, refresh_valuation_summary.enqueue(user=request.user))
+
+
+# Stock ledger views (see inventory.ledger)
+class StockMovementListCreateView(generics.ListCreateAPIView):
+    """
+    The append-only stock ledger. ``POST`` records a receipt, issue,
+    transfer (two rows) or adjustment; it is counted by the ledger view at
+    once and lands in ``/api/product-stock/`` at the next compaction.
+    """
+    queryset = StockMovement.objects.order_by('id')
+    serializer_class = StockMovementSerializer
+    permission_classes = [IsAuthenticated, RolePermission]
+    filter_backends = [QueryParamFilterBackend, StableOrderingFilter]
+    query_filters = {
+        'product': 'product',
+        'location': 'location',
+        'kind': 'kind',
+        'reference': 'reference',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+    }
+    ordering_fields = ('id',)
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        movements = post_movement(user=request.user, **serializer.validated_data)
+        return Response(self.get_serializer(movements, many=True).data, status=status.HTTP_201_CREATED)
+
+class StockLedgerView(APIView):
+    """
+    Ledger stock per ``(product, location)`` for ``?product=`` and/or
+    ``?location=``, now or ``?as_of=`` a past moment (ISO 8601). Reads the
+    nearest snapshot and the movements after it, never the whole history.
+    """
+    permission_classes = [IsAuthenticated, RolePermission]
+    permission_model = StockMovement
+
+    def get(self, request):
+        params = request.query_params
+        product_id = params.get('product')
+        location = params.get('location')
+        if not product_id and not location:
+            return Response(
+                {"error": "Filter by product and/or location."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if product_id:
+            try:
+                product_id = int(product_id)
+            except ValueError:
+                return Response({"error": "product must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        as_of = params.get('as_of')
+        if as_of:
+            as_of = parse_datetime(as_of)
+            if as_of is None:
+                return Response({"error": "as_of must be an ISO 8601 datetime."}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(as_of):
+                as_of = timezone.make_aware(as_of)
+
+        compacted_until, quantities = ledger_quantities(as_of or None, product_id or None, location or None)
+        return Response({
+            "as_of": as_of or None,
+            "compacted_until": compacted_until,
+            "results": [
+                {"product_id": key[0], "location": key[1], "quantity": quantities[key]}
+                for key in sorted(quantities)
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+# Bulk export views (streamed, no serializer per row)
+class ProductExportView(StreamingExportView):
+    queryset = Product.objects.order_by('id')
+    export_fields = (
+        'id', 'name', 'category', 'unit_price', 'card_rate',
+        'replacement_rate', 'weight', 'description', 'created_at', 'updated_at'
+    )
+    export_filename = 'products'
+
+class ProductStockExportView(StreamingExportView):
+    queryset = ProductStock.objects.order_by('id')
+    export_fields = (
+        'id', 'product_id', 'product__name', 'location', 'quantity', 'last_updated'
+    )
+    export_filename = 'product_stock'
+
+
+# Async (ASGI-native) read views
+STOCK_FIELDS = ('id', 'location', 'quantity', 'last_updated') + tuple(
+    f'product__{field}' for field in PRODUCT_FIELDS
+)
+
+
+def nest_stock_product(row):
+    """Reshape a flat ``.values()`` stock row into ``{..., "product": {...}}``."""
+    product = {field: row.pop(f'product__{field}') for field in PRODUCT_FIELDS}
+    row['product'] = product
+    return row
+
+
+class AsyncProductListView(AsyncKeysetListView):
+    queryset = Product.objects.all()
+    fields = PRODUCT_FIELDS
+
+class AsyncProductDetailView(AsyncDetailView):
+    queryset = Product.objects.all()
+    fields = PRODUCT_FIELDS
+
+class AsyncProductStockListView(AsyncKeysetListView):
+    queryset = ProductStock.objects.all()
+    fields = STOCK_FIELDS
+
+    def to_representation(self, row):
+        return nest_stock_product(row)
+
+class AsyncProductStockDetailView(AsyncDetailView):
+    queryset = ProductStock.objects.all()
+    fields = STOCK_FIELDS
+
+    def to_representation(self, row):
+        return nest_stock_product(row)
+
+
+class ProductChangesView(ChangeFeedView):
+    """Products changed or deleted since ``?since=`` (see ``ChangeFeedView``)."""
+    queryset = Product.objects.all()
+    resource = 'product'
+    feed_fields = PRODUCT_FIELDS
+
+
+class ProductStockChangesView(ChangeFeedView):
+    """Stock rows changed or deleted since ``?since=``; rows carry ``product_id``."""
+    queryset = ProductStock.objects.all()
+    resource = 'product-stock'
+    timestamp_field = 'last_updated'
+    feed_fields = ('product_id', 'location', 'quantity', 'last_updated')
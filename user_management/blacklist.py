@@ -0,0 +1,163 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from core.cache import bump_resource_version, get_resource_versions
+
+logger = logging.getLogger(__name__)
+
+VERSION_NAMESPACE = 'token-blacklist'
+# Rows committed late can carry a blacklisted_at slightly before the last
+# catch-up; re-reading this window makes sure they are not missed.
+CATCH_UP_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistedJTICache:
+    """
+    Per-process Bloom filter of the JTIs of unexpired blacklisted tokens.
+
+    A JTI the filter has never seen is definitely not blacklisted, so most
+    refresh checks skip the table; a hit is confirmed against the table as
+    before. Every blacklisting bumps a version in the shared cache, and a
+    process that sees a new version (or has not synced for
+    ``JWT_BLACKLIST_SYNC_INTERVAL`` seconds) first reads the rows
+    blacklisted since its last sync. The filter is rebuilt from scratch
+    every ``JWT_BLACKLIST_REBUILD_INTERVAL`` seconds, which drops expired
+    tokens, or when it outgrows its capacity.
+
+    Rebuilds run in a background thread and swap the new filter in when it
+    is complete; requests keep using the old one meanwhile (it never misses
+    a JTI, it only grows less precise). Until the first filter is built,
+    every check goes to the table.
+
+    Other processes only see a new blacklisting through the version bump,
+    so run several processes with this cache only on a shared (Redis)
+    cache; with per-process caches the sync interval is the exposure window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._count = 0
+        self._version = None
+        self._synced_at = None
+        self._checked_at = 0.0
+        self._built_at = 0.0
+        self._rebuilding = False
+
+    def rebuild(self):
+        """Build a filter from the table and swap it in."""
+        now = timezone.now()
+        bloom = BloomFilter(settings.JWT_BLACKLIST_BLOOM_CAPACITY, settings.JWT_BLACKLIST_BLOOM_ERROR_RATE)
+        count = 0
+        jtis = BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list('token__jti', flat=True)
+        for jti in jtis.iterator(chunk_size=10000):
+            bloom.add(jti)
+            count += 1
+        with self._lock:
+            self._filter, self._count, self._synced_at = bloom, count, now
+            self._built_at = time.monotonic()
+            # Catch up on whatever was blacklisted while the filter was built
+            self._version = None
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Rebuilding the token blacklist filter failed")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+            connection.close()
+
+    def _start_rebuild(self):
+        # Called with the lock held
+        if not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, name='jti-bloom-rebuild', daemon=True).start()
+
+    def _catch_up(self, now):
+        jtis = BlacklistedToken.objects.filter(
+            blacklisted_at__gte=self._synced_at - CATCH_UP_OVERLAP
+        ).values_list('token__jti', flat=True)
+        for jti in jtis:
+            self._add(jti)
+        self._synced_at = now
+
+    def _add(self, jti):
+        # Count only JTIs not seen yet: the catch-up window re-reads rows it
+        # already added, and counting them again would force early rebuilds
+        if jti not in self._filter:
+            self._filter.add(jti)
+            self._count += 1
+
+    def might_contain(self, jti):
+        version = get_resource_versions([VERSION_NAMESPACE])[0]
+        monotonic = time.monotonic()
+        with self._lock:
+            if (
+                self._filter is None
+                or self._count > settings.JWT_BLACKLIST_BLOOM_CAPACITY
+                or monotonic - self._built_at > settings.JWT_BLACKLIST_REBUILD_INTERVAL
+            ):
+                self._start_rebuild()
+            if self._filter is None:
+                return True
+            if version != self._version or monotonic - self._checked_at > settings.JWT_BLACKLIST_SYNC_INTERVAL:
+                self._catch_up(timezone.now())
+            self._version = version
+            self._checked_at = monotonic
+            return jti in self._filter
+
+    def add(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._add(jti)
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+
+
+jti_cache = BlacklistedJTICache()
+
+
+def blacklist_cache_enabled():
+    return getattr(settings, 'JWT_BLACKLIST_CACHE', False)
+
+
+def notify_blacklisted(jti):
+    """Record a new blacklisting locally and tell the other processes to catch up."""
+    jti_cache.add(jti)
+    bump_resource_version(VERSION_NAMESPACE)
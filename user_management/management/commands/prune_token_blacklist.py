@@ -0,0 +1,62 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding and blacklisted refresh tokens in small "
+        "batches, so the tables never get a long lock or a huge transaction. "
+        "Safe to run while serving; schedule it (e.g. hourly cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows deleted per transaction.")
+        parser.add_argument('--grace-hours', type=float, default=0,
+                            help="Keep tokens for this long after they expire.")
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help="Pause between batches (seconds) to leave room for other writers.")
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help="Stop after this many batches (0 = until done).")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Only count the expired rows.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(
+                f"{expired.count()} expired outstanding tokens, "
+                f"{BlacklistedToken.objects.filter(token__expires_at__lte=cutoff).count()} of them blacklisted."
+            )
+            return
+
+        batches = outstanding = blacklisted = 0
+        started = time.perf_counter()
+        while True:
+            # Walks the expires_at index; only ids are read
+            ids = list(expired.order_by('expires_at').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                # Children first; parents are then deleted by id without loading the token text
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).only('id').delete()[0]
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f"batch {batches}: {len(ids)} tokens")
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {outstanding} outstanding and {blacklisted} blacklisted tokens "
+            f"in {batches} batches ({time.perf_counter() - started:.1f}s)."
+        ))
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# The token_blacklist app's tables have no index on expires_at or
+# blacklisted_at; pruning and the blacklist cache's catch-up filter on them.
+INDEXES = [
+    ('token_blacklist_outstanding_expires_idx', 'token_blacklist_outstandingtoken', 'expires_at'),
+    ('token_blacklist_blacklisted_at_idx', 'token_blacklist_blacklistedtoken', 'blacklisted_at'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, table, column in INDEXES:
+        schema_editor.execute(f'CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({column})')
+
+
+def drop_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, _table, _column in INDEXES:
+        schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('user_management', '0001_initial'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
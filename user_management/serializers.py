@@ -2,6 +2,8 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
+from core.passwords import check_user_password, set_user_password
+from core.permissions import get_catalogue
 
 User = get_user_model()
 
@@ -35,7 +37,7 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         password = validated_data.pop("password")
         user = User(**validated_data)
-        user.set_password(password)
+        set_user_password(user, password)
         user.save()
         return user
 
@@ -44,7 +46,7 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         if password:
-            instance.set_password(password)
+            set_user_password(instance, password)
         instance.save()
         return instance
 
@@ -62,12 +64,13 @@ class RegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username", "email", "first_name", "last_name", "role", "password")
-        read_only_fields = ("id",)
+        # Self-registered users always start with the default (least privileged) role
+        read_only_fields = ("id", "role")
 
     def create(self, validated_data):
         password = validated_data.pop("password")
         user = User(**validated_data)
-        user.set_password(password)
+        set_user_password(user, password)
         user.save()
         return user
 
@@ -100,7 +103,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username", "email", "first_name", "last_name", "role")
-        read_only_fields = ("id", "username",)
+        # Users cannot change their own role
+        read_only_fields = ("id", "username", "role")
 
     def update(self, instance, validated_data):
         # Prevent changing username via this serializer
@@ -109,16 +113,18 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
 
 class UserPermissionsSerializer(serializers.Serializer):
-    """Return a summary of a user's permission-related attributes."""
-    is_superuser = serializers.BooleanField(source='is_superuser')
-    is_staff = serializers.BooleanField(source='is_staff')
+    """
+    Return a summary of a user's permission-related attributes. The
+    permission names come from the ``mask`` in the context (see
+    ``core.permissions``), role permissions included.
+    """
+    is_superuser = serializers.BooleanField()
+    is_staff = serializers.BooleanField()
+    role = serializers.CharField(allow_null=True)
     permissions = serializers.SerializerMethodField()
 
     def get_permissions(self, obj):
-        try:
-            return sorted(list(obj.get_all_permissions()))
-        except Exception:
-            return []
+        return get_catalogue().names_in(self.context['mask'])
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -129,7 +135,7 @@ class ChangePasswordSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         request = self.context.get('request')
-        user = getattr(request, 'user', None)
+        user = self.context.get('user', getattr(request, 'user', None))
         old = attrs.get('old_password')
         new = attrs.get('new_password')
         confirm = attrs.get('confirm_password')
@@ -137,7 +143,7 @@ class ChangePasswordSerializer(serializers.Serializer):
         if user is None:
             raise serializers.ValidationError('User is required in context for password change')
 
-        if not user.check_password(old):
+        if not check_user_password(user, old):
             raise serializers.ValidationError({'old_password': 'Old password is not correct'})
 
         if new != confirm:
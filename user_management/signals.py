@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from core.middleware import invalidate_cached_user
+from core.permissions import clear_permission_catalogue, invalidate_permissions
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_auth_cache(sender, instance, **kwargs):
+    """Drop cached auth state so saves (e.g. deactivation) apply on the next request."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_grants(sender, instance, action, reverse, pk_set, **kwargs):
+    """A user gained or lost permissions or groups (from either side of the relation)."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_permissions(instance.pk)
+    elif pk_set is None:
+        invalidate_permissions()
+    else:
+        for user_id in pk_set:
+            invalidate_permissions(user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_grants(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_permissions()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=User)
+def invalidate_deleted_grants(sender, instance, **kwargs):
+    # Deletes cascade through the m2m tables without m2m_changed
+    invalidate_permissions(instance.pk if sender is User else None)
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_migrate)
+def reload_permission_catalogue(sender, **kwargs):
+    clear_permission_catalogue()
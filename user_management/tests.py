@@ -1,3 +1,187 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.passwords import _get_pool
+from core.permissions import get_catalogue, permission_mask
+from core.throttling import LocalBucketStore, ScopedTokenBucketThrottle
+from core.testing import QueryBudgetTestCase
+from inventory.models import Product
+from inventory.tests import create_products
+
+from .blacklist import BlacklistedJTICache
+from .tokens import ClaimsRefreshToken
+
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Query counts of the account endpoints must not grow with the number of
+    permissions and groups a user has.
+    """
+
+    def seed(self, count):
+        granted = self.user.user_permissions.count()
+        permissions = list(Permission.objects.order_by('id')[granted:granted + count])
+        self.user.user_permissions.add(*permissions)
+        group = Group.objects.create(name=f'group-{Group.objects.count()}')
+        group.permissions.add(*permissions)
+        self.user.groups.add(group)
+
+    def test_profile(self):
+        self.assertQueryBudget(1, 'GET', '/api/profile/')
+
+    def test_permissions(self):
+        # Answered from the token's permission bitmask
+        self.assertQueryBudget(0, 'GET', '/api/permissions/')
+
+    def test_login(self):
+        # User, outstanding token, and the user's grants for the bitmask
+        # (seeding changes them, so they are never cached here)
+        credentials = {'username': self.user.username, 'password': self.password}
+        self.assertQueryBudget(3, 'POST', '/api/login/', credentials)
+
+
+@override_settings(API_RESPONSE_CACHE_ENABLED=False)
+class RolePermissionTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username='clerk', email='clerk@example.com', password='Clerk-pass-1', role='employee'
+        )
+        self.authenticate()
+
+    def authenticate(self):
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_role_permissions_apply_per_method(self):
+        product = create_products(1)[0]
+        self.assertEqual(self.client.get('/api/products/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/async/products/{product.pk}/').status_code, 200)
+        self.assertEqual(self.client.delete(f'/api/products/{product.pk}/').status_code, 403)
+        self.assertTrue(Product.objects.filter(pk=product.pk).exists())
+
+    def test_group_grant_reaches_new_tokens(self):
+        group = Group.objects.create(name='catalogue')
+        self.user.groups.add(group)
+        self.assertEqual(self.client.post('/api/products/', {'name': 'Widget'}).status_code, 403)
+
+        group.permissions.add(Permission.objects.get(codename='add_product'))
+        self.assertEqual(self.client.post('/api/products/', {'name': 'Widget'}).status_code, 403)
+        self.authenticate()
+        response = self.client.get('/api/permissions/')
+        self.assertIn('inventory.add_product', response.data['permissions'])
+        self.assertNotIn('inventory.delete_product', response.data['permissions'])
+
+    def test_deactivation_applies_to_live_tokens_by_default(self):
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/profile/').status_code, 401)
+
+        # Claims-only authentication is opt-in and trusts the token until it expires
+        with override_settings(JWT_AUTH_USER_MODE='token'):
+            self.assertEqual(self.client.get('/api/permissions/').status_code, 200)
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_self_registered_users_cannot_pick_their_role(self):
+        product = create_products(1)[0]
+        self.client.credentials()
+        response = self.client.post('/api/register/', {
+            'username': 'newcomer', 'email': 'newcomer@example.com', 'password': 'Newcomer-pass-1', 'role': 'admin',
+        })
+        self.assertEqual(response.status_code, 201)
+        newcomer = get_user_model().objects.get(username='newcomer')
+        self.assertEqual(newcomer.role, 'employee')
+
+        token = ClaimsRefreshToken.for_user(newcomer).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(self.client.patch('/api/profile/', {'role': 'admin'}).data['role'], 'employee')
+        self.assertEqual(self.client.delete(f'/api/products/{product.pk}/').status_code, 403)
+
+    def test_inactive_and_superuser_masks(self):
+        self.assertEqual(permission_mask(get_user_model()(is_active=False, is_superuser=True)), 0)
+        admin = get_user_model()(id=self.user.pk, is_superuser=True)
+        self.assertEqual(permission_mask(admin), get_catalogue().all)
+
+
+class TokenBucketThrottleTests(APITestCase):
+    def test_bucket_refills_at_the_rate(self):
+        store = LocalBucketStore()
+        self.assertEqual([store.consume('k', 2, 1.0, 100.0)[0] for _ in range(3)], [True, True, False])
+        self.assertEqual(store.consume('k', 2, 1.0, 100.0), (False, 1.0))
+        self.assertEqual(store.consume('k', 2, 1.0, 100.5), (False, 0.5))
+        self.assertTrue(store.consume('k', 2, 1.0, 101.0)[0])
+
+    def test_login_scope_returns_429(self):
+        rates = dict(ScopedTokenBucketThrottle.THROTTLE_RATES, login='2/min')
+        credentials = {'username': 'nobody', 'password': 'wrong'}
+        with mock.patch.object(ScopedTokenBucketThrottle, 'THROTTLE_RATES', rates), \
+                mock.patch.object(ScopedTokenBucketThrottle, 'timer', mock.Mock(return_value=1000.0)), \
+                mock.patch('core.throttling._local_store', LocalBucketStore()):
+            codes = [self.client.post('/api/login/', credentials).status_code for _ in range(3)]
+            self.assertNotIn(429, codes[:2])
+            self.assertEqual(codes[2], 429)
+            response = self.client.post('/api/login/', credentials)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+])
+class PasswordHashingTests(APITestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='hasher', email='hasher@example.com')
+        self.user.password = make_password('Hasher-pass-1', hasher='scrypt')
+        self.user.save()
+        self.credentials = {'username': 'hasher', 'password': 'Hasher-pass-1'}
+
+    def test_login_rehashes_with_the_preferred_hasher(self):
+        self.assertEqual(self.client.post('/api/login/', self.credentials).status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+
+    def test_full_queue_returns_503(self):
+        pool, _slots = _get_pool()
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()  # every slot taken
+        with self.settings(PASSWORD_HASH_WAIT=0), \
+                mock.patch('core.passwords._get_pool', return_value=(pool, slots)):
+            response = self.client.post('/api/login/', self.credentials)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class BlacklistFilterTests(APITestCase):
+    def test_rebuild_runs_in_the_background_and_swaps_in(self):
+        user = get_user_model().objects.create_user(username='revoked', email='revoked@example.com')
+        refresh = ClaimsRefreshToken.for_user(user)
+        refresh.blacklist()
+        cache = BlacklistedJTICache()
+
+        with mock.patch('user_management.blacklist.threading.Thread') as thread:
+            # No filter yet: the caller checks the table instead of waiting for a build
+            self.assertTrue(cache.might_contain('unknown'))
+            self.assertTrue(cache.might_contain('unknown'))
+        thread.return_value.start.assert_called_once()
+
+        cache.rebuild()  # what the background thread runs
+        self.assertFalse(cache.might_contain('unknown'))
+        self.assertTrue(cache.might_contain(refresh['jti']))
+
+    def test_catch_ups_count_each_jti_once(self):
+        user = get_user_model().objects.create_user(username='revoked', email='revoked@example.com')
+        ClaimsRefreshToken.for_user(user).blacklist()
+        cache = BlacklistedJTICache()
+        cache.rebuild()
+        for _ in range(3):
+            # Each catch-up re-reads the overlap window, which holds the same row
+            cache._catch_up(timezone.now())
+        self.assertEqual(cache._count, 1)
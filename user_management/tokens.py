@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.permissions import MASK_CLAIM, encode_mask, permission_mask
+
+from .blacklist import blacklist_cache_enabled, jti_cache, notify_blacklisted
+
+
+USER_CLAIMS = ('username', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def set_user_claims(token, user):
+    token['username'] = user.get_username()
+    token['role'] = getattr(user, 'role', None)
+    token['is_active'] = user.is_active
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token that also carries the claims needed to authenticate
+    without a user lookup (role, is_active, is_staff, is_superuser,
+    username). Access tokens derived from it copy these claims, refreshed
+    from the user row, and add the user's permissions as a bitmask
+    (``core.permissions.MASK_CLAIM``) for ``RolePermission``.
+
+    With ``JWT_BLACKLIST_CACHE`` on, the blacklist check consults the
+    per-process JTI Bloom filter first and only queries the table on a hit.
+    """
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        set_user_claims(token, user)
+        token._user = user
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        user = getattr(self, '_user', None)
+        if user is None:
+            # Minted on /token/refresh/: pick up role and status changes
+            user = get_user_model().objects.only('id', *USER_CLAIMS).get(
+                **{api_settings.USER_ID_FIELD: self.payload[api_settings.USER_ID_CLAIM]}
+            )
+            set_user_claims(access, user)
+        access[MASK_CLAIM] = encode_mask(permission_mask(user))
+        return access
+
+    def check_blacklist(self):
+        if blacklist_cache_enabled() and not jti_cache.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            return
+        super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        transaction.on_commit(lambda: notify_blacklisted(jti))
+        return result
@@ -2,9 +2,12 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import ChangePasswordSerializer
+from .tokens import ClaimsRefreshToken
 from django.conf import settings
+from core.middleware import get_db_user
+from core.passwords import set_user_password
+from core.permissions import request_mask
 from .serializers import (
     RegisterSerializer, 
     LoginSerializer, 
@@ -15,6 +18,7 @@ from .serializers import (
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'register'
     
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
@@ -31,12 +35,13 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'login'
     
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             access_token = str(refresh.access_token)
             
             response = Response({
@@ -89,7 +94,7 @@ class LogoutView(APIView):
         try:
             refresh_token = request.COOKIES.get('refresh_token')
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = ClaimsRefreshToken(refresh_token)
                 token.blacklist()  # ✅ Mark token as blacklisted
 
             response = Response({"message": "Successfully logged out"})
@@ -103,6 +108,7 @@ class LogoutView(APIView):
 
 class TokenRefreshView(APIView):
     permission_classes = [AllowAny]
+    throttle_scope = 'token_refresh'
     
     def post(self, request):
         refresh_token = request.COOKIES.get('refresh_token')
@@ -114,7 +120,7 @@ class TokenRefreshView(APIView):
             
         try:
             # Verify and create new refresh token
-            refresh = RefreshToken(refresh_token)
+            refresh = ClaimsRefreshToken(refresh_token)
             
             # If token rotation is enabled, blacklist the current token
             if getattr(settings, 'SIMPLE_JWT', {}).get('ROTATE_REFRESH_TOKENS', False):
@@ -125,7 +131,7 @@ class TokenRefreshView(APIView):
                     pass
                 
                 # Get new tokens
-                refresh = RefreshToken.for_user(request.user)
+                refresh = ClaimsRefreshToken.for_user(get_db_user(request.user))
             
             response = Response({"message": "Token refreshed successfully"})
             
@@ -162,12 +168,12 @@ class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(get_db_user(request.user))
         return Response(serializer.data)
     
     def patch(self, request):
         serializer = UserProfileSerializer(
-            request.user, 
+            get_db_user(request.user), 
             data=request.data, 
             partial=True
         )
@@ -181,11 +187,11 @@ class UserPermissionsView(APIView):
 
     def get(self, request):
         """
-        Get all permissions for the currently authenticated user
+        Get all permissions for the currently authenticated user, read from
+        the access token's permission bitmask (no user or permission queries)
         """
         try:
-            user = request.user
-            serializer = UserPermissionsSerializer(user)
+            serializer = UserPermissionsSerializer(request.user, context={'mask': request_mask(request)})
             
             return Response({
                 'success': True,
@@ -202,10 +208,10 @@ class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request):
-        serializer = ChangePasswordSerializer(data=request.data, context={"request": request})
+        user = get_db_user(request.user)
+        serializer = ChangePasswordSerializer(data=request.data, context={"request": request, "user": user})
         if serializer.is_valid():
-            user = request.user
-            user.set_password(serializer.validated_data["new_password"])
+            set_user_password(user, serializer.validated_data["new_password"])
             user.save()
             return Response({"message": "Password changed successfully"}, status=status.HTTP_200_OK)
         